@@ -0,0 +1,230 @@
+"""Temel şema: Supabase tabloları ve uygulama tabloları
+
+Sonraki revizyonların üzerine kurulduğu ilk şema; boş bir veritabanında
+`alembic upgrade head` buradan başlar. `users` ve `contacts` Supabase tarafında
+yönetilir ve projede genellikle zaten vardır, bu yüzden yalnızca yoksa oluşturulur.
+Tablolar elle (ör. `create_all` ile) kurulmuş ve henüz `alembic_version`'ı olmayan
+veritabanları `alembic stamp 0000` ile işaretlenip yükseltilir.
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0000'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CINSIYET = postgresql.ENUM('ERKEK', 'KADIN', 'BELIRTMEK_ISTEMIYORUM', name='cinsiyet', create_type=False)
+ABONELIK_TIPI = postgresql.ENUM('UCRETSIZ', 'PREMIUM', name='aboneliktipi', create_type=False)
+RUH_HALI = postgresql.ENUM('IYI', 'ORTA', 'KOTU', name='ruhhali', create_type=False)
+ILISKI = postgresql.ENUM('AILE', 'ARKADAS', 'KOMSU', 'DIGER', name='iliski', create_type=False)
+PLATFORM = postgresql.ENUM('IOS', 'ANDROID', name='platform', create_type=False)
+ALARM_TIPI = postgresql.ENUM('OTOMATIK', 'MANUEL', 'PANIK', name='alarmtipi', create_type=False)
+ALARM_DURUM = postgresql.ENUM('AKTIF', 'IPTAL_EDILDI', 'COZUMLENDI', name='alarmdurum', create_type=False)
+BILDIRIM_TIPI = postgresql.ENUM('HATIRLATMA', 'UYARI', 'ALARM', 'SISTEM', name='bildirimtipi', create_type=False)
+DOGRULAMA_TIPI = postgresql.ENUM('EMAIL', 'TELEFON', 'SIFRE_SIFIRLAMA', name='dogrulamatipi', create_type=False)
+
+ENUMLAR = [
+    CINSIYET, ABONELIK_TIPI, RUH_HALI, ILISKI, PLATFORM,
+    ALARM_TIPI, ALARM_DURUM, BILDIRIM_TIPI, DOGRULAMA_TIPI,
+]
+
+# Kullanıcıya bağlı tablolar (kullanicilar'dan sonra oluşturulur, ondan önce silinir)
+BAGLI_TABLOLAR = [
+    'dogrulama_kodlari', 'refresh_tokenlar', 'bildirimler', 'alarmlar',
+    'cihazlar', 'acil_kisiler', 'checkinler',
+]
+
+
+def _kullanici_fk() -> sa.ForeignKeyConstraint:
+    return sa.ForeignKeyConstraint(['kullanici_id'], ['kullanicilar.id'], ondelete='CASCADE')
+
+
+def upgrade() -> None:
+    # Supabase tabloları - şema README'dekiyle aynı (token_surumu 0010'da eklenir)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS public.users (
+            id uuid NOT NULL DEFAULT gen_random_uuid(),
+            email character varying NOT NULL UNIQUE,
+            password_hash character varying NOT NULL,
+            first_name character varying,
+            last_name character varying,
+            phone_number character varying,
+            is_active boolean DEFAULT true,
+            is_verified boolean DEFAULT false,
+            role character varying DEFAULT 'user',
+            last_login_at timestamp with time zone,
+            created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+            updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT users_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS public.contacts (
+            id uuid NOT NULL DEFAULT gen_random_uuid(),
+            user_id uuid NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            name character varying(100) NOT NULL,
+            phone_number character varying(20) NOT NULL,
+            email character varying(255) NULL,
+            created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+            updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT contacts_pkey PRIMARY KEY (id),
+            CONSTRAINT unique_user_phone UNIQUE (user_id, phone_number)
+        )
+    """)
+
+    for enum in ENUMLAR:
+        enum.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'kullanicilar',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('telefon', sa.String(length=20), nullable=False),
+        sa.Column('sifre_hash', sa.String(length=255), nullable=False),
+        sa.Column('ad', sa.String(length=50), nullable=False),
+        sa.Column('soyad', sa.String(length=50), nullable=False),
+        sa.Column('profil_foto', sa.String(length=500), nullable=True),
+        sa.Column('dogum_tarihi', sa.DateTime(), nullable=True),
+        sa.Column('cinsiyet', CINSIYET, nullable=True),
+        sa.Column('adres', sa.JSON(), nullable=True),
+        sa.Column('email_dogrulandi', sa.Boolean(), nullable=True),
+        sa.Column('telefon_dogrulandi', sa.Boolean(), nullable=True),
+        sa.Column('abonelik_tipi', ABONELIK_TIPI, nullable=True),
+        sa.Column('abonelik_bitis', sa.DateTime(), nullable=True),
+        sa.Column('checkin_suresi_saat', sa.Integer(), nullable=True),
+        sa.Column('konum_paylasimi', sa.Boolean(), nullable=True),
+        sa.Column('olusturma_tarihi', sa.DateTime(), nullable=True),
+        sa.Column('guncelleme_tarihi', sa.DateTime(), nullable=True),
+        sa.Column('silinme_tarihi', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_kullanicilar_email', 'kullanicilar', ['email'], unique=True)
+    op.create_index('ix_kullanicilar_telefon', 'kullanicilar', ['telefon'], unique=True)
+
+    op.create_table(
+        'checkinler',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kullanici_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tarih', sa.DateTime(), nullable=True),
+        sa.Column('enlem', sa.Float(), nullable=True),
+        sa.Column('boylam', sa.Float(), nullable=True),
+        sa.Column('adres', sa.String(length=500), nullable=True),
+        sa.Column('not', sa.Text(), nullable=True),
+        sa.Column('ruh_hali', RUH_HALI, nullable=True),
+        _kullanici_fk(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'acil_kisiler',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kullanici_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('ad', sa.String(length=50), nullable=False),
+        sa.Column('soyad', sa.String(length=50), nullable=False),
+        sa.Column('telefon', sa.String(length=20), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('iliski', ILISKI, nullable=True),
+        sa.Column('oncelik', sa.Integer(), nullable=True),
+        sa.Column('ozel_mesaj', sa.Text(), nullable=True),
+        sa.Column('dogrulandi', sa.Boolean(), nullable=True),
+        sa.Column('dogrulama_kodu', sa.String(length=10), nullable=True),
+        sa.Column('ekleme_tarihi', sa.DateTime(), nullable=True),
+        _kullanici_fk(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'cihazlar',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kullanici_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('cihaz_id', sa.String(length=255), nullable=False),
+        sa.Column('cihaz_adi', sa.String(length=100), nullable=True),
+        sa.Column('platform', PLATFORM, nullable=False),
+        sa.Column('push_token', sa.String(length=500), nullable=True),
+        sa.Column('son_aktif', sa.DateTime(), nullable=True),
+        sa.Column('olusturma_tarihi', sa.DateTime(), nullable=True),
+        _kullanici_fk(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'alarmlar',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kullanici_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tip', ALARM_TIPI, nullable=False),
+        sa.Column('durum', ALARM_DURUM, nullable=True),
+        sa.Column('mesaj', sa.Text(), nullable=True),
+        sa.Column('enlem', sa.Float(), nullable=True),
+        sa.Column('boylam', sa.Float(), nullable=True),
+        sa.Column('bilgilendirilenler', sa.JSON(), nullable=True),
+        sa.Column('tarih', sa.DateTime(), nullable=True),
+        sa.Column('iptal_tarihi', sa.DateTime(), nullable=True),
+        sa.Column('iptal_nedeni', sa.Text(), nullable=True),
+        _kullanici_fk(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'bildirimler',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kullanici_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('baslik', sa.String(length=200), nullable=False),
+        sa.Column('icerik', sa.Text(), nullable=False),
+        sa.Column('tip', BILDIRIM_TIPI, nullable=False),
+        sa.Column('okundu', sa.Boolean(), nullable=True),
+        sa.Column('tarih', sa.DateTime(), nullable=True),
+        _kullanici_fk(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'refresh_tokenlar',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kullanici_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('token', sa.String(length=255), nullable=False),
+        sa.Column('cihaz_id', sa.String(length=255), nullable=True),
+        sa.Column('olusturma_tarihi', sa.DateTime(), nullable=True),
+        sa.Column('son_kullanim', sa.DateTime(), nullable=True),
+        sa.Column('gecerlilik', sa.DateTime(), nullable=False),
+        sa.Column('iptal_edildi', sa.Boolean(), nullable=True),
+        _kullanici_fk(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token'),
+    )
+    op.create_table(
+        'dogrulama_kodlari',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kullanici_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kod', sa.String(length=100), nullable=False),
+        sa.Column('tip', DOGRULAMA_TIPI, nullable=False),
+        sa.Column('gecerlilik', sa.DateTime(), nullable=False),
+        sa.Column('kullanildi', sa.Boolean(), nullable=True),
+        sa.Column('olusturma_tarihi', sa.DateTime(), nullable=True),
+        _kullanici_fk(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'sss',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kategori', sa.String(length=100), nullable=False),
+        sa.Column('soru', sa.Text(), nullable=False),
+        sa.Column('cevap', sa.Text(), nullable=False),
+        sa.Column('sira', sa.Integer(), nullable=True),
+        sa.Column('aktif', sa.Boolean(), nullable=True),
+        sa.Column('olusturma_tarihi', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    # Supabase tabloları (users, contacts) önceden var olabileceği için bırakılır
+    op.drop_table('sss')
+    for tablo in BAGLI_TABLOLAR:
+        op.drop_table(tablo)
+    op.drop_index('ix_kullanicilar_telefon', table_name='kullanicilar')
+    op.drop_index('ix_kullanicilar_email', table_name='kullanicilar')
+    op.drop_table('kullanicilar')
+    for enum in reversed(ENUMLAR):
+        enum.drop(op.get_bind(), checkfirst=True)
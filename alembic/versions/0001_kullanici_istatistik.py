@@ -0,0 +1,33 @@
+"""kullanici_istatistik tablosu
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-17 10:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0001'
+down_revision: Union[str, None] = '0000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'kullanici_istatistik',
+        sa.Column('kullanici_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('toplam_checkin', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('mevcut_seri', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('en_uzun_seri', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('son_checkin', sa.DateTime(), nullable=True),
+        sa.Column('guncelleme_tarihi', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['kullanici_id'], ['kullanicilar.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('kullanici_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('kullanici_istatistik')
@@ -0,0 +1,44 @@
+"""Kullanıcı bazlı sık sorgular için bileşik ve kısmi indeksler
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 11:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (indeks adı, tablo, kolonlar, kısmi indeks koşulu)
+INDEKSLER = [
+    ('ix_checkinler_kullanici_tarih', 'checkinler', ['kullanici_id', sa.text('tarih DESC')], None),
+    ('ix_alarmlar_kullanici_tarih', 'alarmlar', ['kullanici_id', sa.text('tarih DESC')], None),
+    ('ix_alarmlar_aktif', 'alarmlar', ['kullanici_id'], "durum = 'AKTIF'"),
+    ('ix_bildirimler_kullanici_tarih', 'bildirimler', ['kullanici_id', sa.text('tarih DESC')], None),
+    ('ix_bildirimler_okunmamis', 'bildirimler', ['kullanici_id', sa.text('tarih DESC')], 'okundu = false'),
+    ('ix_acil_kisiler_kullanici_oncelik', 'acil_kisiler', ['kullanici_id', 'oncelik'], None),
+    ('ix_refresh_tokenlar_kullanici', 'refresh_tokenlar', ['kullanici_id'], None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY transaction içinde çalışamaz; tabloları kilitlemeden oluştur
+    with op.get_context().autocommit_block():
+        for ad, tablo, kolonlar, kosul in INDEKSLER:
+            op.create_index(
+                ad, tablo, kolonlar,
+                postgresql_where=sa.text(kosul) if kosul else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for ad, tablo, _, _ in reversed(INDEKSLER):
+            op.drop_index(ad, table_name=tablo, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,22 @@
+"""kullanicilar.token_surumu kolonu
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 12:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('kullanicilar', sa.Column('token_surumu', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('kullanicilar', 'token_surumu')
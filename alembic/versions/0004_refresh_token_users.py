@@ -0,0 +1,64 @@
+"""refresh_tokenlar: users tablosuna bağla, rotasyon işareti ekle
+
+/login refresh token'ı Supabase `users` kimliği için üretir; yabancı anahtar
+`kullanicilar` yerine `users(id)` tablosuna taşınır. users tablosunda
+karşılığı olmayan (hiç kullanılamayan) satırlar silinir.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:30:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KISIT = 'refresh_tokenlar_kullanici_id_fkey'
+
+
+def _fk_kaldir(tablo: str, hedef: str) -> None:
+    """Tablonun hedef tabloya işaret eden yabancı anahtarlarını (adından bağımsız) kaldır"""
+    op.execute(f"""
+        DO $$
+        DECLARE ad text;
+        BEGIN
+            FOR ad IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = '{tablo}'::regclass AND contype = 'f' AND confrelid = '{hedef}'::regclass
+            LOOP
+                EXECUTE format('ALTER TABLE {tablo} DROP CONSTRAINT %I', ad);
+            END LOOP;
+        END $$;
+    """)
+
+
+def _fk_ekle(tablo: str, hedef: str, kisit: str) -> None:
+    """Karşılığı olmayan satırları sil, kısıtı NOT VALID ekle ve kilit tutmadan doğrula"""
+    op.execute(f"DELETE FROM {tablo} t WHERE NOT EXISTS (SELECT 1 FROM {hedef} h WHERE h.id = t.kullanici_id)")
+    op.execute(
+        f"ALTER TABLE {tablo} ADD CONSTRAINT {kisit} FOREIGN KEY (kullanici_id) "
+        f"REFERENCES {hedef}(id) ON DELETE CASCADE NOT VALID"
+    )
+
+
+def _fk_dogrula(tablo: str, kisit: str) -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {tablo} VALIDATE CONSTRAINT {kisit}")
+
+
+def upgrade() -> None:
+    op.add_column('refresh_tokenlar', sa.Column('yenilenme_tarihi', sa.DateTime(), nullable=True))
+    _fk_kaldir('refresh_tokenlar', 'kullanicilar')
+    _fk_ekle('refresh_tokenlar', 'users', KISIT)
+    _fk_dogrula('refresh_tokenlar', KISIT)
+
+
+def downgrade() -> None:
+    _fk_kaldir('refresh_tokenlar', 'users')
+    _fk_ekle('refresh_tokenlar', 'kullanicilar', KISIT)
+    _fk_dogrula('refresh_tokenlar', KISIT)
+    op.drop_column('refresh_tokenlar', 'yenilenme_tarihi')
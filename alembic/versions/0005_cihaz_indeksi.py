@@ -0,0 +1,29 @@
+"""cihazlar (kullanici_id, cihaz_id) indeksi - toplu son_aktif güncellemesi için
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 13:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_cihazlar_kullanici_cihaz', 'cihazlar', ['kullanici_id', 'cihaz_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_cihazlar_kullanici_cihaz', table_name='cihazlar', postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,35 @@
+"""dogrulama_kodlari deneme sayacı ve indeksleri
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 14:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (indeks adı, kolonlar)
+INDEKSLER = [
+    ('ix_dogrulama_kodlari_kullanici_tip', ['kullanici_id', 'tip', 'kullanildi']),
+    ('ix_dogrulama_kodlari_gecerlilik', ['gecerlilik']),
+]
+
+
+def upgrade() -> None:
+    op.add_column('dogrulama_kodlari', sa.Column('deneme', sa.Integer(), nullable=False, server_default='0'))
+    with op.get_context().autocommit_block():
+        for ad, kolonlar in INDEKSLER:
+            op.create_index(ad, 'dogrulama_kodlari', kolonlar, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for ad, _ in reversed(INDEKSLER):
+            op.drop_index(ad, table_name='dogrulama_kodlari', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('dogrulama_kodlari', 'deneme')
@@ -0,0 +1,45 @@
+"""alarmlar.beklenen_tarih, otomatik alarm tekilliği ve zamanlayıcı senkron indeksi
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 15:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('alarmlar', sa.Column('beklenen_tarih', sa.DateTime(), nullable=True))
+    # Birden fazla zamanlayıcı süreci aynı kaçırılan check-in için ikinci alarm ekleyemez
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_alarmlar_otomatik_beklenen', 'alarmlar', ['kullanici_id', 'beklenen_tarih'],
+            unique=True,
+            postgresql_where=sa.text("tip = 'OTOMATIK'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Zamanlayıcı son turdan beri değişen istatistikleri bu indeksle okur
+        op.create_index(
+            'ix_kullanici_istatistik_guncelleme', 'kullanici_istatistik', ['guncelleme_tarihi'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_kullanici_istatistik_guncelleme', table_name='kullanici_istatistik',
+            postgresql_concurrently=True, if_exists=True,
+        )
+        op.drop_index(
+            'ux_alarmlar_otomatik_beklenen', table_name='alarmlar', postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_column('alarmlar', 'beklenen_tarih')
@@ -0,0 +1,60 @@
+"""kullanicilar.sonraki_beklenen kolonu ve gecikme indeksi
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 16:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('kullanicilar', sa.Column('sonraki_beklenen', sa.DateTime(), nullable=True))
+    # Mevcut kullanıcılar için son check-in + check-in süresi (erteleme geçmişi kalıcı değildi)
+    op.execute("""
+        UPDATE kullanicilar AS k
+        SET sonraki_beklenen = i.son_checkin + make_interval(hours => COALESCE(k.checkin_suresi_saat, 24))
+        FROM kullanici_istatistik AS i
+        WHERE i.kullanici_id = k.id AND i.son_checkin IS NOT NULL
+    """)
+    with op.get_context().autocommit_block():
+        # "Şu an gecikenler": WHERE sonraki_beklenen < now() ORDER BY sonraki_beklenen, id
+        op.create_index(
+            'ix_kullanicilar_sonraki_beklenen', 'kullanicilar', ['sonraki_beklenen', 'id'],
+            postgresql_where=sa.text('silinme_tarihi IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Zamanlayıcının değişiklik senkronu artık kullanicilar üzerinden (erteleme de dahil)
+        op.create_index(
+            'ix_kullanicilar_guncelleme', 'kullanicilar', ['guncelleme_tarihi'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_kullanici_istatistik_guncelleme', table_name='kullanici_istatistik',
+            postgresql_concurrently=True, if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_kullanici_istatistik_guncelleme', 'kullanici_istatistik', ['guncelleme_tarihi'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_kullanicilar_guncelleme', table_name='kullanicilar', postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index(
+            'ix_kullanicilar_sonraki_beklenen', table_name='kullanicilar',
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column('kullanicilar', 'sonraki_beklenen')
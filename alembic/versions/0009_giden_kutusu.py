@@ -0,0 +1,54 @@
+"""giden_kutusu tablosu (e-posta outbox)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 18:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GIDEN_TIPI = postgresql.ENUM('ALARM', 'DOGRULAMA', 'SIFRE_SIFIRLAMA', name='gidentipi', create_type=False)
+GIDEN_DURUM = postgresql.ENUM('BEKLIYOR', 'VAZGECILDI', name='gidendurum', create_type=False)
+
+
+def upgrade() -> None:
+    GIDEN_TIPI.create(op.get_bind(), checkfirst=True)
+    GIDEN_DURUM.create(op.get_bind(), checkfirst=True)
+    op.create_table(
+        'giden_kutusu',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tip', GIDEN_TIPI, nullable=False),
+        sa.Column('alici', sa.String(length=255), nullable=False),
+        sa.Column('veri', sa.JSON(), nullable=False),
+        sa.Column('alarm_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('durum', GIDEN_DURUM, nullable=False, server_default='BEKLIYOR'),
+        sa.Column('deneme', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sonraki_deneme', sa.DateTime(), nullable=False),
+        sa.Column('son_hata', sa.Text(), nullable=True),
+        sa.Column('olusturma_tarihi', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['alarm_id'], ['alarmlar.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Yeni ve boş tablo: indeksler CONCURRENTLY gerektirmez
+    # Worker sorgusu: WHERE durum = 'BEKLIYOR' AND sonraki_deneme <= now() ORDER BY sonraki_deneme
+    op.create_index(
+        'ix_giden_kutusu_bekleyen', 'giden_kutusu', ['sonraki_deneme'],
+        postgresql_where=sa.text("durum = 'BEKLIYOR'"),
+    )
+    op.create_index(
+        'ix_giden_kutusu_alarm', 'giden_kutusu', ['alarm_id'],
+        postgresql_where=sa.text('alarm_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('giden_kutusu')
+    GIDEN_DURUM.drop(op.get_bind(), checkfirst=True)
+    GIDEN_TIPI.drop(op.get_bind(), checkfirst=True)
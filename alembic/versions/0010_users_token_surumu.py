@@ -0,0 +1,26 @@
+"""users.token_surumu kolonu
+
+Access token sürüm kontrolü /login'in token verdiği Supabase `users` hesabına
+karşı yapılır (kullanicilar.token_surumu yalnızca eski router'lar içindir).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 11:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Sabit varsayılanlı kolon: tablo yeniden yazılmaz
+    op.add_column('users', sa.Column('token_surumu', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_surumu')
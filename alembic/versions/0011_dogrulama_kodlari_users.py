@@ -0,0 +1,56 @@
+"""dogrulama_kodlari: users tablosuna bağla
+
+E-posta doğrulama ve şifre sıfırlama /register ve /login ile aynı kimlik
+deposunu (Supabase `users`) kullanır. Karşılığı olmayan kodlar silinir.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLO = 'dogrulama_kodlari'
+KISIT = 'dogrulama_kodlari_kullanici_id_fkey'
+
+
+def _fk_kaldir(hedef: str) -> None:
+    """Tablonun hedef tabloya işaret eden yabancı anahtarlarını (adından bağımsız) kaldır"""
+    op.execute(f"""
+        DO $$
+        DECLARE ad text;
+        BEGIN
+            FOR ad IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = '{TABLO}'::regclass AND contype = 'f' AND confrelid = '{hedef}'::regclass
+            LOOP
+                EXECUTE format('ALTER TABLE {TABLO} DROP CONSTRAINT %I', ad);
+            END LOOP;
+        END $$;
+    """)
+
+
+def _fk_ekle(hedef: str) -> None:
+    """Karşılığı olmayan satırları sil, kısıtı NOT VALID ekle ve kilit tutmadan doğrula"""
+    op.execute(f"DELETE FROM {TABLO} t WHERE NOT EXISTS (SELECT 1 FROM {hedef} h WHERE h.id = t.kullanici_id)")
+    op.execute(
+        f"ALTER TABLE {TABLO} ADD CONSTRAINT {KISIT} FOREIGN KEY (kullanici_id) "
+        f"REFERENCES {hedef}(id) ON DELETE CASCADE NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {TABLO} VALIDATE CONSTRAINT {KISIT}")
+
+
+def upgrade() -> None:
+    _fk_kaldir('kullanicilar')
+    _fk_ekle('users')
+
+
+def downgrade() -> None:
+    _fk_kaldir('users')
+    _fk_ekle('kullanicilar')
@@ -0,0 +1,45 @@
+"""Mevcut OTOMATIK alarmlar için beklenen_tarih doldurma
+
+0007'den önce oluşmuş OTOMATIK alarmlarda beklenen_tarih NULL kaldığı için
+tekil indeks onları görmüyordu; zamanlayıcı ilk açılışta hâlâ ALARM aşamasındaki
+kullanıcılar için ikinci bir alarm (ve bildirim) üretiyordu. Kullanıcının güncel
+beklenen zamanı geçtikten sonra oluşmuş en son alarm, o kaçırılan check-in'in
+alarmıdır; beklenen_tarih zamanlayıcının kullandığı saniye hassasiyetinde yazılır.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 13:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        UPDATE alarmlar AS a
+        SET beklenen_tarih = son.beklenen
+        FROM (
+            SELECT DISTINCT ON (a2.kullanici_id)
+                a2.id, a2.kullanici_id, date_trunc('second', k.sonraki_beklenen) AS beklenen
+            FROM alarmlar AS a2
+            JOIN kullanicilar AS k ON k.id = a2.kullanici_id
+            WHERE a2.tip = 'OTOMATIK' AND a2.beklenen_tarih IS NULL
+              AND k.sonraki_beklenen IS NOT NULL AND a2.tarih >= k.sonraki_beklenen
+            ORDER BY a2.kullanici_id, a2.tarih DESC
+        ) AS son
+        WHERE a.id = son.id
+          AND NOT EXISTS (
+              SELECT 1 FROM alarmlar AS m
+              WHERE m.kullanici_id = son.kullanici_id AND m.tip = 'OTOMATIK' AND m.beklenen_tarih = son.beklenen
+          )
+    """)
+
+
+def downgrade() -> None:
+    # Doldurulan satırlar sonradan oluşanlardan ayırt edilemez; kolon 0007 downgrade'inde düşer
+    pass
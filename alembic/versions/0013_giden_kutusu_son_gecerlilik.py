@@ -0,0 +1,31 @@
+"""giden_kutusu.son_gecerlilik ve vazgeçilen satırlardan gizli alanların silinmesi
+
+Doğrulama kodu ve şifre sıfırlama token'ı `veri` içinde düz metin tutulur. Bu
+satırlar artık kodun geçerlilik süresi kadar gönderilebilir; mevcut vazgeçilmiş
+satırlardaki kod ve token alanları silinir.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 14:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('giden_kutusu', sa.Column('son_gecerlilik', sa.DateTime(), nullable=True))
+    op.execute("""
+        UPDATE giden_kutusu
+        SET veri = (veri::jsonb - 'kod' - 'token')::json
+        WHERE durum = 'VAZGECILDI' AND tip IN ('DOGRULAMA', 'SIFRE_SIFIRLAMA')
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('giden_kutusu', 'son_gecerlilik')
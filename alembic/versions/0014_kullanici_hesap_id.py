@@ -0,0 +1,44 @@
+"""kullanicilar.hesap_id: profil satırını users hesabına eşle
+
+Access token'ın `sub`'ı Supabase `users` kimliğidir; check-in, alarm ve profil
+tabloları ise `kullanicilar`a bağlıdır. Eşleme açık bir kolonla tutulur; mevcut
+profiller aynı e-postalı hesaba bağlanır, eşi olmayanlar NULL kalır.
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 10:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KISIT = 'kullanicilar_hesap_id_fkey'
+INDEKS = 'ux_kullanicilar_hesap_id'
+
+
+def upgrade() -> None:
+    op.add_column('kullanicilar', sa.Column('hesap_id', UUID(as_uuid=True), nullable=True))
+    op.execute("UPDATE kullanicilar k SET hesap_id = u.id FROM users u WHERE u.email = k.email")
+    op.execute(
+        f"ALTER TABLE kullanicilar ADD CONSTRAINT {KISIT} FOREIGN KEY (hesap_id) "
+        f"REFERENCES users(id) ON DELETE CASCADE NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE kullanicilar VALIDATE CONSTRAINT {KISIT}")
+        op.create_index(
+            INDEKS, 'kullanicilar', ['hesap_id'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(INDEKS, table_name='kullanicilar', postgresql_concurrently=True, if_exists=True)
+    op.drop_constraint(KISIT, 'kullanicilar', type_='foreignkey')
+    op.drop_column('kullanicilar', 'hesap_id')
@@ -0,0 +1,25 @@
+"""kullanicilar.token_surumu kolonunu kaldır
+
+Access token'ların `ver` claim'i `users.token_surumu`'ndan gelir; oturum iptali
+yalnızca o kolonla yapılır. Profil tablosundaki kopya kullanılmıyor.
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 11:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0015'
+down_revision: Union[str, None] = '0014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_column('kullanicilar', 'token_surumu')
+
+
+def downgrade() -> None:
+    op.add_column('kullanicilar', sa.Column('token_surumu', sa.Integer(), nullable=False, server_default='0'))
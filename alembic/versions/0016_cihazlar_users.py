@@ -0,0 +1,91 @@
+"""cihazlar: users tablosuna bağla, (kullanici_id, cihaz_id) tekil
+
+Cihaz aktivitesi access token'daki `sub` (Supabase `users` kimliği) ve `cid`
+ile kaydedilir; satırlar aktivite flush'ında upsert edilir. Giriş sırasında
+platform bilinmediği için kolon boş bırakılabilir. Profili hesaba eşlenmiş
+mevcut satırlar taşınır, eşlenemeyenler silinir; aynı cihazın tekrarlarından
+en son aktif olanı kalır.
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-19 12:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '0016'
+down_revision: Union[str, None] = '0015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KISIT = 'cihazlar_kullanici_id_fkey'
+ESKI_INDEKS = 'ix_cihazlar_kullanici_cihaz'
+TEKIL_INDEKS = 'ux_cihazlar_kullanici_cihaz'
+
+
+def _fk_kaldir(hedef: str) -> None:
+    """cihazlar'ın hedef tabloya işaret eden yabancı anahtarlarını (adından bağımsız) kaldır"""
+    op.execute(f"""
+        DO $$
+        DECLARE ad text;
+        BEGIN
+            FOR ad IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = 'cihazlar'::regclass AND contype = 'f' AND confrelid = '{hedef}'::regclass
+            LOOP
+                EXECUTE format('ALTER TABLE cihazlar DROP CONSTRAINT %I', ad);
+            END LOOP;
+        END $$;
+    """)
+
+
+def _fk_ekle(hedef: str) -> None:
+    """Karşılığı olmayan satırları sil, kısıtı NOT VALID ekle ve kilit tutmadan doğrula"""
+    op.execute(f"DELETE FROM cihazlar c WHERE NOT EXISTS (SELECT 1 FROM {hedef} h WHERE h.id = c.kullanici_id)")
+    op.execute(
+        f"ALTER TABLE cihazlar ADD CONSTRAINT {KISIT} FOREIGN KEY (kullanici_id) "
+        f"REFERENCES {hedef}(id) ON DELETE CASCADE NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE cihazlar VALIDATE CONSTRAINT {KISIT}")
+
+
+def upgrade() -> None:
+    _fk_kaldir('kullanicilar')
+    op.execute("""
+        UPDATE cihazlar c SET kullanici_id = k.hesap_id
+        FROM kullanicilar k
+        WHERE k.id = c.kullanici_id AND k.hesap_id IS NOT NULL
+    """)
+    op.execute("""
+        DELETE FROM cihazlar c
+        USING cihazlar d
+        WHERE c.kullanici_id = d.kullanici_id AND c.cihaz_id = d.cihaz_id
+          AND (COALESCE(c.son_aktif, '-infinity'), c.id) < (COALESCE(d.son_aktif, '-infinity'), d.id)
+    """)
+    op.alter_column('cihazlar', 'platform', nullable=True)
+    _fk_ekle('users')
+    with op.get_context().autocommit_block():
+        op.create_index(
+            TEKIL_INDEKS, 'cihazlar', ['kullanici_id', 'cihaz_id'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(ESKI_INDEKS, table_name='cihazlar', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            ESKI_INDEKS, 'cihazlar', ['kullanici_id', 'cihaz_id'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(TEKIL_INDEKS, table_name='cihazlar', postgresql_concurrently=True, if_exists=True)
+    _fk_kaldir('users')
+    op.execute("DELETE FROM cihazlar WHERE platform IS NULL")
+    op.alter_column('cihazlar', 'platform', nullable=False)
+    op.execute("""
+        UPDATE cihazlar c SET kullanici_id = k.id
+        FROM kullanicilar k
+        WHERE k.hesap_id = c.kullanici_id
+    """)
+    _fk_ekle('kullanicilar')
@@ -0,0 +1,38 @@
+"""checkinler.istemci_id - toplu senkronizasyonun kullanıcı bazlı tekrar anahtarı
+
+Çevrimdışı check-in'lerin cihazda üretilen id'si artık global primary key
+olarak kullanılmaz; (kullanici_id, istemci_id) üzerinde tekil indeksle tutulur.
+Daha önce toplu senkronize edilen satırların id'si istemci id'siydi; tekrar
+gönderimlerin yine tanınması için mevcut satırlarda istemci_id = id yapılır.
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-19 13:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = '0017'
+down_revision: Union[str, None] = '0016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEKS = 'ux_checkinler_kullanici_istemci'
+
+
+def upgrade() -> None:
+    op.add_column('checkinler', sa.Column('istemci_id', UUID(as_uuid=True), nullable=True))
+    op.execute("UPDATE checkinler SET istemci_id = id")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEKS, 'checkinler', ['kullanici_id', 'istemci_id'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(INDEKS, table_name='checkinler', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('checkinler', 'istemci_id')
@@ -1,14 +1,269 @@
 """
-Supabase Database Connection
+Veritabanı bağlantıları - SQLAlchemy (asyncpg) ve Supabase (PostgREST)
 """
-from supabase import create_client, Client
+from typing import AsyncGenerator, Optional
+import asyncio
+import time
+import uuid
+import httpx
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from postgrest.exceptions import APIError
+from supabase import AsyncClient, AsyncClientOptions
 
-# Supabase connection credentials
+from app.config import get_settings
 
-# Create Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+settings = get_settings()
 
 
-def get_supabase() -> Client:
-    """Returns the Supabase client instance"""
-    return supabase
\ No newline at end of file
+# ==================== SQLALCHEMY ====================
+
+class Base(DeclarativeBase):
+    """Tüm modeller için declarative base"""
+    pass
+
+
+class KimlikDeposuHatasi(RuntimeError):
+    """
+    PostgREST'in (Supabase) gördüğü `users` satırları SQLAlchemy bağlantısında yok.
+    
+    Oturum tabloları `users`'a bağlıdır; bu, DATABASE_URL'in Supabase projesinin
+    veritabanına işaret etmediği anlamına gelir ve sessizce geçiştirilmez.
+    """
+
+
+class PoolIstatistik:
+    """Bağlantı havuzu bekleme istatistikleri"""
+
+    def __init__(self):
+        self.bekleyen = 0
+        self.toplam_alim = 0
+        self.toplam_bekleme_sn = 0.0
+        self.max_bekleme_sn = 0.0
+
+    def kaydet(self, bekleme_sn: float) -> None:
+        self.toplam_alim += 1
+        self.toplam_bekleme_sn += bekleme_sn
+        if bekleme_sn > self.max_bekleme_sn:
+            self.max_bekleme_sn = bekleme_sn
+
+
+pool_istatistik = PoolIstatistik()
+
+
+class OlculenQueuePool(AsyncAdaptedQueuePool):
+    """Bağlantı alırken bekleyenleri ve bekleme süresini ölçen havuz"""
+
+    def _do_get(self):
+        pool_istatistik.bekleyen += 1
+        baslangic = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_istatistik.bekleyen -= 1
+            pool_istatistik.kaydet(time.perf_counter() - baslangic)
+
+
+def _engine_kwargs() -> dict:
+    """Ayarlara göre engine parametrelerini oluştur"""
+    if settings.DB_PGBOUNCER:
+        # PgBouncer transaction pooling: bağlantı tutma, prepared statement'ları
+        # cache'leme ve isimleri benzersiz üret (bağlantılar arası çakışmasın)
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            },
+        }
+    return {
+        "poolclass": OlculenQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {
+            # Sık çalışan check-in/alarm sorguları bağlantı başına prepared statement olarak saklanır
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    }
+
+
+engine = create_async_engine(settings.DATABASE_URL, echo=settings.DB_ECHO, **_engine_kwargs())
+
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """İstek başına veritabanı oturumu - hata yoksa commit, varsa rollback"""
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def warm_db_pool() -> None:
+    """Havuzdaki bağlantıları önceden aç (ilk isteklerin bağlantı maliyetini öde)"""
+    if settings.DB_PGBOUNCER or settings.DB_POOL_WARM <= 0:
+        return
+
+    async def _ac():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    adet = min(settings.DB_POOL_WARM, settings.DB_POOL_SIZE)
+    await asyncio.gather(*(_ac() for _ in range(adet)))
+
+
+def has_direct_connection() -> bool:
+    """Oturuma bağlı özellikler (LISTEN, advisory lock) için doğrudan bağlantı var mı"""
+    return bool(settings.DIRECT_DATABASE_URL) or not settings.DB_PGBOUNCER
+
+
+def get_direct_dsn() -> str:
+    """
+    asyncpg ile doğrudan bağlantı adresi - oturuma bağlı özellikler (LISTEN, advisory lock)
+    için ayrı, uzun ömürlü bağlantılar bu adresle açılır.
+    
+    PgBouncer transaction modunda bu özellikler anlamsızdır (kilit ve LISTEN başka
+    istemcilerle paylaşılan sunucu bağlantısında kalır); bu durumda DIRECT_DATABASE_URL
+    zorunludur ve verilmemişse hata fırlatılır.
+    """
+    if settings.DIRECT_DATABASE_URL:
+        url = make_url(settings.DIRECT_DATABASE_URL)
+    elif settings.DB_PGBOUNCER:
+        raise RuntimeError("DB_PGBOUNCER=True iken LISTEN/advisory lock için DIRECT_DATABASE_URL gerekli")
+    else:
+        url = engine.url
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def verify_identity_store() -> None:
+    """
+    SQLAlchemy bağlantısının Supabase (PostgREST) ile aynı veritabanına baktığını doğrula.
+    
+    /register ve /login `users` tablosunu PostgREST ile kullanır; refresh token,
+    doğrulama kodu ve son giriş zamanı aynı tabloya DATABASE_URL üzerinden SQL ile
+    yazılır. PostgREST'ten alınan örnek bir hesap SQL tarafında yoksa başlangıç durur.
+    """
+    async with engine.connect() as conn:
+        if await conn.scalar(text("SELECT to_regclass('public.users')")) is None:
+            raise KimlikDeposuHatasi("DATABASE_URL veritabanında public.users tablosu yok")
+    
+    result = await get_supabase().table("users").select("id").limit(1).execute()
+    if not result.data:
+        return
+    ornek = result.data[0]["id"]
+    async with engine.connect() as conn:
+        bulundu = await conn.scalar(
+            text("SELECT EXISTS (SELECT 1 FROM users WHERE id = CAST(:id AS uuid))"), {"id": ornek}
+        )
+    if not bulundu:
+        raise KimlikDeposuHatasi(
+            f"Supabase hesabı {ornek} DATABASE_URL veritabanında yok - "
+            "DATABASE_URL Supabase projesinin veritabanına işaret etmeli"
+        )
+
+
+async def close_db() -> None:
+    """Engine'i ve havuzdaki bağlantıları kapat"""
+    await engine.dispose()
+
+
+def get_pool_stats() -> dict:
+    """Havuz boyutlandırması için bağlantı havuzu istatistikleri"""
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, OlculenQueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "boyut": pool.size(),
+        "bosta": pool.checkedin(),
+        "kullanimda": pool.checkedout(),
+        "tasma": pool.overflow(),
+        "bekleyen": pool_istatistik.bekleyen,
+        "toplam_alim": pool_istatistik.toplam_alim,
+        "ort_bekleme_ms": round(
+            pool_istatistik.toplam_bekleme_sn / pool_istatistik.toplam_alim * 1000, 3
+        ) if pool_istatistik.toplam_alim else 0.0,
+        "max_bekleme_ms": round(pool_istatistik.max_bekleme_sn * 1000, 3),
+    }
+
+
+# ==================== SUPABASE ====================
+
+# PostgreSQL hata kodları (PostgREST APIError.code)
+UNIQUE_VIOLATION = "23505"
+INVALID_TEXT_REPRESENTATION = "22P02"
+
+# Paylaşılan HTTP istemcisi ve Supabase client'ı (lifespan içinde oluşturulur)
+_http_client: Optional[httpx.AsyncClient] = None
+_supabase: Optional[AsyncClient] = None
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """PostgREST çağrıları için keep-alive havuzlu HTTP/2 istemcisi oluştur"""
+    return httpx.AsyncClient(
+        http2=settings.SUPABASE_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+        timeout=settings.SUPABASE_TIMEOUT,
+    )
+
+
+def _create_supabase() -> AsyncClient:
+    global _http_client, _supabase
+    _http_client = _create_http_client()
+    _supabase = AsyncClient(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY,
+        options=AsyncClientOptions(
+            httpx_client=_http_client,
+            postgrest_client_timeout=settings.SUPABASE_TIMEOUT,
+            auto_refresh_token=False,
+            persist_session=False,
+        ),
+    )
+    return _supabase
+
+
+async def init_supabase() -> AsyncClient:
+    """Uygulama başlangıcında Supabase client'ını oluştur"""
+    if _supabase is None:
+        _create_supabase()
+    return _supabase
+
+
+async def close_supabase() -> None:
+    """Uygulama kapanışında bağlantı havuzunu kapat"""
+    global _http_client, _supabase
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _supabase = None
+
+
+def get_supabase() -> AsyncClient:
+    """
+    Returns the shared async Supabase client instance.
+
+    Lifespan çalışmadan çağrılırsa (ör. serverless) client ilk kullanımda oluşturulur.
+    """
+    if _supabase is None:
+        return _create_supabase()
+    return _supabase
+
+
+def is_pg_error(exc: APIError, code: str) -> bool:
+    """PostgREST hatasının verilen PostgreSQL hata koduna sahip olup olmadığını kontrol et"""
+    return exc.code == code
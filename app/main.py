@@ -1,14 +1,32 @@
 """
 Öldün mü? API - FastAPI Ana Uygulama (Supabase Entegrasyonu)
 """
-from fastapi import FastAPI, Request, status
+from fastapi import APIRouter, Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.config import get_settings
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.database import (
+    KimlikDeposuHatasi, init_supabase, close_supabase, warm_db_pool, verify_identity_store, close_db, get_pool_stats,
+    has_direct_connection,
+)
+from app.services.aktivite_service import activity_flush_loop, flush_activity, get_activity_stats
+from app.services.bildirim_service import get_outbox_stats, outbox_worker_loop
+from app.services.dogrulama_service import verification_code_cleanup_loop
+from app.services.email_service import close_smtp_pool, get_smtp_pool_stats, init_smtp_pool
+from app.services.token_service import refresh_token_cleanup_loop
+from app.services.tarama_service import get_sweep_stats, status_sweep_loop
+from app.services.zamanlayici_service import alarm_scheduler_loop, get_scheduler_stats
+from app.utils.security import (
+    get_password_hash_stats, get_token_cache_stats, get_user_cache_stats, shutdown_password_hasher,
+    user_cache_listener_loop,
+)
 from app.routers.auth import router as auth_router
 from app.routers.contacts import router as contacts_router
+from app.routers.ops import require_ops_key, router as ops_router
 
 settings = get_settings()
 
@@ -17,8 +35,49 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     """Uygulama başlangıç ve kapanış olayları"""
     print("🚀 Uygulama başlatılıyor... (Supabase)")
+    if settings.SCHEDULER_ENABLED and not has_direct_connection():
+        # Parça kiraları oturum düzeyinde advisory lock'tur; PgBouncer üzerinden iki
+        # süreç aynı parçayı alabilir ve aynı kullanıcılar için çift alarm üretir
+        raise RuntimeError(
+            "SCHEDULER_ENABLED=True ve DB_PGBOUNCER=True iken DIRECT_DATABASE_URL gerekli "
+            "(ya da bu süreçte SCHEDULER_ENABLED=False)"
+        )
+    await init_supabase()
+    try:
+        await warm_db_pool()
+        await verify_identity_store()
+    except KimlikDeposuHatasi:
+        raise
+    except Exception as e:
+        print(f"⚠️ Veritabanına bağlanılamadı: {e}")
+    await init_smtp_pool()
+    
+    # Arka plan görevleri
+    gorevler = [
+        asyncio.create_task(refresh_token_cleanup_loop()),
+        asyncio.create_task(verification_code_cleanup_loop()),
+        asyncio.create_task(user_cache_listener_loop()),
+        asyncio.create_task(activity_flush_loop()),
+    ]
+    if settings.OUTBOX_ENABLED:
+        gorevler.append(asyncio.create_task(outbox_worker_loop()))
+    if settings.SCHEDULER_ENABLED:
+        gorevler.append(asyncio.create_task(alarm_scheduler_loop()))
+        if settings.SWEEP_ENABLED:
+            gorevler.append(asyncio.create_task(status_sweep_loop()))
     yield
     print("👋 Uygulama kapatılıyor...")
+    for gorev in gorevler:
+        gorev.cancel()
+    await asyncio.gather(*gorevler, return_exceptions=True)
+    try:
+        await flush_activity()
+    except Exception as e:
+        print(f"⚠️ Bekleyen aktivite kayıtları yazılamadı: {e}")
+    await close_smtp_pool()
+    await close_supabase()
+    await close_db()
+    shutdown_password_hasher()
 
 
 # FastAPI uygulaması
@@ -41,6 +100,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limiting (IP ve hesap bazlı, /auth/* için daha sıkı)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS ayarları
 app.add_middleware(
     CORSMiddleware,
@@ -70,14 +132,66 @@ async def global_exception_handler(request: Request, exc: Exception):
 # Router'ları ekle
 app.include_router(auth_router, prefix="/v1")
 app.include_router(contacts_router, prefix="/v1")
+app.include_router(ops_router, prefix="/v1")
 
 
-# Sağlık kontrolü
+# Sağlık kontrolü - yalnızca /health herkese açık; iç sayaçlar operasyon anahtarı ister
 @app.get("/health", tags=["Sistem"])
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
 
+saglik_router = APIRouter(prefix="/health", tags=["Sistem"], dependencies=[Depends(require_ops_key)])
+
+
+@saglik_router.get("/db")
+async def db_pool_stats():
+    return get_pool_stats()
+
+
+@saglik_router.get("/password-hash")
+async def password_hash_stats():
+    return get_password_hash_stats()
+
+
+@saglik_router.get("/token-cache")
+async def token_cache_stats():
+    return get_token_cache_stats()
+
+
+@saglik_router.get("/user-cache")
+async def user_cache_stats():
+    return get_user_cache_stats()
+
+
+@saglik_router.get("/activity")
+async def activity_stats():
+    return get_activity_stats()
+
+
+@saglik_router.get("/scheduler")
+async def scheduler_stats():
+    return get_scheduler_stats()
+
+
+@saglik_router.get("/sweep")
+async def sweep_stats():
+    return get_sweep_stats()
+
+
+@saglik_router.get("/smtp")
+async def smtp_stats():
+    return get_smtp_pool_stats()
+
+
+@saglik_router.get("/outbox")
+async def outbox_stats():
+    return get_outbox_stats()
+
+
+app.include_router(saglik_router)
+
+
 @app.get("/", tags=["Sistem"])
 async def root():
     return {
@@ -0,0 +1,12 @@
+"""Middleware package"""
+from app.middleware.rate_limit import (
+    RateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimitMiddleware,
+)
+
+__all__ = [
+    "RateLimitBackend",
+    "MemoryRateLimitBackend",
+    "RateLimitMiddleware",
+]
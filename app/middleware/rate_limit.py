@@ -0,0 +1,236 @@
+"""
+Rate limiting middleware - token bucket, IP ve hesap bazlı anahtarlar
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, Optional
+import ipaddress
+import json
+import math
+import time
+
+from app.config import get_settings
+from app.utils.security import decode_token_cached
+
+settings = get_settings()
+
+
+class RateLimitBackend(ABC):
+    """
+    Limit sayaçlarının saklandığı arka uç.
+    
+    Birden fazla worker/replika arasında ortak limit için bu sınıftan türeyen
+    paylaşımlı bir arka uç (ör. Redis) yazılıp middleware'e verilebilir.
+    """
+    
+    @abstractmethod
+    async def hit(self, anahtar: str, limit: int, periyot: float) -> float:
+        """
+        Anahtar için bir istek harca.
+        
+        Returns:
+            0 ise istek kabul edildi, değilse tekrar denemeden önce beklenecek saniye
+        """
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Süreç içi token bucket - en fazla `max_anahtar` kova tutar (LRU)"""
+    
+    def __init__(self, max_anahtar: int = 100000):
+        self.max_anahtar = max_anahtar
+        self._kovalar: "OrderedDict[str, list]" = OrderedDict()
+    
+    async def hit(self, anahtar: str, limit: int, periyot: float) -> float:
+        simdi = time.monotonic()
+        hiz = limit / periyot
+        kova = self._kovalar.get(anahtar)
+        if kova is None:
+            kova = [float(limit), simdi]
+            self._kovalar[anahtar] = kova
+            if len(self._kovalar) > self.max_anahtar:
+                self._kovalar.popitem(last=False)
+        else:
+            self._kovalar.move_to_end(anahtar)
+            kova[0] = min(float(limit), kova[0] + (simdi - kova[1]) * hiz)
+            kova[1] = simdi
+        
+        if kova[0] >= 1.0:
+            kova[0] -= 1.0
+            return 0.0
+        return (1.0 - kova[0]) / hiz
+
+
+class RateLimitMiddleware:
+    """
+    ASGI rate limiting middleware.
+    
+    Her istek IP ve (varsa) hesap anahtarıyla ayrı kovalardan harcar. `/auth/`
+    altındaki yollar daha sıkı, ayrı kovaları kullanır; giriş isteklerinde hesap
+    anahtarı gövdedeki e-posta adresidir. Diğer isteklerde hesap anahtarı bearer
+    token'ın `sub` claim'idir - aynı hesabın farklı cihazlardaki token'ları tek
+    kovayı paylaşır. Doğrulama token cache'i üzerinden yapılır; geçersiz token'lar
+    yalnızca IP kovasından harcar. Gövdesi RATE_LIMIT_AUTH_BODY_MAX_BYTES'tan büyük
+    giriş istekleri tamponlanmaz, yalnızca IP kovasından harcar.
+    
+    RATE_LIMIT_TRUST_FORWARDED açıkken istemci adresi X-Forwarded-For'daki sağdan ilk
+    güvenilmeyen adrestir: soldaki değerleri istemci kendisi yazabilir, sağdakileri
+    ise önümüzdeki proxy'ler ekler (RATE_LIMIT_TRUSTED_PROXIES atlanır).
+    """
+    
+    def __init__(
+        self,
+        app,
+        backend: Optional[RateLimitBackend] = None,
+        auth_prefix: str = "/v1/auth/",
+        muaf_yollar: Iterable[str] = ("/health",),
+    ):
+        self.app = app
+        self.backend = backend or MemoryRateLimitBackend()
+        self.auth_prefix = auth_prefix
+        self.muaf_yollar = tuple(muaf_yollar)
+        self.guvenilen_aglar = [
+            ipaddress.ip_network(ag.strip(), strict=False)
+            for ag in settings.RATE_LIMIT_TRUSTED_PROXIES.split(",") if ag.strip()
+        ]
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        
+        yol = scope["path"]
+        # Tam eşleşme: /health/* sayaçları operasyon anahtarı ister, anahtar denemeleri sınırlanır
+        if yol in self.muaf_yollar:
+            await self.app(scope, receive, send)
+            return
+        
+        if yol.startswith(self.auth_prefix):
+            limit, periyot, grup = settings.RATE_LIMIT_AUTH_REQUESTS, settings.RATE_LIMIT_AUTH_PERIOD, "auth"
+        else:
+            limit, periyot, grup = settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_PERIOD, "genel"
+        
+        hesap = None
+        if grup == "auth" and scope["method"] == "POST" and not self._govde_buyuk(scope):
+            hesap, receive = await self._email_from_body(receive)
+        if hesap is None:
+            hesap = self._account_from_headers(scope)
+        
+        anahtarlar = [f"{grup}:ip:{self._client_ip(scope)}"]
+        if hesap:
+            anahtarlar.append(f"{grup}:hesap:{hesap}")
+        
+        bekleme = 0.0
+        for anahtar in anahtarlar:
+            bekleme = max(bekleme, await self.backend.hit(anahtar, limit, periyot))
+        
+        if bekleme > 0:
+            await self._reject(send, bekleme)
+            return
+        await self.app(scope, receive, send)
+    
+    def _guvenilen(self, adres: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(adres)
+        except ValueError:
+            return False
+        return any(ip in ag for ag in self.guvenilen_aglar)
+    
+    def _client_ip(self, scope) -> str:
+        if settings.RATE_LIMIT_TRUST_FORWARDED:
+            # Birden fazla başlık tek liste gibi birleştirilir; sağdan ilk güvenilmeyen adres
+            adresler = [
+                adres.strip()
+                for ad, deger in scope["headers"] if ad == b"x-forwarded-for"
+                for adres in deger.decode("latin-1").split(",") if adres.strip()
+            ]
+            for adres in reversed(adresler):
+                if not self._guvenilen(adres):
+                    return adres
+            if adresler:
+                return adresler[0]
+        client = scope.get("client")
+        return client[0] if client else "bilinmiyor"
+    
+    @staticmethod
+    def _account_from_headers(scope) -> Optional[str]:
+        for ad, deger in scope["headers"]:
+            if ad == b"authorization" and deger[:7].lower() == b"bearer ":
+                payload = decode_token_cached(deger[7:].decode("latin-1").strip())
+                sub = payload.get("sub") if payload else None
+                return str(sub) if sub else None
+        return None
+    
+    @staticmethod
+    def _govde_buyuk(scope) -> bool:
+        """Content-Length sınırı aşıyorsa gövde hiç okunmaz"""
+        for ad, deger in scope["headers"]:
+            if ad == b"content-length":
+                try:
+                    return int(deger) > settings.RATE_LIMIT_AUTH_BODY_MAX_BYTES
+                except ValueError:
+                    return False
+        return False
+    
+    @staticmethod
+    async def _email_from_body(receive):
+        """
+        Gövdeyi oku, e-postayı çıkar ve uygulamaya aynı gövdeyi tekrar ver.
+        
+        En fazla RATE_LIMIT_AUTH_BODY_MAX_BYTES tamponlanır; sınırı aşan gövdede
+        e-posta aranmaz, okunan kısım ve kalanı uygulamaya olduğu gibi aktarılır.
+        """
+        parcalar = []
+        boyut = 0
+        devam = False
+        while True:
+            mesaj = await receive()
+            if mesaj["type"] != "http.request":
+                parcalar = None
+                break
+            parca = mesaj.get("body", b"")
+            parcalar.append(parca)
+            boyut += len(parca)
+            devam = mesaj.get("more_body", False)
+            if not devam or boyut > settings.RATE_LIMIT_AUTH_BODY_MAX_BYTES:
+                break
+        
+        if parcalar is None:
+            return None, receive
+        
+        govde = b"".join(parcalar)
+        gonderildi = False
+        
+        async def tekrar_receive():
+            nonlocal gonderildi
+            if not gonderildi:
+                gonderildi = True
+                return {"type": "http.request", "body": govde, "more_body": devam}
+            return await receive()
+        
+        if boyut > settings.RATE_LIMIT_AUTH_BODY_MAX_BYTES:
+            return None, tekrar_receive
+        try:
+            email = json.loads(govde).get("email")
+        except (ValueError, AttributeError):
+            email = None
+        return (email.strip().lower() if isinstance(email, str) else None), tekrar_receive
+    
+    @staticmethod
+    async def _reject(send, bekleme: float) -> None:
+        govde = json.dumps({
+            "success": False,
+            "error": {
+                "code": "RATE_LIMITED",
+                "message": "Çok fazla istek gönderildi. Lütfen daha sonra tekrar deneyin."
+            }
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(govde)).encode()),
+                (b"retry-after", str(max(1, math.ceil(bekleme))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": govde})
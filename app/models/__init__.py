@@ -1,13 +1,16 @@
 """Models package"""
 from app.models.models import (
     Kullanici,
+    Hesap,
     Checkin,
+    KullaniciIstatistik,
     AcilKisi,
     Cihaz,
     Alarm,
     Bildirim,
     RefreshToken,
     DogrulamaKodu,
+    GidenKutusu,
     SSS,
     # Enums
     Cinsiyet,
@@ -19,17 +22,22 @@ from app.models.models import (
     AlarmDurum,
     BildirimTipi,
     DogrulamaTipi,
+    GidenTipi,
+    GidenDurum,
 )
 
 __all__ = [
     "Kullanici",
+    "Hesap",
     "Checkin",
+    "KullaniciIstatistik",
     "AcilKisi",
     "Cihaz",
     "Alarm",
     "Bildirim",
     "RefreshToken",
     "DogrulamaKodu",
+    "GidenKutusu",
     "SSS",
     "Cinsiyet",
     "AbonelikTipi",
@@ -40,4 +48,6 @@ __all__ = [
     "AlarmDurum",
     "BildirimTipi",
     "DogrulamaTipi",
+    "GidenTipi",
+    "GidenDurum",
 ]
@@ -6,7 +6,7 @@ from datetime import datetime
 from enum import Enum as PyEnum
 from sqlalchemy import (
     Column, String, Boolean, DateTime, Float, Integer, 
-    ForeignKey, Text, Enum, JSON
+    ForeignKey, Text, Enum, JSON, Index, text
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -69,12 +69,25 @@ class DogrulamaTipi(str, PyEnum):
     SIFRE_SIFIRLAMA = "SIFRE_SIFIRLAMA"
 
 
+class GidenTipi(str, PyEnum):
+    ALARM = "ALARM"
+    DOGRULAMA = "DOGRULAMA"
+    SIFRE_SIFIRLAMA = "SIFRE_SIFIRLAMA"
+
+
+class GidenDurum(str, PyEnum):
+    BEKLIYOR = "BEKLIYOR"
+    VAZGECILDI = "VAZGECILDI"  # Son denemeden sonra (dead letter)
+
+
 # ==================== KULLANICI ====================
 
 class Kullanici(Base):
     __tablename__ = "kullanicilar"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Profilin ait olduğu Supabase hesabı - access token'ın `sub`'ı bu kimliktir
+    hesap_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
     email = Column(String(255), unique=True, nullable=False, index=True)
     telefon = Column(String(20), unique=True, nullable=False, index=True)
     sifre_hash = Column(String(255), nullable=False)
@@ -98,6 +111,8 @@ class Kullanici(Base):
     # Check-in ayarları
     checkin_suresi_saat = Column(Integer, default=24)
     konum_paylasimi = Column(Boolean, default=True)
+    # Beklenen sonraki check-in - check-in ve erteleme ile güncellenir (gecikme sorguları bu kolona bakar)
+    sonraki_beklenen = Column(DateTime, nullable=True)
     
     # Zaman damgaları
     olusturma_tarihi = Column(DateTime, default=datetime.utcnow)
@@ -107,11 +122,48 @@ class Kullanici(Base):
     # İlişkiler
     checkinler = relationship("Checkin", back_populates="kullanici", cascade="all, delete-orphan")
     acil_kisiler = relationship("AcilKisi", back_populates="kullanici", cascade="all, delete-orphan")
-    cihazlar = relationship("Cihaz", back_populates="kullanici", cascade="all, delete-orphan")
     alarmlar = relationship("Alarm", back_populates="kullanici", cascade="all, delete-orphan")
     bildirimler = relationship("Bildirim", back_populates="kullanici", cascade="all, delete-orphan")
-    refresh_tokenlar = relationship("RefreshToken", back_populates="kullanici", cascade="all, delete-orphan")
-    dogrulama_kodlari = relationship("DogrulamaKodu", back_populates="kullanici", cascade="all, delete-orphan")
+    istatistik = relationship("KullaniciIstatistik", back_populates="kullanici", uselist=False, cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index(
+            "ix_kullanicilar_sonraki_beklenen", sonraki_beklenen, id,
+            postgresql_where=text("silinme_tarihi IS NULL"),
+        ),
+        Index("ix_kullanicilar_guncelleme", guncelleme_tarihi),
+        Index("ux_kullanicilar_hesap_id", hesap_id, unique=True),
+    )
+
+
+# ==================== HESAP (Supabase users) ====================
+
+class Hesap(Base):
+    """
+    Supabase `public.users` tablosu - /register ve /login'in kimlik deposu.
+    
+    Tablo Supabase tarafında yönetilir (şema README'de); PostgREST ile aynı
+    PostgreSQL veritabanında olduğundan burada SQLAlchemy ile de eşlenir.
+    Oturum tabloları (refresh_tokenlar, dogrulama_kodlari, cihazlar) bu tabloya, uygulama
+    profili (kullanicilar) hesap_id ile bu tabloya bağlıdır.
+    """
+    __tablename__ = "users"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    email = Column(String, unique=True, nullable=False)
+    password_hash = Column(String, nullable=False)
+    first_name = Column(String, nullable=True)
+    last_name = Column(String, nullable=True)
+    phone_number = Column(String, nullable=True)
+    is_active = Column(Boolean, server_default=text("true"))
+    is_verified = Column(Boolean, server_default=text("false"))
+    role = Column(String, server_default=text("'user'"))
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))
+    updated_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))
+    
+    # Oturum iptali - artırıldığında eski access token'lar geçersiz olur (tek sürüm kaynağı)
+    token_surumu = Column(Integer, nullable=False, default=0, server_default="0")
 
 
 # ==================== CHECK-IN ====================
@@ -122,6 +174,8 @@ class Checkin(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     kullanici_id = Column(UUID(as_uuid=True), ForeignKey("kullanicilar.id", ondelete="CASCADE"), nullable=False)
     tarih = Column(DateTime, default=datetime.utcnow)
+    # Çevrimdışı senkronizasyonda cihazın ürettiği id - kullanıcı bazında tekildir
+    istemci_id = Column(UUID(as_uuid=True), nullable=True)
     
     # Konum
     enlem = Column(Float, nullable=True)
@@ -134,6 +188,30 @@ class Checkin(Base):
     
     # İlişkiler
     kullanici = relationship("Kullanici", back_populates="checkinler")
+    
+    __table_args__ = (
+        Index("ix_checkinler_kullanici_tarih", kullanici_id, tarih.desc()),
+        Index("ux_checkinler_kullanici_istemci", kullanici_id, istemci_id, unique=True),
+    )
+
+
+# ==================== KULLANICI İSTATİSTİKLERİ ====================
+
+class KullaniciIstatistik(Base):
+    """Check-in istatistikleri - her check-in ile aynı transaction'da güncellenir"""
+    __tablename__ = "kullanici_istatistik"
+    
+    kullanici_id = Column(UUID(as_uuid=True), ForeignKey("kullanicilar.id", ondelete="CASCADE"), primary_key=True)
+    
+    toplam_checkin = Column(Integer, nullable=False, default=0)
+    mevcut_seri = Column(Integer, nullable=False, default=0)  # Son check-in gününde biten ardışık gün serisi
+    en_uzun_seri = Column(Integer, nullable=False, default=0)
+    son_checkin = Column(DateTime, nullable=True)
+    
+    guncelleme_tarihi = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # İlişkiler
+    kullanici = relationship("Kullanici", back_populates="istatistik")
 
 
 # ==================== ACİL DURUM KİŞİLERİ ====================
@@ -161,26 +239,32 @@ class AcilKisi(Base):
     
     # İlişkiler
     kullanici = relationship("Kullanici", back_populates="acil_kisiler")
+    
+    __table_args__ = (
+        Index("ix_acil_kisiler_kullanici_oncelik", kullanici_id, oncelik),
+    )
 
 
 # ==================== CİHAZLAR ====================
 
 class Cihaz(Base):
+    """Giriş yapılan cihazlar - access token'daki hesap (`sub`) ve cihaz (`cid`) ile upsert edilir"""
     __tablename__ = "cihazlar"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    kullanici_id = Column(UUID(as_uuid=True), ForeignKey("kullanicilar.id", ondelete="CASCADE"), nullable=False)
+    kullanici_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     cihaz_id = Column(String(255), nullable=False)
     cihaz_adi = Column(String(100), nullable=True)
-    platform = Column(Enum(Platform), nullable=False)
+    platform = Column(Enum(Platform), nullable=True)  # Girişte bilinmez
     push_token = Column(String(500), nullable=True)
     
     son_aktif = Column(DateTime, default=datetime.utcnow)
     olusturma_tarihi = Column(DateTime, default=datetime.utcnow)
     
-    # İlişkiler
-    kullanici = relationship("Kullanici", back_populates="cihazlar")
+    __table_args__ = (
+        Index("ux_cihazlar_kullanici_cihaz", kullanici_id, cihaz_id, unique=True),
+    )
 
 
 # ==================== ALARMLAR ====================
@@ -202,6 +286,9 @@ class Alarm(Base):
     # Bilgilendirme
     bilgilendirilenler = Column(JSON, nullable=True)
     
+    # Otomatik alarmın ait olduğu kaçırılan check-in zamanı (tekrar oluşturmayı engeller)
+    beklenen_tarih = Column(DateTime, nullable=True)
+    
     # Zaman damgaları
     tarih = Column(DateTime, default=datetime.utcnow)
     iptal_tarihi = Column(DateTime, nullable=True)
@@ -209,6 +296,15 @@ class Alarm(Base):
     
     # İlişkiler
     kullanici = relationship("Kullanici", back_populates="alarmlar")
+    
+    __table_args__ = (
+        Index("ix_alarmlar_kullanici_tarih", kullanici_id, tarih.desc()),
+        Index("ix_alarmlar_aktif", kullanici_id, postgresql_where=text("durum = 'AKTIF'")),
+        Index(
+            "ux_alarmlar_otomatik_beklenen", kullanici_id, beklenen_tarih,
+            unique=True, postgresql_where=text("tip = 'OTOMATIK'"),
+        ),
+    )
 
 
 # ==================== BİLDİRİMLER ====================
@@ -228,6 +324,41 @@ class Bildirim(Base):
     
     # İlişkiler
     kullanici = relationship("Kullanici", back_populates="bildirimler")
+    
+    __table_args__ = (
+        Index("ix_bildirimler_kullanici_tarih", kullanici_id, tarih.desc()),
+        Index("ix_bildirimler_okunmamis", kullanici_id, tarih.desc(), postgresql_where=text("okundu = false")),
+    )
+
+
+# ==================== GİDEN KUTUSU ====================
+
+class GidenKutusu(Base):
+    """
+    Gönderilecek e-postalar - işi doğuran kayıtla (ör. alarm) aynı transaction'da yazılır,
+    arka plandaki worker'lar teslim eder. Gönderilen satırlar silinir.
+    """
+    __tablename__ = "giden_kutusu"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tip = Column(Enum(GidenTipi), nullable=False)
+    alici = Column(String(255), nullable=False)
+    veri = Column(JSON, nullable=False)  # Şablon parametreleri
+    alarm_id = Column(UUID(as_uuid=True), ForeignKey("alarmlar.id", ondelete="CASCADE"), nullable=True)
+    
+    durum = Column(Enum(GidenDurum), nullable=False, default=GidenDurum.BEKLIYOR, server_default="BEKLIYOR")
+    deneme = Column(Integer, nullable=False, default=0, server_default="0")
+    sonraki_deneme = Column(DateTime, nullable=False, default=datetime.utcnow)  # Sahiplenilince kira bitişi
+    son_hata = Column(Text, nullable=True)
+    # Kod taşıyan e-postalar (doğrulama, şifre sıfırlama) bu andan sonra gönderilmez
+    son_gecerlilik = Column(DateTime, nullable=True)
+    
+    olusturma_tarihi = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_giden_kutusu_bekleyen", sonraki_deneme, postgresql_where=text("durum = 'BEKLIYOR'")),
+        Index("ix_giden_kutusu_alarm", alarm_id, postgresql_where=text("alarm_id IS NOT NULL")),
+    )
 
 
 # ==================== REFRESH TOKEN ====================
@@ -236,7 +367,7 @@ class RefreshToken(Base):
     __tablename__ = "refresh_tokenlar"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    kullanici_id = Column(UUID(as_uuid=True), ForeignKey("kullanicilar.id", ondelete="CASCADE"), nullable=False)
+    kullanici_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     token = Column(String(255), unique=True, nullable=False)
     cihaz_id = Column(String(255), nullable=True)
@@ -245,9 +376,13 @@ class RefreshToken(Base):
     son_kullanim = Column(DateTime, default=datetime.utcnow)
     gecerlilik = Column(DateTime, nullable=False)
     iptal_edildi = Column(Boolean, default=False)
+    # Rotasyonla harcandığı an - yalnızca bu dolu iken tekrar gelen token çalınmış sayılır
+    # (şifre sıfırlama / tüm oturumları kapatma yalnızca iptal_edildi'yi işaretler)
+    yenilenme_tarihi = Column(DateTime, nullable=True)
     
-    # İlişkiler
-    kullanici = relationship("Kullanici", back_populates="refresh_tokenlar")
+    __table_args__ = (
+        Index("ix_refresh_tokenlar_kullanici", kullanici_id),
+    )
 
 
 # ==================== DOĞRULAMA KODLARI ====================
@@ -256,17 +391,20 @@ class DogrulamaKodu(Base):
     __tablename__ = "dogrulama_kodlari"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    kullanici_id = Column(UUID(as_uuid=True), ForeignKey("kullanicilar.id", ondelete="CASCADE"), nullable=False)
+    kullanici_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     kod = Column(String(100), nullable=False)
     tip = Column(Enum(DogrulamaTipi), nullable=False)
     gecerlilik = Column(DateTime, nullable=False)
     kullanildi = Column(Boolean, default=False)
+    deneme = Column(Integer, nullable=False, default=0, server_default="0")
     
     olusturma_tarihi = Column(DateTime, default=datetime.utcnow)
     
-    # İlişkiler
-    kullanici = relationship("Kullanici", back_populates="dogrulama_kodlari")
+    __table_args__ = (
+        Index("ix_dogrulama_kodlari_kullanici_tip", kullanici_id, tip, kullanildi),
+        Index("ix_dogrulama_kodlari_gecerlilik", gecerlilik),
+    )
 
 
 # ==================== SSS ====================
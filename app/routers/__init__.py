@@ -1,7 +1,9 @@
 from app.routers.auth import router as auth_router
 from app.routers.contacts import router as contacts_router
+from app.routers.ops import router as ops_router
 
 __all__ = [
     "auth_router",
     "contacts_router",
+    "ops_router",
 ]
@@ -7,16 +7,17 @@ from sqlalchemy import select, func
 from uuid import UUID
 
 from app.database import get_db
-from app.models import Kullanici, AcilKisi, Iliski, AbonelikTipi
+from app.models import AcilKisi, Iliski, AbonelikTipi
 from app.schemas.acil_kisi import (
     AcilKisiEkleRequest, AcilKisiGuncelleRequest,
     AcilKisiListeResponse, AcilKisiEkleResponse, AcilKisiBilgi
 )
 from app.schemas.genel import BasariliMesajResponse
-from app.utils.security import get_current_user, generate_otp
+from app.services.aktivite_service import track_device_activity
+from app.utils.security import KullaniciOzet, get_current_user, generate_otp
 from app.config import SUBSCRIPTION_PLANS
 
-router = APIRouter(prefix="/acil-kisiler", tags=["Acil Durum Kişileri"])
+router = APIRouter(prefix="/acil-kisiler", tags=["Acil Durum Kişileri"], dependencies=[Depends(track_device_activity)])
 
 
 def get_max_acil_kisi(abonelik_tipi: AbonelikTipi) -> int:
@@ -30,7 +31,7 @@ def get_max_acil_kisi(abonelik_tipi: AbonelikTipi) -> int:
 
 @router.get("", response_model=AcilKisiListeResponse)
 async def list_acil_kisiler(
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: KullaniciOzet = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -52,7 +53,7 @@ async def list_acil_kisiler(
 @router.post("", response_model=AcilKisiEkleResponse, status_code=status.HTTP_201_CREATED)
 async def add_acil_kisi(
     request: AcilKisiEkleRequest,
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: KullaniciOzet = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -88,7 +89,7 @@ async def add_acil_kisi(
 
 @router.put("/{kisi_id}", response_model=BasariliMesajResponse)
 async def update_acil_kisi(kisi_id: UUID, request: AcilKisiGuncelleRequest,
-    kullanici: Kullanici = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    kullanici: KullaniciOzet = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(AcilKisi).where(AcilKisi.id == kisi_id, AcilKisi.kullanici_id == kullanici.id))
     acil_kisi = result.scalar_one_or_none()
     if not acil_kisi:
@@ -103,7 +104,7 @@ async def update_acil_kisi(kisi_id: UUID, request: AcilKisiGuncelleRequest,
 
 
 @router.delete("/{kisi_id}", response_model=BasariliMesajResponse)
-async def delete_acil_kisi(kisi_id: UUID, kullanici: Kullanici = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def delete_acil_kisi(kisi_id: UUID, kullanici: KullaniciOzet = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(AcilKisi).where(AcilKisi.id == kisi_id, AcilKisi.kullanici_id == kullanici.id))
     acil_kisi = result.scalar_one_or_none()
     if not acil_kisi:
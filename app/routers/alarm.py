@@ -5,26 +5,29 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from app.database import get_db
-from app.models import Kullanici, Alarm, AcilKisi, Bildirim, AlarmTipi, AlarmDurum, BildirimTipi
+from app.models import Alarm, AcilKisi, Bildirim, AlarmTipi, AlarmDurum, BildirimTipi
 from app.schemas.alarm import (
     PanikAlarmRequest, PanikAlarmResponse, AlarmBilgi, BilgilendirilenKisi,
     AlarmIptalRequest, AlarmGecmisResponse, AlarmGecmisItem,
     BildirimAyarlari, BildirimAyarlariGuncelleRequest, BildirimListeResponse, BildirimItem
 )
 from app.schemas.genel import BasariliMesajResponse
-from app.utils.security import get_current_user
-from app.services.email_service import send_alarm_notification_email
+from app.services.aktivite_service import track_device_activity
+from app.utils.security import KullaniciOzet, get_current_user
+from app.services.bildirim_service import (
+    cancel_alarm_notifications, count_notified, enqueue_alarm_notifications
+)
 
-router = APIRouter(tags=["Alarm ve Bildirimler"])
+router = APIRouter(tags=["Alarm ve Bildirimler"], dependencies=[Depends(track_device_activity)])
 
 
 @router.post("/alarm/panik", response_model=PanikAlarmResponse)
 async def trigger_panic(
     request: PanikAlarmRequest,
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: KullaniciOzet = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     # Acil kişileri al
@@ -33,34 +36,38 @@ async def trigger_panic(
     )
     kisiler = result.scalars().all()
     
-    bilgilendirilenler = []
-    for kisi in kisiler:
-        if kisi.email:
-            await send_alarm_notification_email(kisi.email, kisi.ad, f"{kullanici.ad} {kullanici.soyad}", request.mesaj or "")
-            bilgilendirilenler.append({"ad": kisi.ad, "bildirim_tipi": "email"})
-        # TODO: SMS gönder
-        bilgilendirilenler.append({"ad": kisi.ad, "bildirim_tipi": "sms"})
-    
     alarm = Alarm(
-        kullanici_id=kullanici.id, tip=AlarmTipi.PANIK, mesaj=request.mesaj,
+        id=uuid4(), kullanici_id=kullanici.id, tip=AlarmTipi.PANIK, mesaj=request.mesaj,
         enlem=request.konum.enlem if request.konum else None,
         boylam=request.konum.boylam if request.konum else None,
-        bilgilendirilenler=bilgilendirilenler
     )
     db.add(alarm)
     await db.flush()
     
+    # E-postalar alarmla aynı transaction'da giden kutusuna yazılır; worker'lar gönderip
+    # alıcı başına sonucu alarma işler. Yanıt commit edilince döner.
+    # TODO: SMS gönder
+    bilgilendirilenler = await enqueue_alarm_notifications(
+        db, alarm.id, [(kisi.ad, kisi.email) for kisi in kisiler],
+        f"{kullanici.ad} {kullanici.soyad}", request.mesaj or ""
+    )
+    alarm.bilgilendirilenler = bilgilendirilenler
+    await db.commit()
+    
     return PanikAlarmResponse(
-        basarili=True, mesaj="Acil durum alarmı gönderildi.",
+        basarili=True, mesaj="Acil durum alarmı oluşturuldu, kişilerinize bildiriliyor.",
         alarm=AlarmBilgi(
             id=str(alarm.id), tarih=alarm.tarih,
-            bilgilendirilen_kisiler=[BilgilendirilenKisi(ad=b["ad"], bildirim_tipi=b["bildirim_tipi"]) for b in bilgilendirilenler]
+            bilgilendirilen_kisiler=[
+                BilgilendirilenKisi(ad=b["ad"], bildirim_tipi=b["bildirim_tipi"], durum=b["durum"])
+                for b in bilgilendirilenler
+            ]
         )
     )
 
 
 @router.post("/alarm/iptal", response_model=BasariliMesajResponse)
-async def cancel_alarm(request: AlarmIptalRequest, kullanici: Kullanici = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def cancel_alarm(request: AlarmIptalRequest, kullanici: KullaniciOzet = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Alarm).where(Alarm.id == UUID(request.alarm_id), Alarm.kullanici_id == kullanici.id))
     alarm = result.scalar_one_or_none()
     if not alarm:
@@ -69,35 +76,37 @@ async def cancel_alarm(request: AlarmIptalRequest, kullanici: Kullanici = Depend
     alarm.durum = AlarmDurum.IPTAL_EDILDI
     alarm.iptal_tarihi = datetime.utcnow()
     alarm.iptal_nedeni = request.iptal_nedeni
+    # Kişilere henüz gitmemiş alarm e-postaları iptalle aynı transaction'da durdurulur
+    await cancel_alarm_notifications(db, alarm.id)
     return BasariliMesajResponse(basarili=True, mesaj="Alarm iptal edildi.")
 
 
 @router.get("/alarm/gecmis", response_model=AlarmGecmisResponse)
-async def get_alarm_history(kullanici: Kullanici = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def get_alarm_history(kullanici: KullaniciOzet = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Alarm).where(Alarm.kullanici_id == kullanici.id).order_by(Alarm.tarih.desc()).limit(50))
     alarmlar = result.scalars().all()
     
     return AlarmGecmisResponse(alarmlar=[
         AlarmGecmisItem(
             id=str(a.id), tip=a.tip.value.lower(), tarih=a.tarih, durum=a.durum.value.lower(),
-            bilgilendirilen_sayisi=len(a.bilgilendirilenler) if a.bilgilendirilenler else 0
+            bilgilendirilen_sayisi=count_notified(a.bilgilendirilenler)
         ) for a in alarmlar
     ])
 
 
 @router.get("/bildirimler/ayarlar", response_model=BildirimAyarlari)
-async def get_notification_settings(kullanici: Kullanici = Depends(get_current_user)):
+async def get_notification_settings(kullanici: KullaniciOzet = Depends(get_current_user)):
     return BildirimAyarlari()  # Varsayılan ayarlar
 
 
 @router.put("/bildirimler/ayarlar", response_model=BasariliMesajResponse)
-async def update_notification_settings(request: BildirimAyarlariGuncelleRequest, kullanici: Kullanici = Depends(get_current_user)):
+async def update_notification_settings(request: BildirimAyarlariGuncelleRequest, kullanici: KullaniciOzet = Depends(get_current_user)):
     # TODO: Ayarları kaydet
     return BasariliMesajResponse(basarili=True, mesaj="Ayarlar güncellendi.")
 
 
 @router.get("/bildirimler/gecmis", response_model=BildirimListeResponse)
-async def get_notifications(kullanici: Kullanici = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def get_notifications(kullanici: KullaniciOzet = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Bildirim).where(Bildirim.kullanici_id == kullanici.id).order_by(Bildirim.tarih.desc()).limit(50))
     bildirimler = result.scalars().all()
     
@@ -108,7 +117,7 @@ async def get_notifications(kullanici: Kullanici = Depends(get_current_user), db
 
 
 @router.put("/bildirimler/{bildirim_id}/okundu", response_model=BasariliMesajResponse)
-async def mark_notification_read(bildirim_id: UUID, kullanici: Kullanici = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def mark_notification_read(bildirim_id: UUID, kullanici: KullaniciOzet = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Bildirim).where(Bildirim.id == bildirim_id, Bildirim.kullanici_id == kullanici.id))
     bildirim = result.scalar_one_or_none()
     if bildirim:
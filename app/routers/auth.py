@@ -1,20 +1,48 @@
 """
 Auth Router - Supabase Users Tablosu ile Kimlik Doğrulama
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
-from datetime import datetime
+from uuid import UUID
 import re
 
-from app.database import get_supabase
-from app.utils.security import hash_password, verify_password, create_access_token
+from postgrest.exceptions import APIError
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import get_db, get_supabase, is_pg_error, UNIQUE_VIOLATION
+from app.models import DogrulamaTipi, GidenTipi, Hesap, RefreshToken
+from app.services.aktivite_service import record_login, record_device_activity
+from app.services.dogrulama_service import (
+    DogrulamaKoduHatasi, issue_verification_code, issue_password_reset_token,
+    parse_password_reset_token, verify_code
+)
+from app.services.bildirim_service import enqueue_email
+from app.services.token_service import RefreshTokenHatasi, issue_refresh_token, rotate_refresh_token
+from app.utils.security import (
+    hash_password, verify_and_update_password, create_access_token, get_token_version,
+    get_current_account_row, revoke_access_tokens
+)
+
+settings = get_settings()
 
 router = APIRouter(prefix="/auth", tags=["Kimlik Doğrulama"])
 
 
 # ==================== REQUEST ŞEMAları ====================
 
+def _check_password_strength(v: str) -> str:
+    if not re.search(r'[a-z]', v):
+        raise ValueError('Şifre en az bir küçük harf içermelidir')
+    if not re.search(r'[A-Z]', v):
+        raise ValueError('Şifre en az bir büyük harf içermelidir')
+    if not re.search(r'\d', v):
+        raise ValueError('Şifre en az bir rakam içermelidir')
+    return v
+
+
 class RegisterRequest(BaseModel):
     """Kullanıcı kayıt isteği"""
     email: EmailStr = Field(..., description="E-posta adresi")
@@ -26,19 +54,40 @@ class RegisterRequest(BaseModel):
     @field_validator('password')
     @classmethod
     def validate_password(cls, v):
-        if not re.search(r'[a-z]', v):
-            raise ValueError('Şifre en az bir küçük harf içermelidir')
-        if not re.search(r'[A-Z]', v):
-            raise ValueError('Şifre en az bir büyük harf içermelidir')
-        if not re.search(r'\d', v):
-            raise ValueError('Şifre en az bir rakam içermelidir')
-        return v
+        return _check_password_strength(v)
 
 
 class LoginRequest(BaseModel):
     """Kullanıcı giriş isteği"""
     email: EmailStr = Field(..., description="E-posta adresi")
     password: str = Field(..., description="Şifre")
+    device_id: Optional[str] = Field(None, max_length=255, description="Cihaz kimliği")
+
+
+class RefreshRequest(BaseModel):
+    """Token yenileme isteği"""
+    refresh_token: str = Field(..., description="Refresh token")
+
+
+class VerifyEmailRequest(BaseModel):
+    """E-posta doğrulama kodu onayı"""
+    code: str = Field(..., min_length=4, max_length=10, description="E-postayla gönderilen doğrulama kodu")
+
+
+class ForgotPasswordRequest(BaseModel):
+    """Şifre sıfırlama isteği"""
+    email: EmailStr = Field(..., description="E-posta adresi")
+
+
+class ResetPasswordRequest(BaseModel):
+    """Yeni şifre belirleme"""
+    token: str = Field(..., max_length=200, description="Sıfırlama linkindeki token")
+    new_password: str = Field(..., min_length=8, description="Yeni şifre (en az 8 karakter)")
+    
+    @field_validator('new_password')
+    @classmethod
+    def validate_password(cls, v):
+        return _check_password_strength(v)
 
 
 # ==================== RESPONSE ŞEMAları ====================
@@ -66,11 +115,21 @@ class LoginResponse(BaseModel):
     """Giriş yanıtı"""
     success: bool = True
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
     expires_in: int = 3600
     user: UserInfo
 
 
+class RefreshResponse(BaseModel):
+    """Token yenileme yanıtı"""
+    success: bool = True
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int = 3600
+
+
 class MessageResponse(BaseModel):
     """Genel mesaj yanıtı"""
     success: bool = True
@@ -86,17 +145,10 @@ async def register(request: RegisterRequest):
     """
     supabase = get_supabase()
     
-    # E-posta kontrolü
-    existing = supabase.table("users").select("id").eq("email", request.email).execute()
-    
-    if existing.data and len(existing.data) > 0:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail={"success": False, "error": {"code": "EMAIL_EXISTS", "message": "Bu e-posta adresi zaten kayıtlı."}}
-        )
-    
-    # Şifreyi hashle
-    password_hash = hash_password(request.password)
+    # Şifre, e-posta tekrarı kontrolünden önce hashlenir: satır hash ile birlikte
+    # tek INSERT'te yazılır, tekrar UNIQUE kısıtından döner. Önceden SELECT ile
+    # kontrol etmek ikinci bir istek ekler ve eşzamanlı kayıtlarda yine yarışır.
+    password_hash = await hash_password(request.password)
     
     # Kullanıcı verisini hazırla
     user_data = {
@@ -110,8 +162,16 @@ async def register(request: RegisterRequest):
         "role": "user"
     }
     
-    # Supabase'e kaydet
-    result = supabase.table("users").insert(user_data).execute()
+    # Supabase'e kaydet - e-posta tekrarı UNIQUE kısıtından yakalanır (tek istek)
+    try:
+        result = await supabase.table("users").insert(user_data).execute()
+    except APIError as e:
+        if is_pg_error(e, UNIQUE_VIOLATION):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"success": False, "error": {"code": "EMAIL_EXISTS", "message": "Bu e-posta adresi zaten kayıtlı."}}
+            )
+        raise
     
     if not result.data:
         raise HTTPException(
@@ -138,14 +198,14 @@ async def register(request: RegisterRequest):
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     """
     Kullanıcı girişi
     """
     supabase = get_supabase()
     
     # Kullanıcıyı bul
-    result = supabase.table("users").select("*").eq("email", request.email).execute()
+    result = await supabase.table("users").select("*").eq("email", request.email).execute()
     
     if not result.data or len(result.data) == 0:
         raise HTTPException(
@@ -155,8 +215,9 @@ async def login(request: LoginRequest):
     
     user = result.data[0]
     
-    # Şifre kontrolü
-    if not verify_password(request.password, user["password_hash"]):
+    # Şifre kontrolü (eski politikayla hashlenmişse yeni hash de üretilir)
+    dogru, yeni_hash = await verify_and_update_password(request.password, user["password_hash"])
+    if not dogru:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"success": False, "error": {"code": "INVALID_CREDENTIALS", "message": "E-posta veya şifre hatalı."}}
@@ -169,15 +230,25 @@ async def login(request: LoginRequest):
             detail={"success": False, "error": {"code": "ACCOUNT_INACTIVE", "message": "Hesabınız devre dışı."}}
         )
     
-    # Access token oluştur
-    access_token = create_access_token(user["id"])
+    # Access ve refresh token oluştur
+    kullanici_id = UUID(user["id"])
+    access_token = create_access_token(
+        user["id"], token_surumu=await get_token_version(db, kullanici_id), cihaz_id=request.device_id
+    )
+    refresh_token = await issue_refresh_token(db, kullanici_id, request.device_id)
     
-    # Son giriş zamanını güncelle
-    supabase.table("users").update({"last_login_at": datetime.utcnow().isoformat()}).eq("id", user["id"]).execute()
+    # Son giriş ve cihaz aktivitesi toplu olarak arka planda yazılır
+    record_login(kullanici_id)
+    record_device_activity(kullanici_id, request.device_id)
+    
+    # Eski politikayla hashlenmiş şifreyi yenile (kullanıcı başına bir kez)
+    if yeni_hash:
+        await supabase.table("users").update({"password_hash": yeni_hash}).eq("id", user["id"]).execute()
     
     return LoginResponse(
         success=True,
         access_token=access_token,
+        refresh_token=refresh_token,
         token_type="bearer",
         expires_in=3600,
         user=UserInfo(
@@ -193,6 +264,139 @@ async def login(request: LoginRequest):
     )
 
 
+@router.post("/refresh", response_model=RefreshResponse)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Refresh token ile yeni access token al - refresh token her kullanımda yenilenir
+    """
+    try:
+        kullanici_id, cihaz_id, yeni_refresh_token = await rotate_refresh_token(db, request.refresh_token)
+    except RefreshTokenHatasi as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"success": False, "error": {"code": e.kod, "message": e.mesaj}}
+        )
+    
+    # Hesap login'den sonra devre dışı bırakılmış olabilir - hata rotasyonu geri alır
+    result = await db.execute(select(Hesap.is_active, Hesap.token_surumu).where(Hesap.id == kullanici_id))
+    hesap = result.one_or_none()
+    if hesap is None or not hesap.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"success": False, "error": {"code": "ACCOUNT_INACTIVE", "message": "Hesabınız devre dışı."}}
+        )
+    
+    record_device_activity(kullanici_id, cihaz_id)
+    return RefreshResponse(
+        success=True,
+        access_token=create_access_token(str(kullanici_id), token_surumu=hesap.token_surumu, cihaz_id=cihaz_id),
+        refresh_token=yeni_refresh_token,
+        token_type="bearer",
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+
+
+def invalid_code_error(e: DogrulamaKoduHatasi) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail={"success": False, "error": {"code": e.kod, "message": e.mesaj}}
+    )
+
+
+@router.post("/verify-email/send", response_model=MessageResponse)
+async def send_email_verification(
+    hesap: Hesap = Depends(get_current_account_row),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    E-posta doğrulama kodu gönder - önceki kod geçersiz olur
+    """
+    if hesap.is_verified:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"success": False, "error": {"code": "ALREADY_VERIFIED", "message": "E-posta adresiniz zaten doğrulanmış."}}
+        )
+    
+    kod = await issue_verification_code(db, hesap.id, DogrulamaTipi.EMAIL)
+    await enqueue_email(db, GidenTipi.DOGRULAMA, hesap.email, {"ad": hesap.first_name or "", "kod": kod})
+    
+    return MessageResponse(success=True, message="Doğrulama kodu e-posta adresinize gönderildi.")
+
+
+@router.post("/verify-email", response_model=MessageResponse)
+async def verify_email(
+    request: VerifyEmailRequest,
+    hesap: Hesap = Depends(get_current_account_row),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    E-posta doğrulama kodunu onayla - /login'in döndürdüğü users.is_verified güncellenir
+    """
+    try:
+        await verify_code(db, hesap.id, DogrulamaTipi.EMAIL, request.code)
+    except DogrulamaKoduHatasi as e:
+        raise invalid_code_error(e)
+    
+    hesap.is_verified = True
+    hesap.updated_at = func.now()
+    
+    return MessageResponse(success=True, message="E-posta adresiniz doğrulandı.")
+
+
+@router.post("/forgot-password", response_model=MessageResponse)
+async def forgot_password(
+    request: ForgotPasswordRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Şifre sıfırlama linki gönder - hesap olsun olmasın aynı yanıt döner
+    """
+    result = await db.execute(
+        select(Hesap.id, Hesap.first_name, Hesap.email).where(Hesap.email == request.email)
+    )
+    hesap = result.one_or_none()
+    
+    if hesap is not None:
+        token = issue_password_reset_token(hesap.id)
+        _, gizli = parse_password_reset_token(token)
+        await issue_verification_code(db, hesap.id, DogrulamaTipi.SIFRE_SIFIRLAMA, kod=gizli)
+        await enqueue_email(db, GidenTipi.SIFRE_SIFIRLAMA, hesap.email, {"ad": hesap.first_name or "", "token": token})
+    
+    return MessageResponse(
+        success=True,
+        message="Bu e-posta adresi kayıtlıysa şifre sıfırlama linki gönderildi."
+    )
+
+
+@router.post("/reset-password", response_model=MessageResponse)
+async def reset_password(request: ResetPasswordRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Sıfırlama token'ı ile yeni şifre belirle - tüm oturumlar sonlandırılır
+    """
+    ayrik = parse_password_reset_token(request.token)
+    if ayrik is None:
+        raise invalid_code_error(DogrulamaKoduHatasi("INVALID_CODE", "Kod geçersiz veya süresi dolmuş."))
+    kullanici_id, gizli = ayrik
+    
+    try:
+        await verify_code(db, kullanici_id, DogrulamaTipi.SIFRE_SIFIRLAMA, gizli)
+    except DogrulamaKoduHatasi as e:
+        raise invalid_code_error(e)
+    
+    # /login'in doğruladığı users.password_hash güncellenir
+    hesap = await db.get(Hesap, kullanici_id)
+    hesap.password_hash = await hash_password(request.new_password)
+    hesap.updated_at = func.now()
+    revoke_access_tokens(db, hesap)
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.kullanici_id == kullanici_id, RefreshToken.iptal_edildi == False)
+        .values(iptal_edildi=True)
+    )
+    
+    return MessageResponse(success=True, message="Şifreniz güncellendi. Lütfen tekrar giriş yapın.")
+
+
 @router.get("/me", response_model=UserInfo)
 async def get_current_user_info():
     """
@@ -3,38 +3,50 @@ Check-in Router - Check-in işlemleri
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from datetime import datetime, timedelta
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+import uuid
 
 from app.database import get_db
-from app.models import Kullanici, Checkin, RuhHali
+from app.models import Checkin, Kullanici, RuhHali
 from app.schemas.checkin import (
     CheckinRequest, CheckinResponse, CheckinBilgi, IstatistikBilgi,
     CheckinGecmisResponse, CheckinGecmisItem, CheckinKonumDetay,
     CheckinDurumResponse, SonCheckinBilgi, UyariEsikleri,
-    CheckinErteleRequest, CheckinErteleResponse
+    CheckinErteleRequest, CheckinErteleResponse,
+    TopluCheckinRequest, TopluCheckinResponse, TopluCheckinSonuc
 )
-from app.utils.security import get_current_user
+from app.services.aktivite_service import track_device_activity
+from app.services.durum_service import classify_status
+from app.services.zamanlayici_service import schedule_deadline
+from app.utils.security import KullaniciOzet, get_current_user
+from app.services.istatistik_service import (
+    update_checkin_stats, get_checkin_stats, recompute_checkin_stats, current_streak, count_checkins
+)
+from app.utils.sayfalama import encode_cursor, decode_cursor
 from app.config import get_settings
 
 settings = get_settings()
-router = APIRouter(prefix="/checkin", tags=["Check-in"])
+router = APIRouter(prefix="/checkin", tags=["Check-in"], dependencies=[Depends(track_device_activity)])
 
 
 @router.post("", response_model=CheckinResponse)
 async def create_checkin(
     request: CheckinRequest,
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: KullaniciOzet = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Check-in yap
     """
+    simdi = datetime.utcnow()
+    
     # Check-in oluştur
     checkin = Checkin(
         kullanici_id=kullanici.id,
-        tarih=datetime.utcnow(),
+        tarih=simdi,
         enlem=request.konum.enlem if request.konum else None,
         boylam=request.konum.boylam if request.konum else None,
         not_=request.not_,
@@ -43,34 +55,15 @@ async def create_checkin(
     db.add(checkin)
     await db.flush()
     
-    # İstatistikleri hesapla
-    toplam_checkin = await db.execute(
-        select(func.count(Checkin.id)).where(Checkin.kullanici_id == kullanici.id)
-    )
-    toplam = toplam_checkin.scalar() or 0
+    # İstatistikleri aynı transaction içinde güncelle
+    istatistik = await update_checkin_stats(db, kullanici.id, simdi)
     
-    # Ardışık gün hesapla
-    result = await db.execute(
-        select(Checkin.tarih)
-        .where(Checkin.kullanici_id == kullanici.id)
-        .order_by(Checkin.tarih.desc())
-        .limit(100)
+    # Sonraki beklenen check-in (alarm zamanlayıcısı yeni zamana göre kurulur)
+    sonraki_beklenen = simdi + timedelta(hours=kullanici.checkin_suresi_saat)
+    await db.execute(
+        update(Kullanici).where(Kullanici.id == kullanici.id).values(sonraki_beklenen=sonraki_beklenen)
     )
-    checkinler = result.scalars().all()
-    
-    ardisik_gun = 0
-    if checkinler:
-        onceki = datetime.utcnow().date()
-        for checkin_tarih in checkinler:
-            fark = (onceki - checkin_tarih.date()).days
-            if fark <= 1:
-                ardisik_gun += 1
-                onceki = checkin_tarih.date()
-            else:
-                break
-    
-    # Sonraki beklenen check-in
-    sonraki_beklenen = datetime.utcnow() + timedelta(hours=kullanici.checkin_suresi_saat)
+    schedule_deadline(db, kullanici.id, sonraki_beklenen)
     
     return CheckinResponse(
         basarili=True,
@@ -82,8 +75,103 @@ async def create_checkin(
             kalan_sure_saat=kullanici.checkin_suresi_saat
         ),
         istatistik=IstatistikBilgi(
-            ardisik_gun=ardisik_gun,
-            toplam_checkin=toplam
+            ardisik_gun=current_streak(istatistik, simdi.date()),
+            toplam_checkin=istatistik.toplam_checkin
+        )
+    )
+
+
+@router.post("/toplu", response_model=TopluCheckinResponse)
+async def create_checkins_bulk(
+    request: TopluCheckinRequest,
+    kullanici: KullaniciOzet = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Çevrimdışı biriken check-in'leri tek istekte senkronize et
+    
+    `istemci_id` kullanıcı bazında tekildir; aynı öğe tekrar gönderilirse
+    yeniden eklenmez ve `tekrar` olarak raporlanır. Başka kullanıcıların
+    id'leriyle çakışmaz.
+    """
+    simdi = datetime.utcnow()
+    sonuclar = {}
+    satirlar = []
+    
+    for item in request.checkinler:
+        anahtar = str(item.istemci_id)
+        if anahtar in sonuclar:
+            # Aynı istekte tekrarlanan öğe tek sonuçla temsil edilir
+            continue
+        
+        tarih = item.tarih
+        if tarih.tzinfo is not None:
+            tarih = tarih.astimezone(timezone.utc).replace(tzinfo=None)
+        if tarih > simdi + timedelta(minutes=5):
+            sonuclar[anahtar] = TopluCheckinSonuc(istemci_id=anahtar, durum="gecersiz", hata="Gelecek tarihli check-in")
+            continue
+        try:
+            ruh_hali = RuhHali(item.ruh_hali.upper()) if item.ruh_hali else None
+        except ValueError:
+            sonuclar[anahtar] = TopluCheckinSonuc(istemci_id=anahtar, durum="gecersiz", hata="Geçersiz ruh hali")
+            continue
+        
+        sonuclar[anahtar] = TopluCheckinSonuc(istemci_id=anahtar, durum="tekrar")
+        satirlar.append({
+            "id": uuid.uuid4(),
+            "istemci_id": item.istemci_id,
+            "kullanici_id": kullanici.id,
+            "tarih": tarih,
+            "enlem": item.konum.enlem if item.konum else None,
+            "boylam": item.konum.boylam if item.konum else None,
+            "not": item.not_,
+            "ruh_hali": ruh_hali,
+        })
+    
+    # Tek çok satırlı INSERT - kullanıcının daha önce senkronize ettiği id'ler atlanır
+    eklenen = 0
+    if satirlar:
+        result = await db.execute(
+            pg_insert(Checkin.__table__)
+            .values(satirlar)
+            .on_conflict_do_nothing(index_elements=["kullanici_id", "istemci_id"])
+            .returning(Checkin.__table__.c.istemci_id)
+        )
+        for istemci_id in result.scalars():
+            sonuclar[str(istemci_id)].durum = "olusturuldu"
+            eklenen += 1
+    
+    if not eklenen:
+        # Hepsi tekrar/geçersiz - istatistik ve beklenen zaman değişmedi
+        istatistik = await get_checkin_stats(db, kullanici.id)
+    else:
+        # İstatistikleri bir kez yeniden hesapla
+        istatistik = await recompute_checkin_stats(db, kullanici.id)
+    
+    # Geçmiş tarihli check-in'ler beklenen zamanı geri almaz (erteleme korunur)
+    if eklenen and istatistik and istatistik.son_checkin:
+        result = await db.execute(
+            update(Kullanici)
+            .where(Kullanici.id == kullanici.id)
+            .values(sonraki_beklenen=func.greatest(
+                Kullanici.sonraki_beklenen,
+                istatistik.son_checkin + timedelta(hours=kullanici.checkin_suresi_saat),
+            ))
+            .returning(Kullanici.sonraki_beklenen)
+        )
+        schedule_deadline(db, kullanici.id, result.scalar_one())
+    
+    sonuc_listesi = list(sonuclar.values())
+    
+    return TopluCheckinResponse(
+        basarili=True,
+        olusturulan=sum(1 for s in sonuc_listesi if s.durum == "olusturuldu"),
+        tekrar=sum(1 for s in sonuc_listesi if s.durum == "tekrar"),
+        gecersiz=sum(1 for s in sonuc_listesi if s.durum == "gecersiz"),
+        sonuclar=sonuc_listesi,
+        istatistik=IstatistikBilgi(
+            ardisik_gun=current_streak(istatistik, simdi.date()),
+            toplam_checkin=istatistik.toplam_checkin if istatistik else 0
         )
     )
 
@@ -92,44 +180,61 @@ async def create_checkin(
 async def get_checkin_history(
     sayfa: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    imlec: Optional[str] = Query(None, description="Önceki yanıttaki sonraki_imlec"),
+    toplam_dahil: bool = Query(True, description="Toplam sayıyı da döndür"),
     baslangic_tarihi: Optional[str] = None,
     bitis_tarihi: Optional[str] = None,
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: KullaniciOzet = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Check-in geçmişi
+    
+    `imlec` verilirse keyset sayfalama yapılır (derin sayfalarda da sabit maliyet);
+    verilmezse eski `sayfa` parametresiyle offset sayfalama kullanılır.
     """
+    baslangic = datetime.strptime(baslangic_tarihi, "%Y-%m-%d") if baslangic_tarihi else None
+    bitis = datetime.strptime(bitis_tarihi, "%Y-%m-%d") if bitis_tarihi else None
+    
     # Sorgu oluştur
     query = select(Checkin).where(Checkin.kullanici_id == kullanici.id)
     
     # Tarih filtreleri
-    if baslangic_tarihi:
-        query = query.where(Checkin.tarih >= datetime.strptime(baslangic_tarihi, "%Y-%m-%d"))
-    if bitis_tarihi:
-        query = query.where(Checkin.tarih <= datetime.strptime(bitis_tarihi, "%Y-%m-%d"))
-    
-    # Toplam sayı
-    count_query = select(func.count(Checkin.id)).where(Checkin.kullanici_id == kullanici.id)
-    if baslangic_tarihi:
-        count_query = count_query.where(Checkin.tarih >= datetime.strptime(baslangic_tarihi, "%Y-%m-%d"))
-    if bitis_tarihi:
-        count_query = count_query.where(Checkin.tarih <= datetime.strptime(bitis_tarihi, "%Y-%m-%d"))
-    
-    toplam_result = await db.execute(count_query)
-    toplam = toplam_result.scalar() or 0
+    if baslangic:
+        query = query.where(Checkin.tarih >= baslangic)
+    if bitis:
+        query = query.where(Checkin.tarih <= bitis)
     
-    # Sayfalama ve sıralama
-    offset = (sayfa - 1) * limit
-    query = query.order_by(Checkin.tarih.desc()).offset(offset).limit(limit)
+    # Sayfalama ve sıralama (bir fazla satır çekerek sonraki sayfanın varlığını anla)
+    query = query.order_by(Checkin.tarih.desc(), Checkin.id.desc()).limit(limit + 1)
+    if imlec:
+        try:
+            imlec_tarih, imlec_id = decode_cursor(imlec)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"basarili": False, "hata": {"kod": "GECERSIZ_IMLEC", "mesaj": "Geçersiz sayfalama imleci."}}
+            )
+        query = query.where(tuple_(Checkin.tarih, Checkin.id) < tuple_(imlec_tarih, imlec_id))
+    else:
+        query = query.offset((sayfa - 1) * limit)
     
     result = await db.execute(query)
     checkinler = result.scalars().all()
     
+    sonraki_imlec = None
+    if len(checkinler) > limit:
+        checkinler = checkinler[:limit]
+        sonraki_imlec = encode_cursor(checkinler[-1].tarih, checkinler[-1].id)
+    
+    # Toplam sayı (istatistik satırından veya cache'li sayımdan)
+    toplam = await count_checkins(db, kullanici.id, baslangic, bitis) if toplam_dahil else None
+    
     return CheckinGecmisResponse(
         toplam=toplam,
         sayfa=sayfa,
         limit=limit,
+        sonraki_imlec=sonraki_imlec,
         checkinler=[
             CheckinGecmisItem(
                 id=str(c.id),
@@ -149,7 +254,7 @@ async def get_checkin_history(
 
 @router.get("/durum", response_model=CheckinDurumResponse)
 async def get_checkin_status(
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: KullaniciOzet = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -171,7 +276,7 @@ async def get_checkin_status(
             kalan_sure_saat=None,
             durum="alarm",
             uyari_esikleri=UyariEsikleri(
-                uyari_saat=20,
+                uyari_saat=settings.REMINDER_THRESHOLD,
                 kritik_saat=settings.WARNING_THRESHOLD,
                 alarm_saat=settings.ALARM_THRESHOLD
             )
@@ -181,18 +286,14 @@ async def get_checkin_status(
     gecen_sure = datetime.utcnow() - son_checkin.tarih
     gecen_saat = gecen_sure.total_seconds() / 3600
     
-    sonraki_beklenen = son_checkin.tarih + timedelta(hours=kullanici.checkin_suresi_saat)
+    # Ertelenmişse kalıcı beklenen zaman son check-in'den hesaplanandan sonradır
+    sonraki_beklenen = await db.scalar(
+        select(Kullanici.sonraki_beklenen).where(Kullanici.id == kullanici.id)
+    ) or son_checkin.tarih + timedelta(hours=kullanici.checkin_suresi_saat)
     kalan_sure = (sonraki_beklenen - datetime.utcnow()).total_seconds() / 3600
     
-    # Durum belirleme
-    if gecen_saat < 20:
-        durum = "guvenli"
-    elif gecen_saat < settings.WARNING_THRESHOLD:
-        durum = "uyari"
-    elif gecen_saat < settings.ALARM_THRESHOLD:
-        durum = "kritik"
-    else:
-        durum = "alarm"
+    # Durum belirleme (zamanlayıcı ile aynı eşikler)
+    durum = classify_status(sonraki_beklenen)
     
     return CheckinDurumResponse(
         son_checkin=SonCheckinBilgi(
@@ -203,7 +304,7 @@ async def get_checkin_status(
         kalan_sure_saat=round(max(0, kalan_sure), 1),
         durum=durum,
         uyari_esikleri=UyariEsikleri(
-            uyari_saat=20,
+            uyari_saat=settings.REMINDER_THRESHOLD,
             kritik_saat=settings.WARNING_THRESHOLD,
             alarm_saat=settings.ALARM_THRESHOLD
         )
@@ -213,7 +314,7 @@ async def get_checkin_status(
 @router.post("/ertele", response_model=CheckinErteleResponse)
 async def postpone_checkin(
     request: CheckinErteleRequest,
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: KullaniciOzet = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -238,6 +339,10 @@ async def postpone_checkin(
     yeni_beklenen = son_checkin.tarih + timedelta(
         hours=kullanici.checkin_suresi_saat + request.ek_sure_saat
     )
+    await db.execute(
+        update(Kullanici).where(Kullanici.id == kullanici.id).values(sonraki_beklenen=yeni_beklenen)
+    )
+    schedule_deadline(db, kullanici.id, yeni_beklenen)
     
     return CheckinErteleResponse(
         basarili=True,
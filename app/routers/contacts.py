@@ -5,21 +5,41 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 from datetime import datetime
 
-from app.database import get_supabase
-from app.schemas.contacts import ContactCreate, ContactUpdate, ContactResponse, ContactsListResponse
-from app.utils.security import get_user_id_from_token
+from postgrest.exceptions import APIError
 
-router = APIRouter(prefix="/contacts", tags=["Acil Durum Kişileri"])
+from app.database import get_supabase, is_pg_error, UNIQUE_VIOLATION, INVALID_TEXT_REPRESENTATION
+from app.schemas.contacts import (
+    ContactCreate, ContactUpdate, ContactResponse, ContactsListResponse,
+    ContactBulkImportRequest, ContactBulkImportResponse, ContactImportSkipped
+)
+from app.services.aktivite_service import track_device_activity
+from app.utils.security import get_current_account_id
+
+router = APIRouter(prefix="/contacts", tags=["Acil Durum Kişileri"], dependencies=[Depends(track_device_activity)])
+
+
+def contact_exists_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"success": False, "error": {"code": "CONTACT_EXISTS", "message": "Bu telefon numarası zaten listenizde ekli."}}
+    )
+
+
+def not_found_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail={"success": False, "error": {"code": "NOT_FOUND", "message": "Kişi bulunamadı veya yetkiniz yok."}}
+    )
 
 
 @router.get("/", response_model=ContactsListResponse)
-async def get_contacts(user_id: str = Depends(get_user_id_from_token)):
+async def get_contacts(user_id: str = Depends(get_current_account_id)):
     """
     Giriş yapmış kullanıcının tüm acil durum kişilerini getirir
     """
     supabase = get_supabase()
     
-    result = supabase.table("contacts").select("*").eq("user_id", user_id).order_by("created_at").execute()
+    result = await supabase.table("contacts").select("*").eq("user_id", user_id).order("created_at").execute()
     
     return ContactsListResponse(success=True, contacts=result.data)
 
@@ -27,26 +47,23 @@ async def get_contacts(user_id: str = Depends(get_user_id_from_token)):
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
 async def create_contact(
     request: ContactCreate, 
-    user_id: str = Depends(get_user_id_from_token)
+    user_id: str = Depends(get_current_account_id)
 ):
     """
     Yeni bir acil durum kişisi ekler
     """
     supabase = get_supabase()
     
-    # Telefon numarası kontrolü (User bazlı unique constraint veritabanında var ama biz de kontrol edelim)
-    existing = supabase.table("contacts").select("id").eq("user_id", user_id).eq("phone_number", request.phone_number).execute()
-    
-    if existing.data and len(existing.data) > 0:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail={"success": False, "error": {"code": "CONTACT_EXISTS", "message": "Bu telefon numarası zaten listenizde ekli."}}
-        )
-    
     contact_data = request.model_dump()
     contact_data["user_id"] = user_id
     
-    result = supabase.table("contacts").insert(contact_data).execute()
+    # Telefon numarası tekrarı unique_user_phone kısıtından yakalanır (tek istek)
+    try:
+        result = await supabase.table("contacts").insert(contact_data).execute()
+    except APIError as e:
+        if is_pg_error(e, UNIQUE_VIOLATION):
+            raise contact_exists_error()
+        raise
     
     if not result.data:
         raise HTTPException(
@@ -57,30 +74,85 @@ async def create_contact(
     return result.data[0]
 
 
+@router.post("/import", response_model=ContactBulkImportResponse)
+async def import_contacts(
+    request: ContactBulkImportRequest,
+    user_id: str = Depends(get_current_account_id)
+):
+    """
+    Telefon rehberinden toplu kişi içe aktarır
+    
+    Mevcut kişiler tek sorguda okunur, yeni ve değişen kişiler `unique_user_phone`
+    kısıtı üzerinden tek bir upsert ile yazılır (kişi sayısından bağımsız 2 istek).
+    """
+    supabase = get_supabase()
+    
+    # Aynı istekte tekrarlanan numaralar - son gelen geçerli
+    skipped = []
+    incoming = {}
+    for contact in request.contacts:
+        if contact.phone_number in incoming:
+            skipped.append(ContactImportSkipped(phone_number=contact.phone_number, reason="duplicate_in_request"))
+        incoming[contact.phone_number] = contact
+    
+    existing = await supabase.table("contacts").select("phone_number, name, email").eq("user_id", user_id).in_("phone_number", list(incoming)).execute()
+    existing_by_phone = {row["phone_number"]: row for row in existing.data or []}
+    
+    now = datetime.utcnow().isoformat()
+    rows = []
+    created_phones = set()
+    for phone_number, contact in incoming.items():
+        current = existing_by_phone.get(phone_number)
+        # E-posta verilmediyse mevcut e-posta korunur
+        email = contact.email if contact.email is not None else (current or {}).get("email")
+        if current is None:
+            created_phones.add(phone_number)
+        elif current["name"] == contact.name and current.get("email") == email:
+            skipped.append(ContactImportSkipped(phone_number=phone_number, reason="unchanged"))
+            continue
+        rows.append({
+            "user_id": user_id,
+            "name": contact.name,
+            "phone_number": phone_number,
+            "email": email,
+            "updated_at": now,
+        })
+    
+    created, updated = [], []
+    if rows:
+        result = await supabase.table("contacts").upsert(rows, on_conflict="user_id,phone_number").execute()
+        for row in result.data or []:
+            (created if row["phone_number"] in created_phones else updated).append(row)
+    
+    return ContactBulkImportResponse(success=True, created=created, updated=updated, skipped=skipped)
+
+
 @router.put("/{contact_id}", response_model=ContactResponse)
 async def update_contact(
     contact_id: str,
     request: ContactUpdate,
-    user_id: str = Depends(get_user_id_from_token)
+    user_id: str = Depends(get_current_account_id)
 ):
     """
     Belirli bir acil durum kişisini günceller
     """
     supabase = get_supabase()
     
-    # Kişinin kullanıcıya ait olup olmadığını kontrol et
-    check = supabase.table("contacts").select("id").eq("id", contact_id).eq("user_id", user_id).execute()
-    
-    if not check.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={"success": False, "error": {"code": "NOT_FOUND", "message": "Kişi bulunamadı veya yetkiniz yok."}}
-        )
-    
     update_data = request.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow().isoformat()
     
-    result = supabase.table("contacts").update(update_data).eq("id", contact_id).execute()
+    # Sahiplik kontrolü filtrenin parçası - eşleşen satır yoksa kişi bulunamadı
+    try:
+        result = await supabase.table("contacts").update(update_data).eq("id", contact_id).eq("user_id", user_id).execute()
+    except APIError as e:
+        if is_pg_error(e, UNIQUE_VIOLATION):
+            raise contact_exists_error()
+        if is_pg_error(e, INVALID_TEXT_REPRESENTATION):
+            raise not_found_error()
+        raise
+    
+    if not result.data:
+        raise not_found_error()
     
     return result.data[0]
 
@@ -88,22 +160,22 @@ async def update_contact(
 @router.delete("/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_contact(
     contact_id: str,
-    user_id: str = Depends(get_user_id_from_token)
+    user_id: str = Depends(get_current_account_id)
 ):
     """
     Belirli bir acil durum kişisini siler
     """
     supabase = get_supabase()
     
-    # Kişinin kullanıcıya ait olup olmadığını kontrol et
-    check = supabase.table("contacts").select("id").eq("id", contact_id).eq("user_id", user_id).execute()
-    
-    if not check.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={"success": False, "error": {"code": "NOT_FOUND", "message": "Kişi bulunamadı veya yetkiniz yok."}}
-        )
+    # Sahiplik kontrolü filtrenin parçası - silinen satır yoksa kişi bulunamadı
+    try:
+        result = await supabase.table("contacts").delete().eq("id", contact_id).eq("user_id", user_id).execute()
+    except APIError as e:
+        if is_pg_error(e, INVALID_TEXT_REPRESENTATION):
+            raise not_found_error()
+        raise
     
-    supabase.table("contacts").delete().eq("id", contact_id).execute()
+    if not result.data:
+        raise not_found_error()
     
     return None
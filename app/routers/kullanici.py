@@ -2,60 +2,42 @@
 Kullanıcı Router - Profil yönetimi endpoint'leri
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy import func, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 from datetime import datetime
 import os
 import uuid
 import aiofiles
 
 from app.database import get_db
-from app.models import Kullanici, Checkin, RefreshToken
+from app.models import Hesap, Kullanici, RefreshToken
 from app.schemas.kullanici import (
     ProfilResponse, ProfilGuncelleRequest, SifreDegistirRequest,
     HesapSilRequest, ProfilFotoResponse, AbonelikBilgi, AyarlarBilgi, IstatistikBilgi
 )
 from app.schemas.genel import BasariliMesajResponse
-from app.utils.security import get_current_user, hash_password, verify_password
+from app.services.aktivite_service import track_device_activity
+from app.utils.security import (
+    get_current_user_row, get_current_account_row, invalidate_user_cache, revoke_access_tokens,
+    hash_password, verify_password
+)
+from app.services.istatistik_service import get_checkin_stats, current_streak
 from app.config import get_settings
 
 settings = get_settings()
-router = APIRouter(prefix="/kullanici", tags=["Kullanıcı"])
+router = APIRouter(prefix="/kullanici", tags=["Kullanıcı"], dependencies=[Depends(track_device_activity)])
 
 
 @router.get("/profil", response_model=ProfilResponse)
 async def get_profile(
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: Kullanici = Depends(get_current_user_row),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Profil bilgilerini getir
     """
-    # Toplam check-in sayısı
-    result = await db.execute(
-        select(func.count(Checkin.id)).where(Checkin.kullanici_id == kullanici.id)
-    )
-    toplam_checkin = result.scalar() or 0
-    
-    # Ardışık gün hesapla (basitleştirilmiş)
-    result = await db.execute(
-        select(Checkin.tarih)
-        .where(Checkin.kullanici_id == kullanici.id)
-        .order_by(Checkin.tarih.desc())
-        .limit(100)
-    )
-    checkinler = result.scalars().all()
-    
-    ardisik_gun = 0
-    if checkinler:
-        onceki = datetime.utcnow().date()
-        for checkin_tarih in checkinler:
-            fark = (onceki - checkin_tarih.date()).days
-            if fark <= 1:
-                ardisik_gun += 1
-                onceki = checkin_tarih.date()
-            else:
-                break
+    # İstatistikler (tek primary key okuması)
+    istatistik = await get_checkin_stats(db, kullanici.id)
     
     return ProfilResponse(
         id=str(kullanici.id),
@@ -79,8 +61,8 @@ async def get_profile(
             titresim_aktif=True
         ),
         istatistikler=IstatistikBilgi(
-            toplam_checkin=toplam_checkin,
-            ardisik_gun=ardisik_gun,
+            toplam_checkin=istatistik.toplam_checkin if istatistik else 0,
+            ardisik_gun=current_streak(istatistik),
             kayit_tarihi=kullanici.olusturma_tarihi
         )
     )
@@ -89,7 +71,7 @@ async def get_profile(
 @router.put("/profil", response_model=BasariliMesajResponse)
 async def update_profile(
     request: ProfilGuncelleRequest,
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: Kullanici = Depends(get_current_user_row),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -106,13 +88,15 @@ async def update_profile(
     if request.adres:
         kullanici.adres = request.adres.model_dump()
     
+    invalidate_user_cache(db, kullanici.hesap_id)
+    
     return BasariliMesajResponse(basarili=True, mesaj="Profil başarıyla güncellendi.")
 
 
 @router.post("/profil-foto", response_model=ProfilFotoResponse)
 async def upload_profile_photo(
     foto: UploadFile = File(...),
-    kullanici: Kullanici = Depends(get_current_user),
+    kullanici: Kullanici = Depends(get_current_user_row),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -153,14 +137,14 @@ async def upload_profile_photo(
 @router.put("/sifre-degistir", response_model=BasariliMesajResponse)
 async def change_password(
     request: SifreDegistirRequest,
-    kullanici: Kullanici = Depends(get_current_user),
+    hesap: Hesap = Depends(get_current_account_row),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Şifre değiştir
+    Şifre değiştir - /login'in doğruladığı `users.password_hash` güncellenir
     """
     # Mevcut şifre kontrolü
-    if not verify_password(request.mevcut_sifre, kullanici.sifre_hash):
+    if not await verify_password(request.mevcut_sifre, hesap.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"basarili": False, "hata": {"kod": "YANLIS_SIFRE", "mesaj": "Mevcut şifre hatalı."}}
@@ -174,29 +158,34 @@ async def change_password(
         )
     
     # Yeni şifreyi kaydet
-    kullanici.sifre_hash = hash_password(request.yeni_sifre)
+    hesap.password_hash = await hash_password(request.yeni_sifre)
+    hesap.updated_at = func.now()
     
-    # Diğer oturumları sonlandır
+    # Tüm oturumları sonlandır (bu istekte kullanılan token dahil)
+    revoke_access_tokens(db, hesap)
     await db.execute(
-        RefreshToken.__table__.update()
-        .where(RefreshToken.kullanici_id == kullanici.id)
+        update(RefreshToken)
+        .where(RefreshToken.kullanici_id == hesap.id)
         .values(iptal_edildi=True)
     )
     
-    return BasariliMesajResponse(basarili=True, mesaj="Şifreniz başarıyla değiştirildi.")
+    return BasariliMesajResponse(basarili=True, mesaj="Şifreniz başarıyla değiştirildi. Lütfen tekrar giriş yapın.")
 
 
 @router.delete("/hesap", response_model=BasariliMesajResponse)
 async def delete_account(
     request: HesapSilRequest,
-    kullanici: Kullanici = Depends(get_current_user),
+    hesap: Hesap = Depends(get_current_account_row),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Hesabı sil (soft delete - 30 gün sonra kalıcı)
+    
+    `users` hesabı devre dışı bırakılır (/login 403 döner) ve bağlı profil
+    silinmek üzere işaretlenir; zamanlayıcı silinmiş profilleri izlemez.
     """
     # Şifre kontrolü
-    if not verify_password(request.sifre, kullanici.sifre_hash):
+    if not await verify_password(request.sifre, hesap.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"basarili": False, "hata": {"kod": "YANLIS_SIFRE", "mesaj": "Şifre hatalı."}}
@@ -204,12 +193,19 @@ async def delete_account(
     
     # Soft delete - 30 gün sonra kalıcı silinecek
     from datetime import timedelta
-    kullanici.silinme_tarihi = datetime.utcnow() + timedelta(days=30)
+    hesap.is_active = False
+    hesap.updated_at = func.now()
+    await db.execute(
+        update(Kullanici)
+        .where(Kullanici.hesap_id == hesap.id)
+        .values(silinme_tarihi=datetime.utcnow() + timedelta(days=30))
+    )
     
-    # Tüm oturumları sonlandır
+    # Tüm oturumları sonlandır (bu istekte kullanılan token dahil)
+    revoke_access_tokens(db, hesap)
     await db.execute(
-        RefreshToken.__table__.update()
-        .where(RefreshToken.kullanici_id == kullanici.id)
+        update(RefreshToken)
+        .where(RefreshToken.kullanici_id == hesap.id)
         .values(iptal_edildi=True)
     )
     
@@ -0,0 +1,156 @@
+"""
+Ops Router - Operasyon ekibi için izleme endpoint'leri
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+from uuid import UUID
+import hmac
+
+from app.database import get_db
+from app.models import GidenDurum, GidenKutusu, Kullanici
+from app.schemas.genel import BasariliMesajResponse
+from app.schemas.ops import GecikenKullanici, GecikenListeResponse, VazgecilenEposta, VazgecilenListeResponse
+from app.services.bildirim_service import YenidenDenemeHatasi, requeue_dead_letter
+from app.services.durum_service import DURUMLAR, asama_ofsetleri, classify_status
+from app.utils.sayfalama import encode_cursor, decode_cursor
+from app.config import get_settings
+
+settings = get_settings()
+
+
+async def require_ops_key(x_ops_key: Optional[str] = Header(None)) -> None:
+    """X-Ops-Key başlığını OPS_API_KEY ile sabit zamanlı karşılaştır; anahtar tanımlı değilse endpoint'ler kapalı"""
+    if not settings.OPS_API_KEY or not x_ops_key or not hmac.compare_digest(
+        x_ops_key.encode(), settings.OPS_API_KEY.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"basarili": False, "hata": {"kod": "YETKISIZ", "mesaj": "Geçersiz operasyon anahtarı."}}
+        )
+
+
+router = APIRouter(prefix="/ops", tags=["Operasyon"], dependencies=[Depends(require_ops_key)])
+
+
+@router.get("/gecikenler", response_model=GecikenListeResponse)
+async def list_overdue_users(
+    en_az: Optional[Literal["uyari", "kritik", "alarm"]] = Query(None, description="En düşük durum"),
+    limit: int = Query(50, ge=1, le=200),
+    imlec: Optional[str] = Query(None, description="Önceki yanıttaki sonraki_imlec"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Beklenen check-in zamanı geçmiş kullanıcılar
+
+    `en_az` verilirse sınır o aşamanın başlangıcıdır: uyarı aşaması beklenen zamandan
+    önce başladığından `en_az=uyari` henüz gecikmemiş (gecikme_saat negatif) ama uyarı
+    penceresindeki kullanıcıları da listeler.
+
+    Durum gecikmeyle birlikte ağırlaştığından `sonraki_beklenen` artan sırası en ağır
+    durumdan hafife sıralamadır; sorgu `ix_kullanicilar_sonraki_beklenen` üzerinde bir
+    aralık taramasıdır ve keyset sayfalanır.
+    """
+    simdi = datetime.utcnow()
+
+    if en_az:
+        # asama() ile aynı sınır: gecikme >= ofset
+        ofset = asama_ofsetleri()[DURUMLAR.index(en_az) - 1]
+        sinir = Kullanici.sonraki_beklenen <= simdi - timedelta(seconds=ofset)
+    else:
+        sinir = Kullanici.sonraki_beklenen < simdi
+    query = (
+        select(
+            Kullanici.id, Kullanici.ad, Kullanici.soyad, Kullanici.email, Kullanici.telefon,
+            Kullanici.sonraki_beklenen,
+        )
+        .where(sinir, Kullanici.silinme_tarihi.is_(None))
+        .order_by(Kullanici.sonraki_beklenen, Kullanici.id)
+        .limit(limit + 1)
+    )
+    if imlec:
+        try:
+            imlec_tarih, imlec_id = decode_cursor(imlec)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"basarili": False, "hata": {"kod": "GECERSIZ_IMLEC", "mesaj": "Geçersiz sayfalama imleci."}}
+            )
+        query = query.where(
+            tuple_(Kullanici.sonraki_beklenen, Kullanici.id) > tuple_(imlec_tarih, imlec_id)
+        )
+
+    result = await db.execute(query)
+    satirlar = result.all()
+
+    sonraki_imlec = None
+    if len(satirlar) > limit:
+        satirlar = satirlar[:limit]
+        sonraki_imlec = encode_cursor(satirlar[-1].sonraki_beklenen, satirlar[-1].id)
+
+    return GecikenListeResponse(
+        limit=limit,
+        sonraki_imlec=sonraki_imlec,
+        kullanicilar=[
+            GecikenKullanici(
+                id=str(s.id),
+                ad=s.ad,
+                soyad=s.soyad,
+                email=s.email,
+                telefon=s.telefon,
+                sonraki_beklenen=s.sonraki_beklenen,
+                gecikme_saat=round((simdi - s.sonraki_beklenen).total_seconds() / 3600, 1),
+                durum=classify_status(s.sonraki_beklenen, simdi),
+            )
+            for s in satirlar
+        ]
+    )
+
+
+@router.get("/giden-kutusu/vazgecilenler", response_model=VazgecilenListeResponse)
+async def list_dead_letters(
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """Son denemeden sonra ya da kalıcı hatayla vazgeçilen e-postalar"""
+    result = await db.execute(
+        select(
+            GidenKutusu.id, GidenKutusu.tip, GidenKutusu.alici, GidenKutusu.alarm_id,
+            GidenKutusu.deneme, GidenKutusu.son_hata, GidenKutusu.olusturma_tarihi,
+        )
+        .where(GidenKutusu.durum == GidenDurum.VAZGECILDI)
+        .order_by(GidenKutusu.olusturma_tarihi.desc())
+        .limit(limit)
+    )
+    return VazgecilenListeResponse(epostalar=[
+        VazgecilenEposta(
+            id=str(s.id),
+            tip=s.tip.value.lower(),
+            alici=s.alici,
+            alarm_id=str(s.alarm_id) if s.alarm_id else None,
+            deneme=s.deneme,
+            son_hata=s.son_hata,
+            olusturma_tarihi=s.olusturma_tarihi,
+        )
+        for s in result
+    ])
+
+
+@router.post("/giden-kutusu/{giden_id}/yeniden-dene", response_model=BasariliMesajResponse)
+async def retry_dead_letter(giden_id: UUID, db: AsyncSession = Depends(get_db)):
+    """Vazgeçilen e-postayı deneme sayacını sıfırlayarak kuyruğa geri al (kod içeren e-postalar hariç)"""
+    try:
+        bulundu = await requeue_dead_letter(db, giden_id)
+    except YenidenDenemeHatasi as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"basarili": False, "hata": {"kod": e.kod, "mesaj": e.mesaj}}
+        )
+    if not bulundu:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"basarili": False, "hata": {"kod": "BULUNAMADI", "mesaj": "Vazgeçilmiş e-posta bulunamadı."}}
+        )
+    return BasariliMesajResponse(basarili=True, mesaj="E-posta kuyruğa geri alındı.")
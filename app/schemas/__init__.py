@@ -47,6 +47,13 @@ from app.schemas.alarm import (
     BildirimListeResponse,
 )
 
+from app.schemas.ops import (
+    GecikenKullanici,
+    GecikenListeResponse,
+    VazgecilenEposta,
+    VazgecilenListeResponse,
+)
+
 from app.schemas.genel import (
     HataResponse,
     BasariliMesajResponse,
@@ -73,6 +80,11 @@ __all__ = [
     # Alarm
     "PanikAlarmRequest",
     "PanikAlarmResponse",
+    # Ops
+    "GecikenKullanici",
+    "GecikenListeResponse",
+    "VazgecilenEposta",
+    "VazgecilenListeResponse",
     # Genel
     "HataResponse",
     "BasariliMesajResponse",
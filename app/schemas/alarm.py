@@ -24,6 +24,7 @@ class BilgilendirilenKisi(BaseModel):
     """Bilgilendirilen kişi"""
     ad: str
     bildirim_tipi: str  # sms|arama|email
+    durum: Optional[str] = None  # bekliyor|gonderildi|basarisiz|zaman_asimi|adres_yok
 
 
 class AlarmBilgi(BaseModel):
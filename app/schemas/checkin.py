@@ -4,6 +4,7 @@ Pydantic Şemaları - Check-in
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from uuid import UUID
 
 
 class KonumBilgi(BaseModel):
@@ -44,6 +45,40 @@ class CheckinResponse(BaseModel):
     istatistik: IstatistikBilgi
 
 
+class TopluCheckinItem(BaseModel):
+    """Çevrimdışı kuyruktan gelen tek check-in"""
+    istemci_id: UUID = Field(..., description="Cihazda üretilen benzersiz id (tekrar gönderimde aynı kalır)")
+    tarih: datetime = Field(..., description="Check-in'in cihazdaki zamanı")
+    konum: Optional[KonumBilgi] = None
+    not_: Optional[str] = Field(None, max_length=500, alias="not")
+    ruh_hali: Optional[str] = Field(None, description="iyi|orta|kotu")
+    
+    class Config:
+        populate_by_name = True
+
+
+class TopluCheckinRequest(BaseModel):
+    """Toplu check-in senkronizasyon isteği"""
+    checkinler: List[TopluCheckinItem] = Field(..., min_length=1, max_length=100)
+
+
+class TopluCheckinSonuc(BaseModel):
+    """Toplu check-in öğe sonucu"""
+    istemci_id: str
+    durum: str = Field(..., description="olusturuldu|tekrar|gecersiz")
+    hata: Optional[str] = None
+
+
+class TopluCheckinResponse(BaseModel):
+    """Toplu check-in yanıtı"""
+    basarili: bool = True
+    olusturulan: int
+    tekrar: int
+    gecersiz: int
+    sonuclar: List[TopluCheckinSonuc]
+    istatistik: IstatistikBilgi
+
+
 class CheckinKonumDetay(BaseModel):
     """Check-in konum detayı"""
     enlem: Optional[float] = None
@@ -65,10 +100,11 @@ class CheckinGecmisItem(BaseModel):
 
 class CheckinGecmisResponse(BaseModel):
     """Check-in geçmişi yanıtı"""
-    toplam: int
+    toplam: Optional[int] = None
     sayfa: int
     limit: int
     checkinler: List[CheckinGecmisItem]
+    sonraki_imlec: Optional[str] = Field(None, description="Sonraki sayfa için opak imleç (yoksa son sayfa)")
 
 
 class UyariEsikleri(BaseModel):
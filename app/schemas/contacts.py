@@ -38,3 +38,26 @@ class ContactsListResponse(BaseModel):
     """Kişi listesi yanıtı"""
     success: bool = True
     contacts: List[ContactResponse]
+
+
+# Toplu içe aktarmada tek istekte kabul edilen en fazla kişi sayısı
+MAX_BULK_CONTACTS = 200
+
+
+class ContactBulkImportRequest(BaseModel):
+    """Toplu kişi içe aktarma isteği (telefon rehberinden)"""
+    contacts: List[ContactCreate] = Field(..., min_length=1, max_length=MAX_BULK_CONTACTS)
+
+
+class ContactImportSkipped(BaseModel):
+    """İçe aktarılmayan kişi"""
+    phone_number: str
+    reason: str  # unchanged|duplicate_in_request
+
+
+class ContactBulkImportResponse(BaseModel):
+    """Toplu kişi içe aktarma yanıtı"""
+    success: bool = True
+    created: List[ContactResponse]
+    updated: List[ContactResponse]
+    skipped: List[ContactImportSkipped]
@@ -0,0 +1,43 @@
+"""
+Pydantic Şemaları - Operasyon
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+
+class GecikenKullanici(BaseModel):
+    """Beklenen check-in zamanı geçmiş kullanıcı"""
+    id: str
+    ad: str
+    soyad: str
+    email: str
+    telefon: str
+    sonraki_beklenen: datetime
+    gecikme_saat: float
+    durum: str = Field(..., description="uyari|kritik|alarm")
+
+
+class GecikenListeResponse(BaseModel):
+    """Geciken kullanıcılar - en ağır durumdan (en uzun gecikmeden) başlayarak"""
+    basarili: bool = True
+    limit: int
+    kullanicilar: List[GecikenKullanici]
+    sonraki_imlec: Optional[str] = Field(None, description="Sonraki sayfa için opak imleç (yoksa son sayfa)")
+
+
+class VazgecilenEposta(BaseModel):
+    """Son denemeden sonra vazgeçilen giden kutusu satırı (içerik döndürülmez)"""
+    id: str
+    tip: str = Field(..., description="alarm|dogrulama|sifre_sifirlama")
+    alici: str
+    alarm_id: Optional[str] = None
+    deneme: int
+    son_hata: Optional[str] = None
+    olusturma_tarihi: datetime
+
+
+class VazgecilenListeResponse(BaseModel):
+    """Vazgeçilen e-postalar - en yeniden eskiye"""
+    basarili: bool = True
+    epostalar: List[VazgecilenEposta]
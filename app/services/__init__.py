@@ -1,14 +1,110 @@
 """Services package"""
 from app.services.email_service import (
+    deliver_email,
     send_email,
     send_verification_email,
     send_password_reset_email,
     send_alarm_notification_email,
 )
+from app.services.istatistik_service import (
+    update_checkin_stats,
+    get_checkin_stats,
+    current_streak,
+    count_checkins,
+    backfill_checkin_stats,
+    recompute_checkin_stats,
+)
+from app.services.bildirim_service import (
+    enqueue_email,
+    enqueue_alarm_notifications,
+    requeue_dead_letter,
+    cancel_alarm_notifications,
+    YenidenDenemeHatasi,
+    count_notified,
+    outbox_worker_loop,
+    get_outbox_stats,
+)
+from app.services.aktivite_service import (
+    record_login,
+    record_device_activity,
+    track_device_activity,
+    flush_activity,
+    activity_flush_loop,
+    get_activity_stats,
+)
+from app.services.dogrulama_service import (
+    DogrulamaKoduHatasi,
+    issue_verification_code,
+    issue_password_reset_token,
+    parse_password_reset_token,
+    verify_code,
+    cleanup_verification_codes,
+    verification_code_cleanup_loop,
+)
+from app.services.durum_service import (
+    classify_status,
+)
+from app.services.zamanlayici_service import (
+    schedule_deadline,
+    alarm_scheduler_loop,
+    get_scheduler_stats,
+)
+from app.services.tarama_service import (
+    classify_batch,
+    status_sweep_loop,
+    get_sweep_stats,
+)
+from app.services.token_service import (
+    RefreshTokenHatasi,
+    issue_refresh_token,
+    rotate_refresh_token,
+    cleanup_refresh_tokens,
+    refresh_token_cleanup_loop,
+)
 
 __all__ = [
+    "deliver_email",
     "send_email",
     "send_verification_email",
     "send_password_reset_email",
     "send_alarm_notification_email",
+    "update_checkin_stats",
+    "get_checkin_stats",
+    "current_streak",
+    "count_checkins",
+    "backfill_checkin_stats",
+    "recompute_checkin_stats",
+    "enqueue_email",
+    "enqueue_alarm_notifications",
+    "requeue_dead_letter",
+    "cancel_alarm_notifications",
+    "YenidenDenemeHatasi",
+    "count_notified",
+    "outbox_worker_loop",
+    "get_outbox_stats",
+    "record_login",
+    "record_device_activity",
+    "track_device_activity",
+    "flush_activity",
+    "activity_flush_loop",
+    "get_activity_stats",
+    "DogrulamaKoduHatasi",
+    "issue_verification_code",
+    "issue_password_reset_token",
+    "parse_password_reset_token",
+    "verify_code",
+    "cleanup_verification_codes",
+    "verification_code_cleanup_loop",
+    "classify_status",
+    "schedule_deadline",
+    "alarm_scheduler_loop",
+    "get_scheduler_stats",
+    "classify_batch",
+    "status_sweep_loop",
+    "get_sweep_stats",
+    "RefreshTokenHatasi",
+    "issue_refresh_token",
+    "rotate_refresh_token",
+    "cleanup_refresh_tokens",
+    "refresh_token_cleanup_loop",
 ]
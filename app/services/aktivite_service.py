@@ -0,0 +1,210 @@
+"""
+Aktivite servisi - son giriş ve cihaz aktivitesi için write-behind tampon
+
+İstekler yalnızca bellekteki tampona yazar; aynı kullanıcı/cihaz için gelen
+güncellemeler en son zamanda birleştirilir ve periyodik olarak çok satırlı birer
+UPDATE (users) ve upsert (cihazlar) ile veritabanına yazılır. Süreç çökerse en fazla ACTIVITY_FLUSH_INTERVAL_SECONDS
+kadarlık aktivite kaybolur.
+
+`users.last_login_at` Supabase tablosudur ama PostgREST yerine SQLAlchemy ile
+yazılır: çok satırlı UPDATE PostgREST'te tek istekle yapılamaz. Bu, DATABASE_URL'in
+Supabase veritabanına işaret etmesini gerektirir; başlangıçta
+database.verify_identity_store ile doğrulanır.
+"""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import asyncio
+from fastapi import Depends
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.utils.security import get_token_payload
+
+settings = get_settings()
+
+
+# unnest ile tek sorguda çok satır; eski zaman yeni zamanı ezmez
+_GIRIS_SQL = text("""
+UPDATE users AS u
+SET last_login_at = v.zaman
+FROM unnest(CAST(:idler AS uuid[]), CAST(:zamanlar AS timestamp[])) AS v(id, zaman)
+WHERE u.id = v.id AND (u.last_login_at IS NULL OR u.last_login_at < v.zaman)
+""")
+
+# Cihaz satırı ilk aktivitede oluşur; kimlik token'ın `sub`'ıdır (users.id).
+# Silinmiş hesapların kayıtları JOIN ile atlanır, yabancı anahtar partiyi bozmaz.
+_CIHAZ_SQL = text("""
+INSERT INTO cihazlar (id, kullanici_id, cihaz_id, son_aktif, olusturma_tarihi)
+SELECT gen_random_uuid(), v.kullanici_id, v.cihaz_id, v.zaman, v.zaman
+FROM unnest(
+    CAST(:kullanici_idler AS uuid[]), CAST(:cihaz_idler AS varchar[]), CAST(:zamanlar AS timestamp[])
+) AS v(kullanici_id, cihaz_id, zaman)
+JOIN users u ON u.id = v.kullanici_id
+ON CONFLICT (kullanici_id, cihaz_id) DO UPDATE
+SET son_aktif = GREATEST(cihazlar.son_aktif, EXCLUDED.son_aktif)
+""")
+
+
+class AktiviteTamponu:
+    """Kullanıcı ve cihaz başına en son aktivite zamanını tutan tampon (tek event loop'ta kullanılır)"""
+
+    def __init__(self, max_bekleyen: int, max_deneme: int):
+        self.max_bekleyen = max_bekleyen
+        self.max_deneme = max_deneme
+        self.yazilan = 0
+        self.eslesmeyen = 0  # Satır değiştirmeyen kayıtlar (silinmiş hesap ya da daha yeni değer)
+        self.basarisiz = 0
+        self.birakilan = 0
+        self._girisler: dict[UUID, datetime] = {}
+        self._cihazlar: dict[tuple[UUID, str], datetime] = {}
+        # Kayıt başına başarısız flush sayısı - yalnızca geri alınan kayıtlar için tutulur
+        self._denemeler: dict[tuple, int] = {}
+        self._dolu = asyncio.Event()
+
+    @staticmethod
+    def _birlestir(hedef: dict, anahtar, zaman: datetime) -> None:
+        onceki = hedef.get(anahtar)
+        if onceki is None or onceki < zaman:
+            hedef[anahtar] = zaman
+
+    def bekleyen(self) -> int:
+        return len(self._girisler) + len(self._cihazlar)
+
+    def _kontrol(self) -> None:
+        if self.bekleyen() >= self.max_bekleyen:
+            self._dolu.set()
+
+    def giris(self, kullanici_id: UUID, zaman: datetime) -> None:
+        self._birlestir(self._girisler, kullanici_id, zaman)
+        self._kontrol()
+
+    def cihaz(self, kullanici_id: UUID, cihaz_id: str, zaman: datetime) -> None:
+        self._birlestir(self._cihazlar, (kullanici_id, cihaz_id), zaman)
+        self._kontrol()
+
+    async def wait_full(self) -> None:
+        """Bekleyen kayıt sayısı max_bekleyen'e ulaşana kadar bekle"""
+        await self._dolu.wait()
+
+    def al(self) -> tuple[dict, dict, dict]:
+        """Bekleyen kayıtları deneme sayaçlarıyla birlikte devral ve tamponu boşalt"""
+        girisler, cihazlar, denemeler = self._girisler, self._cihazlar, self._denemeler
+        self._girisler, self._cihazlar, self._denemeler = {}, {}, {}
+        self._dolu.clear()
+        return girisler, cihazlar, denemeler
+
+    def geri_al(self, girisler: dict, cihazlar: dict, denemeler: dict) -> list:
+        """
+        Yazılamayan kayıtları bir sonraki denemeye bırak (yeni gelenlerle birleştirerek).
+        
+        max_deneme flush'ta yazılamayan kayıtlar bırakılır; her flush'ı bozan tek bir
+        kayıt tamponu sonsuza dek büyütmez. Bırakılan anahtarları döner.
+        """
+        birakilan = []
+        for tur, hedef, kayitlar in (("giris", self._girisler, girisler), ("cihaz", self._cihazlar, cihazlar)):
+            for anahtar, zaman in kayitlar.items():
+                deneme = denemeler.get((tur, anahtar), 0) + 1
+                if deneme >= self.max_deneme:
+                    birakilan.append((tur, anahtar))
+                    continue
+                self._denemeler[(tur, anahtar)] = deneme
+                self._birlestir(hedef, anahtar, zaman)
+        self.birakilan += len(birakilan)
+        return birakilan
+
+    def stats(self) -> dict:
+        return {
+            "bekleyen_giris": len(self._girisler),
+            "bekleyen_cihaz": len(self._cihazlar),
+            "max_bekleyen": self.max_bekleyen,
+            "yazilan": self.yazilan,
+            "eslesmeyen": self.eslesmeyen,
+            "basarisiz_flush": self.basarisiz,
+            "birakilan": self.birakilan,
+        }
+
+
+aktivite_tamponu = AktiviteTamponu(settings.ACTIVITY_MAX_PENDING, settings.ACTIVITY_MAX_FLUSH_ATTEMPTS)
+
+
+def record_login(kullanici_id: UUID, zaman: Optional[datetime] = None) -> None:
+    """Kullanıcının son giriş zamanını tampona yaz"""
+    aktivite_tamponu.giris(kullanici_id, zaman or datetime.utcnow())
+
+
+def record_device_activity(kullanici_id: UUID, cihaz_id: Optional[str], zaman: Optional[datetime] = None) -> None:
+    """Cihazın son aktif zamanını tampona yaz"""
+    if cihaz_id:
+        aktivite_tamponu.cihaz(kullanici_id, cihaz_id, zaman or datetime.utcnow())
+
+
+async def track_device_activity(payload: dict = Depends(get_token_payload)) -> None:
+    """
+    Router dependency'si - access token'daki cihaz (`cid`) için aktiviteyi kaydeder.
+    Token zaten get_current_user tarafından çözüldüğü için ek maliyeti bir dict yazımıdır.
+    """
+    cihaz_id = payload.get("cid")
+    if cihaz_id:
+        try:
+            kullanici_id = UUID(payload["sub"])
+        except ValueError:
+            return
+        record_device_activity(kullanici_id, cihaz_id)
+
+
+async def flush_activity() -> int:
+    """Bekleyen aktiviteleri çok satırlı UPDATE/upsert'lerle yaz - yazılan satır sayısını döner"""
+    girisler, cihazlar, denemeler = aktivite_tamponu.al()
+    if not girisler and not cihazlar:
+        return 0
+
+    yazilan = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            if girisler:
+                result = await db.execute(_GIRIS_SQL, {
+                    "idler": list(girisler.keys()),
+                    "zamanlar": list(girisler.values()),
+                })
+                yazilan += result.rowcount
+            if cihazlar:
+                result = await db.execute(_CIHAZ_SQL, {
+                    "kullanici_idler": [kullanici_id for kullanici_id, _ in cihazlar],
+                    "cihaz_idler": [cihaz_id for _, cihaz_id in cihazlar],
+                    "zamanlar": list(cihazlar.values()),
+                })
+                yazilan += result.rowcount
+            await db.commit()
+    except Exception:
+        aktivite_tamponu.basarisiz += 1
+        birakilan = aktivite_tamponu.geri_al(girisler, cihazlar, denemeler)
+        if birakilan:
+            print(f"[AKTIVITE] {len(birakilan)} kayıt {aktivite_tamponu.max_deneme} denemede yazılamadı, bırakıldı: {birakilan[:10]}")
+        raise
+
+    aktivite_tamponu.yazilan += yazilan
+    aktivite_tamponu.eslesmeyen += len(girisler) + len(cihazlar) - yazilan
+    return yazilan
+
+
+async def activity_flush_loop() -> None:
+    """Lifespan içinde çalışan periyodik flush görevi (tampon dolarsa erken flush eder)"""
+    while True:
+        try:
+            await asyncio.wait_for(
+                aktivite_tamponu.wait_full(), timeout=settings.ACTIVITY_FLUSH_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await flush_activity()
+        except Exception as e:
+            print(f"[AKTIVITE] Aktivite flush başarısız: {e}")
+            await asyncio.sleep(settings.ACTIVITY_FLUSH_INTERVAL_SECONDS)
+
+
+def get_activity_stats() -> dict:
+    """Aktivite tamponu durumu"""
+    return aktivite_tamponu.stats()
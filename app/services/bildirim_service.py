@@ -0,0 +1,394 @@
+"""
+Bildirim servisi - kalıcı giden kutusu (outbox) ve e-posta teslim worker'ları
+
+E-postalar istek içinde gönderilmez: `giden_kutusu` satırı işi doğuran kayıtla
+(alarm, doğrulama kodu) aynı transaction'da yazılır ve yanıt commit'le birlikte döner.
+Her süreçte OUTBOX_WORKERS worker satırları `FOR UPDATE SKIP LOCKED` ile parti parti
+sahiplenir. Sahiplenme satırın `sonraki_deneme` zamanını OUTBOX_LEASE_SECONDS kadar
+ileri atar ve hemen commit edilir; gönderim sırasında transaction açık kalmaz, çöken
+worker'ın satırları kira bitince başka bir worker'a geçer (teslim en az bir kez).
+
+Gönderimler süreç genelinde en fazla ALARM_FANOUT_CONCURRENCY eşzamanlı ve her biri
+ALARM_SEND_TIMEOUT_SECONDS ile sınırlıdır. Başarısız gönderim üstel geri çekilmeyle
+tekrar denenir; OUTBOX_MAX_ATTEMPTS denemeden sonra ya da alıcının kalıcı olarak
+reddedildiği durumda satır VAZGECILDI olarak kalır (dead letter). Gönderilen satırlar
+silinir. Yeni satırlar NOTIFY ile worker'ları uyandırır; kaçan bildirimleri yoklama yakalar.
+
+Doğrulama kodu ve sıfırlama token'ı `veri` içinde düz metin durur; bu satırlar kodun
+geçerlilik süresi kadar yaşar (`son_gecerlilik`), süresi geçince gönderilmeden
+vazgeçilir ve vazgeçilen satırlardan gizli alanlar silinir.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+from uuid import UUID
+import asyncio
+import random
+import time
+import aiosmtplib
+import asyncpg
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, get_direct_dsn, has_direct_connection
+from app.models import Alarm, AlarmDurum, DogrulamaTipi, GidenDurum, GidenKutusu, GidenTipi
+from app.services.dogrulama_service import code_validity
+from app.services.email_service import (
+    deliver_email, render_alarm_email, render_password_reset_email, render_verification_email
+)
+
+settings = get_settings()
+
+# Alıcı başına gönderim sonucu
+BEKLIYOR = "bekliyor"
+GONDERILDI = "gonderildi"
+BASARISIZ = "basarisiz"
+ZAMAN_ASIMI = "zaman_asimi"
+ADRES_YOK = "adres_yok"
+
+_ICERIK = {
+    GidenTipi.ALARM: lambda v: render_alarm_email(v["ad"], v["kullanici_adi"], v["mesaj"]),
+    GidenTipi.DOGRULAMA: lambda v: render_verification_email(v["ad"], v["kod"]),
+    GidenTipi.SIFRE_SIFIRLAMA: lambda v: render_password_reset_email(v["ad"], v["token"]),
+}
+
+# Gizli alan taşıyan tipler: (kodun doğrulama tipi, vazgeçilince silinecek alanlar)
+_GIZLI_TIPLER = {
+    GidenTipi.DOGRULAMA: (DogrulamaTipi.EMAIL, ("kod",)),
+    GidenTipi.SIFRE_SIFIRLAMA: (DogrulamaTipi.SIFRE_SIFIRLAMA, ("token",)),
+}
+
+# Kısmi indeksin koşuluyla birebir aynı ve sabit; parametre olsaydı prepared
+# statement'ın generic planı ix_giden_kutusu_bekleyen'i kullanamazdı
+_BEKLIYOR_KOSULU = text("giden_kutusu.durum = 'BEKLIYOR'")
+
+
+async def _uyandir(db: AsyncSession) -> None:
+    # pg_notify transaction'a bağlıdır: worker'lar satır commit edilince uyanır
+    if settings.OUTBOX_NOTIFY_CHANNEL:
+        await db.execute(text("SELECT pg_notify(:kanal, '')"), {"kanal": settings.OUTBOX_NOTIFY_CHANNEL})
+
+
+class YenidenDenemeHatasi(Exception):
+    """Vazgeçilmiş satır kuyruğa geri alınamaz - kod ve mesaj API yanıtına aynen yansır"""
+
+    def __init__(self, kod: str, mesaj: str):
+        super().__init__(mesaj)
+        self.kod = kod
+        self.mesaj = mesaj
+
+
+async def enqueue_email(db: AsyncSession, tip: GidenTipi, alici: str, veri: dict) -> None:
+    """
+    E-postayı giden kutusuna yaz - çağıranın transaction'ı ile birlikte commit edilir.
+    Kod taşıyan e-postalar kodun geçerlilik süresi kadar gönderilebilir.
+    """
+    simdi = datetime.utcnow()
+    son_gecerlilik = simdi + code_validity(_GIZLI_TIPLER[tip][0]) if tip in _GIZLI_TIPLER else None
+    db.add(GidenKutusu(tip=tip, alici=alici, veri=veri, sonraki_deneme=simdi, son_gecerlilik=son_gecerlilik))
+    await _uyandir(db)
+
+
+async def enqueue_alarm_notifications(
+    db: AsyncSession, alarm_id: UUID, kisiler: Sequence[tuple[str, Optional[str]]], kullanici_adi: str, mesaj: str
+) -> list[dict]:
+    """
+    (ad, email) listesindeki kişiler için alarm e-postalarını giden kutusuna yaz -
+    alarmın `bilgilendirilenler` alanının ilk hali döner; worker'lar sonuçları buraya işler.
+    Alarm satırı aynı transaction'da daha önce yazılmış (flush edilmiş) olmalıdır.
+    """
+    simdi = datetime.utcnow()
+    bilgilendirilenler = []
+    for sira, (ad, email) in enumerate(kisiler):
+        bilgilendirilenler.append({"ad": ad, "bildirim_tipi": "email", "durum": BEKLIYOR if email else ADRES_YOK})
+        if email:
+            db.add(GidenKutusu(
+                tip=GidenTipi.ALARM, alici=email, alarm_id=alarm_id, sonraki_deneme=simdi,
+                veri={"ad": ad, "kullanici_adi": kullanici_adi, "mesaj": mesaj, "sira": sira},
+            ))
+    if any(b["durum"] == BEKLIYOR for b in bilgilendirilenler):
+        await _uyandir(db)
+    return bilgilendirilenler
+
+
+async def cancel_alarm_notifications(db: AsyncSession, alarm_id: UUID) -> None:
+    """
+    İptal edilen alarmın gönderilmemiş e-postalarından vazgeç - çağıranın transaction'ı ile
+    birlikte commit edilir. O an bir worker'da gönderilmekte olanlar `_tamamla`'da ele alınır.
+    """
+    await db.execute(
+        update(GidenKutusu)
+        .where(GidenKutusu.alarm_id == alarm_id, _BEKLIYOR_KOSULU)
+        .values(durum=GidenDurum.VAZGECILDI, son_hata="Alarm iptal edildi")
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _gizli_alanlari_sil(tip: GidenTipi, veri: dict) -> dict:
+    """Vazgeçilen satırda saklanmaması gereken kod/token alanlarını çıkar"""
+    if tip not in _GIZLI_TIPLER:
+        return veri
+    gizli = _GIZLI_TIPLER[tip][1]
+    return {k: v for k, v in veri.items() if k not in gizli}
+
+
+async def requeue_dead_letter(db: AsyncSession, giden_id: UUID) -> bool:
+    """
+    Vazgeçilmiş satırı deneme sayacı sıfırlanmış olarak kuyruğa geri al - satır yoksa False.
+    
+    Doğrulama ve şifre sıfırlama e-postaları geri alınamaz: kodun süresi dolmuştur ya da
+    kod vazgeçilirken silinmiştir; kullanıcının yeni kod istemesi gerekir.
+    İptal edilmiş alarmların e-postaları da geri alınmaz.
+    """
+    result = await db.execute(
+        select(GidenKutusu.tip, GidenKutusu.son_gecerlilik, Alarm.durum.label("alarm_durum"))
+        .outerjoin(Alarm, Alarm.id == GidenKutusu.alarm_id)
+        .where(GidenKutusu.id == giden_id, GidenKutusu.durum == GidenDurum.VAZGECILDI)
+        .with_for_update(of=GidenKutusu)
+    )
+    satir = result.one_or_none()
+    if satir is None:
+        return False
+    if satir.alarm_durum == AlarmDurum.IPTAL_EDILDI:
+        raise YenidenDenemeHatasi("ALARM_IPTAL_EDILDI", "Alarm iptal edilmiş; e-postası yeniden gönderilmez.")
+    if satir.tip in _GIZLI_TIPLER:
+        if satir.son_gecerlilik is None or satir.son_gecerlilik <= datetime.utcnow():
+            raise YenidenDenemeHatasi("KOD_SURESI_DOLDU", "Kodun geçerlilik süresi dolmuş; kullanıcı yeni kod istemeli.")
+        raise YenidenDenemeHatasi("KOD_SILINDI", "Kod vazgeçilirken silindi; kullanıcı yeni kod istemeli.")
+    
+    await db.execute(
+        update(GidenKutusu)
+        .where(GidenKutusu.id == giden_id)
+        .values(durum=GidenDurum.BEKLIYOR, deneme=0, sonraki_deneme=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await _uyandir(db)
+    return True
+
+
+def count_notified(bilgilendirilenler: Optional[list]) -> int:
+    """Başarıyla bilgilendirilen kişi sayısı (durum alanı olmayan eski kayıtlar başarılı sayılır)"""
+    return sum(1 for b in bilgilendirilenler or [] if b.get("durum", GONDERILDI) == GONDERILDI)
+
+
+def _kalici_hata(hata: Exception) -> bool:
+    """Tekrar denemenin sonucu değiştirmeyeceği hatalar (alıcı ya da içerik reddedildi)"""
+    if isinstance(hata, (aiosmtplib.SMTPRecipientsRefused, aiosmtplib.SMTPRecipientRefused)):
+        return True
+    return isinstance(hata, aiosmtplib.SMTPDataError) and hata.code >= 500
+
+
+def _geri_cekilme(deneme: int) -> float:
+    """deneme. başarısızlıktan sonraki bekleme - üstel, üst sınırlı, yarı rastgele"""
+    gecikme = min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (deneme - 1), settings.OUTBOX_RETRY_MAX_SECONDS)
+    return random.uniform(gecikme / 2, gecikme)
+
+
+class GidenKutusuIsleyici:
+    """Giden kutusu worker'ları ve ortak sayaçları (tek event loop'ta kullanılır)"""
+
+    def __init__(self):
+        self._gonderim_siniri = asyncio.Semaphore(settings.ALARM_FANOUT_CONCURRENCY)
+        self._olay = asyncio.Event()
+        self.sahiplenilen = 0
+        self.gonderilen = 0
+        self.tekrar_denenecek = 0
+        self.vazgecilen = 0
+        self.son_parti_ms = 0.0
+
+    async def _sahiplen(self) -> list:
+        """Zamanı gelmiş satırlardan bir parti al; başka worker'ların kilitlediklerini atla"""
+        simdi = datetime.utcnow()
+        secilen = (
+            select(GidenKutusu.id)
+            .where(_BEKLIYOR_KOSULU, GidenKutusu.sonraki_deneme <= simdi)
+            .order_by(GidenKutusu.sonraki_deneme)
+            .limit(settings.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(GidenKutusu)
+                .where(GidenKutusu.id.in_(secilen.scalar_subquery()))
+                .values(
+                    deneme=GidenKutusu.deneme + 1,
+                    sonraki_deneme=simdi + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+                )
+                .returning(
+                    GidenKutusu.id, GidenKutusu.tip, GidenKutusu.alici, GidenKutusu.veri,
+                    GidenKutusu.deneme, GidenKutusu.alarm_id, GidenKutusu.son_gecerlilik,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            satirlar = result.all()
+            await db.commit()
+        self.sahiplenilen += len(satirlar)
+        return satirlar
+
+    async def _gonder(self, satir) -> dict:
+        """Tek satırı gönder - sonuç, hata ve hatanın kalıcı olup olmadığı döner"""
+        if satir.son_gecerlilik is not None and satir.son_gecerlilik <= datetime.utcnow():
+            # Süresi geçmiş kod gönderilmez; kalıcı hata olarak vazgeçilir (gizli alanlar silinir)
+            return {"durum": BASARISIZ, "hata": "Kodun geçerlilik süresi doldu", "kalici": True, "sure_ms": 0}
+        async with self._gonderim_siniri:
+            baslangic = time.perf_counter()
+            sonuc = {"durum": GONDERILDI, "hata": None, "kalici": False}
+            try:
+                await asyncio.wait_for(
+                    deliver_email(satir.alici, *_ICERIK[satir.tip](satir.veri)),
+                    timeout=settings.ALARM_SEND_TIMEOUT_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                sonuc.update(durum=ZAMAN_ASIMI, hata="Gönderim zaman aşımına uğradı")
+            except Exception as e:
+                sonuc.update(durum=BASARISIZ, hata=f"{type(e).__name__}: {e}"[:1000], kalici=_kalici_hata(e))
+            sonuc["sure_ms"] = round((time.perf_counter() - baslangic) * 1000)
+        return sonuc
+
+    async def _tamamla(self, satirlar: list, sonuclar: list[dict]) -> None:
+        """Sonuçları tek transaction'da yaz: gönderilenleri sil, kalanları ertele ya da vazgeç"""
+        simdi = datetime.utcnow()
+        gonderilen: list[UUID] = []
+        guncellenen: list[dict] = []
+        alarm_sonuclari: dict[UUID, list[tuple[int, dict]]] = {}
+        for satir, sonuc in zip(satirlar, sonuclar):
+            bitti = sonuc["durum"] == GONDERILDI
+            if bitti:
+                gonderilen.append(satir.id)
+            elif sonuc["kalici"] or satir.deneme >= settings.OUTBOX_MAX_ATTEMPTS:
+                bitti = True
+                self.vazgecilen += 1
+                guncellenen.append({
+                    "id": satir.id, "durum": GidenDurum.VAZGECILDI, "son_hata": sonuc["hata"],
+                    "veri": _gizli_alanlari_sil(satir.tip, satir.veri),
+                })
+                print(f"[GIDEN] Vazgeçildi ({satir.deneme}. deneme): {satir.alici} - {sonuc['hata']}")
+            else:
+                self.tekrar_denenecek += 1
+                guncellenen.append({
+                    "id": satir.id, "durum": GidenDurum.BEKLIYOR, "son_hata": sonuc["hata"],
+                    "sonraki_deneme": simdi + timedelta(seconds=_geri_cekilme(satir.deneme)),
+                })
+            if bitti and satir.alarm_id is not None:
+                alarm_sonuclari.setdefault(satir.alarm_id, []).append((satir.veri["sira"], sonuc))
+
+        async with AsyncSessionLocal() as db:
+            if gonderilen:
+                await db.execute(delete(GidenKutusu).where(GidenKutusu.id.in_(gonderilen)))
+            if guncellenen:
+                await db.execute(update(GidenKutusu), guncellenen)
+            tekrar_alarmlari = {
+                satir.alarm_id for satir, g in zip(satirlar, sonuclar)
+                if satir.alarm_id is not None and g["durum"] != GONDERILDI
+            }
+            if tekrar_alarmlari:
+                # Gönderim sırasında iptal edilen alarmların satırları kuyruğa geri dönmesin
+                await db.execute(
+                    update(GidenKutusu)
+                    .where(
+                        GidenKutusu.alarm_id.in_(
+                            select(Alarm.id).where(Alarm.id.in_(tekrar_alarmlari), Alarm.durum == AlarmDurum.IPTAL_EDILDI)
+                        ),
+                        _BEKLIYOR_KOSULU,
+                    )
+                    .values(durum=GidenDurum.VAZGECILDI, son_hata="Alarm iptal edildi")
+                    .execution_options(synchronize_session=False)
+                )
+            if alarm_sonuclari:
+                # Aynı alarmın alıcıları farklı worker'larda bitebilir; id sırasıyla kilitle (deadlock olmaz)
+                result = await db.execute(
+                    select(Alarm).where(Alarm.id.in_(list(alarm_sonuclari))).order_by(Alarm.id).with_for_update()
+                )
+                for alarm in result.scalars():
+                    bilgilendirilenler = list(alarm.bilgilendirilenler or [])
+                    for sira, sonuc in alarm_sonuclari[alarm.id]:
+                        if sira < len(bilgilendirilenler):
+                            bilgilendirilenler[sira] = {
+                                **bilgilendirilenler[sira], "durum": sonuc["durum"], "sure_ms": sonuc["sure_ms"]
+                            }
+                    alarm.bilgilendirilenler = bilgilendirilenler
+            await db.commit()
+        self.gonderilen += len(gonderilen)
+
+    async def process_batch(self) -> int:
+        """Bir parti sahiplen, gönder ve sonuçları yaz - sahiplenilen satır sayısı döner"""
+        satirlar = await self._sahiplen()
+        if not satirlar:
+            return 0
+        baslangic = time.perf_counter()
+        sonuclar = await asyncio.gather(*(self._gonder(satir) for satir in satirlar))
+        await self._tamamla(satirlar, sonuclar)
+        self.son_parti_ms = (time.perf_counter() - baslangic) * 1000
+        return len(satirlar)
+
+    async def calis(self) -> None:
+        """Tek worker döngüsü - parti doluysa hemen devam eder, değilse NOTIFY ya da yoklama bekler"""
+        while True:
+            self._olay.clear()
+            try:
+                if await self.process_batch() >= settings.OUTBOX_BATCH_SIZE:
+                    continue
+            except Exception as e:
+                print(f"[GIDEN] Parti işlenemedi: {e}")
+            try:
+                await asyncio.wait_for(self._olay.wait(), timeout=settings.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dinle(self) -> None:
+        """Yeni satır bildirimlerini LISTEN ile al ve worker'ları uyandır"""
+        kanal = settings.OUTBOX_NOTIFY_CHANNEL
+        if not kanal:
+            return
+        if not has_direct_connection():
+            print("[GIDEN] DIRECT_DATABASE_URL yok (PgBouncer) - dinleyici kapalı, OUTBOX_POLL_SECONDS ile yoklanır")
+            return
+        dsn = get_direct_dsn()
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                await conn.add_listener(kanal, lambda *_: self._olay.set())
+                # Bağlantı yokken kaçırılan bildirimler için bir kez uyandır
+                self._olay.set()
+                while not conn.is_closed():
+                    await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                if conn is not None:
+                    conn.terminate()
+                raise
+            except Exception as e:
+                print(f"[GIDEN] Giden kutusu dinleyicisi bağlanamadı: {e}")
+            if conn is not None and not conn.is_closed():
+                conn.terminate()
+            await asyncio.sleep(5)
+
+    def stats(self) -> dict:
+        return {
+            "worker": settings.OUTBOX_WORKERS,
+            "sahiplenilen": self.sahiplenilen,
+            "gonderilen": self.gonderilen,
+            "tekrar_denenecek": self.tekrar_denenecek,
+            "vazgecilen": self.vazgecilen,
+            "son_parti_ms": round(self.son_parti_ms, 3),
+        }
+
+
+giden_kutusu = GidenKutusuIsleyici()
+
+
+async def outbox_worker_loop() -> None:
+    """Lifespan içinde çalışan görev - NOTIFY dinleyicisi ve OUTBOX_WORKERS teslim worker'ı"""
+    gorevler = [asyncio.create_task(giden_kutusu.dinle())]
+    gorevler += [asyncio.create_task(giden_kutusu.calis()) for _ in range(settings.OUTBOX_WORKERS)]
+    try:
+        await asyncio.gather(*gorevler)
+    finally:
+        for gorev in gorevler:
+            gorev.cancel()
+        await asyncio.gather(*gorevler, return_exceptions=True)
+
+
+def get_outbox_stats() -> dict:
+    """Giden kutusu worker sayaçları"""
+    return giden_kutusu.stats()
@@ -0,0 +1,174 @@
+"""
+Doğrulama kodu servisi - e-posta doğrulama ve şifre sıfırlama kodlarının
+üretimi, sabit zamanlı doğrulaması, deneme sayacı ve süresi dolanların temizliği
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import asyncio
+import hashlib
+import hmac
+import secrets
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import DogrulamaKodu, DogrulamaTipi, GidenDurum, GidenKutusu, GidenTipi, Hesap
+from app.utils.security import generate_otp
+
+settings = get_settings()
+
+# Temizlikte tek seferde silinecek satır sayısı (kilitleri kısa tutmak için)
+TEMIZLIK_PARCA_BOYUTU = 5000
+
+# Kodu taşıyan e-postanın giden kutusu tipi
+_GIDEN_TIPLERI = {
+    DogrulamaTipi.EMAIL: GidenTipi.DOGRULAMA,
+    DogrulamaTipi.SIFRE_SIFIRLAMA: GidenTipi.SIFRE_SIFIRLAMA,
+}
+
+
+class DogrulamaKoduHatasi(Exception):
+    """Kod doğrulanamadı - kod ve mesaj API yanıtına aynen yansır"""
+
+    def __init__(self, kod: str, mesaj: str):
+        super().__init__(mesaj)
+        self.kod = kod
+        self.mesaj = mesaj
+
+
+def _ozet(kod: str) -> str:
+    # Kodlar veritabanında düz metin tutulmaz
+    return hashlib.sha256(kod.encode()).hexdigest()
+
+
+def code_validity(tip: DogrulamaTipi) -> timedelta:
+    """Kodun geçerlilik süresi - e-postası da bu süreden sonra gönderilmez"""
+    if tip == DogrulamaTipi.SIFRE_SIFIRLAMA:
+        return timedelta(minutes=settings.PASSWORD_RESET_CODE_TTL_MINUTES)
+    return timedelta(minutes=settings.VERIFICATION_CODE_TTL_MINUTES)
+
+
+async def issue_verification_code(
+    db: AsyncSession, kullanici_id: UUID, tip: DogrulamaTipi, kod: Optional[str] = None
+) -> str:
+    """
+    Yeni kod üret ve kaydet - düz kodu döner (e-postayla gönderilmek üzere).
+
+    Aynı tipteki kullanılmamış eski kodlar silinir; kullanıcı başına tip başına
+    en fazla bir aktif kod bulunur, böylece doğrulama tek satıra bakar. Eski kodları
+    taşıyan ve henüz gönderilmemiş e-postalar da giden kutusundan silinir.
+    """
+    kod = kod or generate_otp()
+    await db.execute(
+        delete(DogrulamaKodu).where(
+            DogrulamaKodu.kullanici_id == kullanici_id,
+            DogrulamaKodu.tip == tip,
+            DogrulamaKodu.kullanildi == False,
+        )
+    )
+    if tip in _GIDEN_TIPLERI:
+        await db.execute(
+            delete(GidenKutusu)
+            .where(
+                GidenKutusu.tip == _GIDEN_TIPLERI[tip],
+                GidenKutusu.durum == GidenDurum.BEKLIYOR,
+                GidenKutusu.alici == select(Hesap.email).where(Hesap.id == kullanici_id).scalar_subquery(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    db.add(DogrulamaKodu(
+        kullanici_id=kullanici_id,
+        kod=_ozet(kod),
+        tip=tip,
+        gecerlilik=datetime.utcnow() + code_validity(tip),
+    ))
+    await db.flush()
+    return kod
+
+
+def issue_password_reset_token(kullanici_id: UUID) -> str:
+    """Şifre sıfırlama linki için token - kullanıcı ID'si ve rastgele gizli kısım"""
+    return f"{kullanici_id}.{secrets.token_urlsafe(32)}"
+
+
+def parse_password_reset_token(token: str) -> Optional[tuple[UUID, str]]:
+    """Token'ı (kullanici_id, gizli kısım) olarak ayır, biçim hatalıysa None"""
+    kullanici_kismi, _, gizli = token.partition(".")
+    if not gizli:
+        return None
+    try:
+        return UUID(kullanici_kismi), gizli
+    except ValueError:
+        return None
+
+
+async def verify_code(db: AsyncSession, kullanici_id: UUID, tip: DogrulamaTipi, kod: str) -> None:
+    """
+    Kodu doğrula ve kullanıldı olarak işaretle.
+
+    Karşılaştırma sabit zamanlıdır. Hatalı denemeler istek hata ile bitse de
+    kalıcı olsun diye hemen commit edilir; VERIFICATION_MAX_ATTEMPTS aşılınca kod
+    geçersiz kılınır ve yeni kod istenmesi gerekir.
+    """
+    simdi = datetime.utcnow()
+    result = await db.execute(
+        select(DogrulamaKodu)
+        .where(
+            DogrulamaKodu.kullanici_id == kullanici_id,
+            DogrulamaKodu.tip == tip,
+            DogrulamaKodu.kullanildi == False,
+        )
+        .order_by(DogrulamaKodu.olusturma_tarihi.desc())
+        .limit(1)
+        .with_for_update()
+    )
+    kayit = result.scalars().first()
+
+    if kayit is None or kayit.gecerlilik <= simdi:
+        raise DogrulamaKoduHatasi("INVALID_CODE", "Kod geçersiz veya süresi dolmuş.")
+
+    if not hmac.compare_digest(_ozet(kod), kayit.kod):
+        kayit.deneme = (kayit.deneme or 0) + 1
+        kalan = settings.VERIFICATION_MAX_ATTEMPTS - kayit.deneme
+        if kalan <= 0:
+            kayit.kullanildi = True
+        await db.commit()
+        if kalan <= 0:
+            raise DogrulamaKoduHatasi(
+                "TOO_MANY_ATTEMPTS", "Çok fazla hatalı deneme. Lütfen yeni bir kod isteyin."
+            )
+        raise DogrulamaKoduHatasi("INVALID_CODE", "Kod geçersiz veya süresi dolmuş.")
+
+    kayit.kullanildi = True
+
+
+async def cleanup_verification_codes(db: AsyncSession) -> int:
+    """
+    Süresi dolmuş kodları gecerlilik indeksi üzerinden parça parça sil
+    (kullanılmış kodlar da süreleri dolunca silinir)
+    """
+    kosul = DogrulamaKodu.gecerlilik < datetime.utcnow()
+
+    toplam = 0
+    while True:
+        parca = select(DogrulamaKodu.id).where(kosul).limit(TEMIZLIK_PARCA_BOYUTU).scalar_subquery()
+        result = await db.execute(delete(DogrulamaKodu).where(DogrulamaKodu.id.in_(parca)))
+        await db.commit()
+        toplam += result.rowcount
+        if result.rowcount < TEMIZLIK_PARCA_BOYUTU:
+            return toplam
+
+
+async def verification_code_cleanup_loop() -> None:
+    """Lifespan içinde çalışan periyodik temizlik görevi"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                silinen = await cleanup_verification_codes(db)
+            if silinen:
+                print(f"[DOGRULAMA] {silinen} eski doğrulama kodu silindi")
+        except Exception as e:
+            print(f"[DOGRULAMA] Doğrulama kodu temizliği başarısız: {e}")
+        await asyncio.sleep(settings.VERIFICATION_CLEANUP_INTERVAL_MINUTES * 60)
@@ -0,0 +1,41 @@
+"""
+Check-in durum servisi - guvenli/uyari/kritik/alarm sınıflandırması
+
+Eşikler (REMINDER_THRESHOLD, WARNING_THRESHOLD, ALARM_THRESHOLD) son check-in'den
+geçen saat olarak DEFAULT_CHECKIN_INTERVAL için tanımlıdır. Farklı check-in süresi
+veya ertelenmiş kullanıcılar için aynı eşikler beklenen check-in zamanına göre kaydırılır.
+"""
+from datetime import datetime
+from typing import Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+DURUMLAR = ("guvenli", "uyari", "kritik", "alarm")
+GUVENLI, UYARI, KRITIK, ALARM = range(4)
+
+
+def asama_ofsetleri() -> tuple[int, int, int]:
+    """Uyarı, kritik ve alarm aşamalarının beklenen check-in zamanına göre saniye cinsinden ofsetleri"""
+    return tuple(
+        (esik - settings.DEFAULT_CHECKIN_INTERVAL) * 3600
+        for esik in (settings.REMINDER_THRESHOLD, settings.WARNING_THRESHOLD, settings.ALARM_THRESHOLD)
+    )
+
+
+def asama(gecikme_sn: float) -> int:
+    """Beklenen zamandan bu yana geçen saniyeye (negatifse henüz gelmemiş) göre aşama"""
+    sonuc = GUVENLI
+    for ofset in asama_ofsetleri():
+        if gecikme_sn >= ofset:
+            sonuc += 1
+    return sonuc
+
+
+def classify_status(sonraki_beklenen: Optional[datetime], simdi: Optional[datetime] = None) -> str:
+    """Beklenen check-in zamanına göre durum - hiç check-in yoksa alarm"""
+    if sonraki_beklenen is None:
+        return DURUMLAR[ALARM]
+    simdi = simdi or datetime.utcnow()
+    return DURUMLAR[asama((simdi - sonraki_beklenen).total_seconds())]
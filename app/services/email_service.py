@@ -1,8 +1,16 @@
 """
 E-posta servisi
+
+Gönderimler lifespan içinde açılan SMTP bağlantı havuzundan yapılır: SMTP_POOL_SIZE
+bağlantı TCP, EHLO, STARTTLS ve AUTH aşamalarını bir kez yapar ve açık tutulur, her
+mesaj yalnızca MAIL/RCPT/DATA maliyeti öder. Kopan bağlantılar bir sonraki gönderimde
+yeniden kurulur. Havuz yoksa (ör. betiklerde) her mesaj için yeni bağlantı açılır.
 """
 from typing import Optional
+import asyncio
+import time
 import aiosmtplib
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -11,6 +19,193 @@ from app.config import get_settings
 settings = get_settings()
 
 
+class SMTPHavuzu:
+    """Kimliği doğrulanmış, açık tutulan SMTP bağlantıları (tek event loop'ta kullanılır)"""
+
+    def __init__(self, boyut: int, bosta_kontrol_sn: float = 60.0, **baglanti_ayarlari):
+        self.boyut = boyut
+        self.bosta_kontrol_sn = bosta_kontrol_sn
+        self._ayarlar = baglanti_ayarlari
+        # LIFO: en son kullanılan (en sıcak) bağlantı önce verilir, fazlası boşta soğur
+        self._bos: asyncio.LifoQueue = asyncio.LifoQueue()
+        for _ in range(boyut):
+            self._bos.put_nowait((None, 0.0))
+        self.gonderilen = 0
+        self.baglanti = 0
+        self.yeniden_deneme = 0
+        self.hata = 0
+
+    async def _baglan(self) -> aiosmtplib.SMTP:
+        istemci = aiosmtplib.SMTP(**self._ayarlar)
+        await istemci.connect()  # STARTTLS ve (kullanıcı adı varsa) AUTH dahil
+        self.baglanti += 1
+        return istemci
+
+    @staticmethod
+    def _kapat(istemci: Optional[aiosmtplib.SMTP]) -> None:
+        if istemci is not None:
+            istemci.close()
+
+    async def _hazirla(self, istemci: Optional[aiosmtplib.SMTP], son_kullanim: float) -> aiosmtplib.SMTP:
+        """Boşta kalmış bağlantıyı NOOP ile yokla; kopmuşsa yenisini aç"""
+        if istemci is not None and istemci.is_connected:
+            if time.monotonic() - son_kullanim < self.bosta_kontrol_sn:
+                return istemci
+            try:
+                await istemci.noop()
+                return istemci
+            except aiosmtplib.SMTPException:
+                pass
+        self._kapat(istemci)
+        return await self._baglan()
+
+    async def warm(self) -> None:
+        """Havuzdaki bağlantıları önceden aç (ilk alarmın bağlantı maliyetini öde)"""
+        hazir = [self._bos.get_nowait() for _ in range(self._bos.qsize())]
+        sonuclar = await asyncio.gather(*(self._baglan() for _ in hazir), return_exceptions=True)
+        for sonuc in sonuclar:
+            istemci = None if isinstance(sonuc, BaseException) else sonuc
+            self._bos.put_nowait((istemci, time.monotonic()))
+        hatalar = [s for s in sonuclar if isinstance(s, BaseException)]
+        if hatalar:
+            raise hatalar[0]
+
+    async def send(self, message: Message) -> None:
+        """
+        Mesajı havuzdaki bir bağlantıdan gönder. Bağlantı hatasında bir kez yeni
+        bağlantıyla tekrar denenir; sunucunun reddettiği mesajlar tekrar denenmez.
+        """
+        istemci, son_kullanim = await self._bos.get()
+        temiz = False
+        try:
+            for deneme in range(2):
+                try:
+                    istemci = await self._hazirla(istemci, son_kullanim)
+                    await istemci.send_message(message)
+                    self.gonderilen += 1
+                    temiz = True
+                    return
+                except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                    # Sunucu yanıt verdi; bağlantı kullanılabilir durumda
+                    temiz = True
+                    self.hata += 1
+                    raise
+                except (aiosmtplib.SMTPException, OSError):
+                    self._kapat(istemci)
+                    istemci = None
+                    if deneme:
+                        self.hata += 1
+                        raise
+                    self.yeniden_deneme += 1
+        finally:
+            if not temiz:
+                # İptal/zaman aşımı yarım kalmış bir SMTP diyaloğu bırakabilir; bağlantı kullanılmaz
+                self._kapat(istemci)
+                istemci = None
+            self._bos.put_nowait((istemci, time.monotonic()))
+
+    async def close(self) -> None:
+        """Boştaki bağlantıları QUIT ile kapat"""
+        while not self._bos.empty():
+            istemci, _ = self._bos.get_nowait()
+            if istemci is not None and istemci.is_connected:
+                try:
+                    await asyncio.wait_for(istemci.quit(), timeout=5)
+                except Exception:
+                    self._kapat(istemci)
+
+    def stats(self) -> dict:
+        return {
+            "boyut": self.boyut,
+            "bosta": self._bos.qsize(),
+            "gonderilen": self.gonderilen,
+            "baglanti": self.baglanti,
+            "yeniden_deneme": self.yeniden_deneme,
+            "hata": self.hata,
+        }
+
+
+smtp_havuzu: Optional[SMTPHavuzu] = None
+
+
+async def init_smtp_pool() -> Optional[SMTPHavuzu]:
+    """Lifespan başlangıcında SMTP havuzunu kur ve ısıt (SMTP yapılandırılmamışsa kurulmaz)"""
+    global smtp_havuzu
+    if not settings.SMTP_USER or not settings.SMTP_PASSWORD or settings.SMTP_POOL_SIZE <= 0:
+        return None
+    smtp_havuzu = SMTPHavuzu(
+        settings.SMTP_POOL_SIZE,
+        bosta_kontrol_sn=settings.SMTP_POOL_IDLE_CHECK_SECONDS,
+        hostname=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        username=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        start_tls=True,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+    )
+    try:
+        await smtp_havuzu.warm()
+    except Exception as e:
+        # Açılamayan bağlantılar ilk gönderimde tekrar denenir
+        print(f"⚠️ SMTP havuzu ısıtılamadı: {e}")
+    return smtp_havuzu
+
+
+async def close_smtp_pool() -> None:
+    global smtp_havuzu
+    if smtp_havuzu is not None:
+        await smtp_havuzu.close()
+        smtp_havuzu = None
+
+
+def get_smtp_pool_stats() -> dict:
+    """SMTP havuzu durumu"""
+    if smtp_havuzu is None:
+        return {"aktif": False}
+    return {"aktif": True, **smtp_havuzu.stats()}
+
+
+class SMTPYapilandirilmamis(Exception):
+    """SMTP_USER / SMTP_PASSWORD tanımlı değil"""
+
+
+async def deliver_email(
+    to_email: str,
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None
+) -> None:
+    """
+    E-posta gönder - başarısızlıkta istisna fırlatır (giden kutusu worker'ı
+    hatanın türüne göre tekrar dener ya da vazgeçer)
+    """
+    if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
+        raise SMTPYapilandirilmamis("SMTP yapılandırılmamış")
+    
+    message = MIMEMultipart("alternative")
+    message["From"] = settings.EMAIL_FROM
+    message["To"] = to_email
+    message["Subject"] = subject
+    
+    if text_content:
+        message.attach(MIMEText(text_content, "plain", "utf-8"))
+    
+    message.attach(MIMEText(html_content, "html", "utf-8"))
+    
+    if smtp_havuzu is not None:
+        await smtp_havuzu.send(message)
+    else:
+        await aiosmtplib.send(
+            message,
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USER,
+            password=settings.SMTP_PASSWORD,
+            start_tls=True,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+        )
+
+
 async def send_email(
     to_email: str,
     subject: str,
@@ -29,40 +224,22 @@ async def send_email(
     Returns:
         Başarılı ise True
     """
-    if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
-        print(f"[EMAIL] SMTP yapılandırılmamış. E-posta gönderilemiyor: {to_email}")
-        return False
-    
     try:
-        message = MIMEMultipart("alternative")
-        message["From"] = settings.EMAIL_FROM
-        message["To"] = to_email
-        message["Subject"] = subject
-        
-        if text_content:
-            message.attach(MIMEText(text_content, "plain", "utf-8"))
-        
-        message.attach(MIMEText(html_content, "html", "utf-8"))
-        
-        await aiosmtplib.send(
-            message,
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            username=settings.SMTP_USER,
-            password=settings.SMTP_PASSWORD,
-            start_tls=True,
-        )
-        
+        await deliver_email(to_email, subject, html_content, text_content)
         print(f"[EMAIL] E-posta gönderildi: {to_email}")
         return True
     
+    except SMTPYapilandirilmamis:
+        print(f"[EMAIL] SMTP yapılandırılmamış. E-posta gönderilemiyor: {to_email}")
+        return False
+    
     except Exception as e:
         print(f"[EMAIL] E-posta gönderme hatası: {e}")
         return False
 
 
-async def send_verification_email(email: str, ad: str, kod: str) -> bool:
-    """E-posta doğrulama kodu gönder"""
+def render_verification_email(ad: str, kod: str) -> tuple[str, str]:
+    """E-posta doğrulama kodu - (konu, HTML içerik)"""
     subject = "Öldün mü? - E-posta Doğrulama"
     
     html_content = f"""
@@ -100,11 +277,16 @@ async def send_verification_email(email: str, ad: str, kod: str) -> bool:
     </html>
     """
     
-    return await send_email(email, subject, html_content)
+    return subject, html_content
 
 
-async def send_password_reset_email(email: str, ad: str, token: str) -> bool:
-    """Şifre sıfırlama e-postası gönder"""
+async def send_verification_email(email: str, ad: str, kod: str) -> bool:
+    """E-posta doğrulama kodu gönder"""
+    return await send_email(email, *render_verification_email(ad, kod))
+
+
+def render_password_reset_email(ad: str, token: str) -> tuple[str, str]:
+    """Şifre sıfırlama e-postası - (konu, HTML içerik)"""
     subject = "Öldün mü? - Şifre Sıfırlama"
     reset_link = f"{settings.FRONTEND_URL}/sifre-sifirla?token={token}"
     
@@ -145,11 +327,16 @@ async def send_password_reset_email(email: str, ad: str, token: str) -> bool:
     </html>
     """
     
-    return await send_email(email, subject, html_content)
+    return subject, html_content
 
 
-async def send_alarm_notification_email(email: str, ad: str, kullanici_adi: str, mesaj: str) -> bool:
-    """Acil durum alarm bildirimi gönder"""
+async def send_password_reset_email(email: str, ad: str, token: str) -> bool:
+    """Şifre sıfırlama e-postası gönder"""
+    return await send_email(email, *render_password_reset_email(ad, token))
+
+
+def render_alarm_email(ad: str, kullanici_adi: str, mesaj: str) -> tuple[str, str]:
+    """Acil durum alarm bildirimi - (konu, HTML içerik)"""
     subject = "🚨 ACİL DURUM - Öldün mü? Alarm Bildirimi"
     
     html_content = f"""
@@ -186,4 +373,9 @@ async def send_alarm_notification_email(email: str, ad: str, kullanici_adi: str,
     </html>
     """
     
-    return await send_email(email, subject, html_content)
+    return subject, html_content
+
+
+async def send_alarm_notification_email(email: str, ad: str, kullanici_adi: str, mesaj: str) -> bool:
+    """Acil durum alarm bildirimi gönder"""
+    return await send_email(email, *render_alarm_email(ad, kullanici_adi, mesaj))
@@ -0,0 +1,169 @@
+"""
+Check-in istatistik servisi - kullanici_istatistik tablosunun bakımı
+"""
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import Row, case, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Checkin, KullaniciIstatistik
+
+
+async def update_checkin_stats(db: AsyncSession, kullanici_id: UUID, tarih: datetime) -> Row:
+    """
+    Yeni check-in sonrası istatistik satırını tek bir UPSERT ile güncelle.
+
+    Check-in INSERT'i ile aynı oturumda (transaction) çağrılmalıdır; satır kilidi
+    sayesinde aynı kullanıcının eşzamanlı check-in'leri birbirini ezmez.
+    """
+    tablo = KullaniciIstatistik.__table__
+    gun = tarih.date()
+    son_gun = func.date(tablo.c.son_checkin)
+
+    yeni_seri = case(
+        (son_gun >= gun, tablo.c.mevcut_seri),
+        (son_gun == gun - timedelta(days=1), tablo.c.mevcut_seri + 1),
+        else_=1,
+    )
+
+    stmt = pg_insert(tablo).values(
+        kullanici_id=kullanici_id,
+        toplam_checkin=1,
+        mevcut_seri=1,
+        en_uzun_seri=1,
+        son_checkin=tarih,
+        guncelleme_tarihi=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tablo.c.kullanici_id],
+        set_={
+            "toplam_checkin": tablo.c.toplam_checkin + 1,
+            "mevcut_seri": yeni_seri,
+            "en_uzun_seri": func.greatest(tablo.c.en_uzun_seri, yeni_seri),
+            "son_checkin": func.greatest(tablo.c.son_checkin, stmt.excluded.son_checkin),
+            "guncelleme_tarihi": stmt.excluded.guncelleme_tarihi,
+        },
+    ).returning(*tablo.c)
+
+    result = await db.execute(stmt)
+    return result.one()
+
+
+async def get_checkin_stats(db: AsyncSession, kullanici_id: UUID) -> Optional[KullaniciIstatistik]:
+    """İstatistik satırını primary key ile oku"""
+    return await db.get(KullaniciIstatistik, kullanici_id)
+
+
+def current_streak(istatistik: Optional[KullaniciIstatistik], bugun: Optional[date] = None) -> int:
+    """Son check-in dün veya bugün değilse seri kırılmıştır"""
+    if not istatistik or not istatistik.son_checkin:
+        return 0
+    bugun = bugun or datetime.utcnow().date()
+    if (bugun - istatistik.son_checkin.date()).days > 1:
+        return 0
+    return istatistik.mevcut_seri
+
+
+# Tarih filtreli sayımlar için küçük LRU cache. Anahtar kullanıcının toplam
+# check-in sayısını içerir; yeni check-in geldiğinde eski kayıtlar kendiliğinden geçersizleşir.
+_SAYIM_CACHE_BOYUT = 10000
+_sayim_cache: "OrderedDict[tuple, int]" = OrderedDict()
+
+
+async def count_checkins(
+    db: AsyncSession,
+    kullanici_id: UUID,
+    baslangic: Optional[datetime] = None,
+    bitis: Optional[datetime] = None,
+) -> int:
+    """
+    Check-in sayısı - filtresizse istatistik satırından, filtreliyse cache'li COUNT ile
+    """
+    istatistik = await get_checkin_stats(db, kullanici_id)
+    surum = istatistik.toplam_checkin if istatistik else 0
+    if baslangic is None and bitis is None:
+        return surum
+
+    anahtar = (kullanici_id, baslangic, bitis, surum)
+    if anahtar in _sayim_cache:
+        _sayim_cache.move_to_end(anahtar)
+        return _sayim_cache[anahtar]
+
+    sorgu = select(func.count(Checkin.id)).where(Checkin.kullanici_id == kullanici_id)
+    if baslangic:
+        sorgu = sorgu.where(Checkin.tarih >= baslangic)
+    if bitis:
+        sorgu = sorgu.where(Checkin.tarih <= bitis)
+    toplam = (await db.execute(sorgu)).scalar() or 0
+
+    _sayim_cache[anahtar] = toplam
+    if len(_sayim_cache) > _SAYIM_CACHE_BOYUT:
+        _sayim_cache.popitem(last=False)
+    return toplam
+
+
+_BACKFILL_SQL = """
+WITH gunler AS (
+    SELECT DISTINCT kullanici_id, tarih::date AS gun
+    FROM checkinler
+    WHERE tarih IS NOT NULL {filtre}
+),
+adalar AS (
+    SELECT kullanici_id, gun,
+           gun - (ROW_NUMBER() OVER (PARTITION BY kullanici_id ORDER BY gun))::int AS ada
+    FROM gunler
+),
+seriler AS (
+    SELECT kullanici_id, COUNT(*) AS uzunluk, MAX(gun) AS bitis
+    FROM adalar
+    GROUP BY kullanici_id, ada
+),
+ozet AS (
+    SELECT kullanici_id,
+           MAX(uzunluk) AS en_uzun_seri,
+           (ARRAY_AGG(uzunluk ORDER BY bitis DESC))[1] AS mevcut_seri
+    FROM seriler
+    GROUP BY kullanici_id
+),
+toplamlar AS (
+    SELECT kullanici_id, COUNT(*) AS toplam_checkin, MAX(tarih) AS son_checkin
+    FROM checkinler
+    WHERE TRUE {filtre}
+    GROUP BY kullanici_id
+)
+INSERT INTO kullanici_istatistik
+    (kullanici_id, toplam_checkin, mevcut_seri, en_uzun_seri, son_checkin, guncelleme_tarihi)
+SELECT t.kullanici_id, t.toplam_checkin, COALESCE(o.mevcut_seri, 0), COALESCE(o.en_uzun_seri, 0),
+       t.son_checkin, now() AT TIME ZONE 'utc'
+FROM toplamlar t
+LEFT JOIN ozet o USING (kullanici_id)
+ON CONFLICT (kullanici_id) DO UPDATE SET
+    toplam_checkin = EXCLUDED.toplam_checkin,
+    mevcut_seri = EXCLUDED.mevcut_seri,
+    en_uzun_seri = EXCLUDED.en_uzun_seri,
+    son_checkin = EXCLUDED.son_checkin,
+    guncelleme_tarihi = EXCLUDED.guncelleme_tarihi
+"""
+
+BACKFILL_SQL = text(_BACKFILL_SQL.format(filtre=""))
+KULLANICI_BACKFILL_SQL = text(_BACKFILL_SQL.format(filtre="AND kullanici_id = :kullanici_id"))
+
+
+async def backfill_checkin_stats(db: AsyncSession) -> int:
+    """Tüm kullanıcıların istatistiklerini checkinler tablosundan yeniden hesapla"""
+    result = await db.execute(BACKFILL_SQL)
+    return result.rowcount
+
+
+async def recompute_checkin_stats(db: AsyncSession, kullanici_id: UUID) -> Optional[KullaniciIstatistik]:
+    """
+    Tek kullanıcının istatistiklerini baştan hesapla.
+
+    Sırasız veya geçmiş tarihli check-in'ler (ör. çevrimdışı senkronizasyon)
+    artımlı güncellemeyle doğru seriyi vermez; bu durumda bir kez çağrılır.
+    """
+    await db.execute(KULLANICI_BACKFILL_SQL, {"kullanici_id": kullanici_id})
+    return await db.get(KullaniciIstatistik, kullanici_id, populate_existing=True)
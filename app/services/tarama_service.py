@@ -0,0 +1,232 @@
+"""
+Durum taraması - tüm kullanıcıların guvenli/uyari/kritik/alarm durumunu periyodik
+olarak yeniden hesaplayan güvenlik ağı
+
+Olay güdümlü zamanlayıcının (bkz. zamanlayici_service) arkasında çalışır. Kullanıcılar
+SWEEP_CHUNK'lık parçalar halinde `(id, sonraki_beklenen)` kolonları olarak NumPy
+dizilerine alınır ve eşiklerle vektörel karşılaştırılarak sınıflandırılır. Yalnızca önceki taramaya göre durumu değişen kullanıcılar üretilir;
+önceki durum olarak sadece guvenli olmayan kullanıcılar tutulur, böylece bellek
+kullanıcı sayısıyla değil sorunlu kullanıcı sayısıyla büyür.
+"""
+from typing import Optional
+from uuid import UUID
+import asyncio
+import time
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import Kullanici
+from app.services.durum_service import DURUMLAR, GUVENLI, asama_ofsetleri
+from app.services.zamanlayici_service import _SHARD_SQL, alarm_zamanlayici
+
+settings = get_settings()
+
+_ID_TIPI = "S16"  # uuid_send çıktısı; bayt sırası PostgreSQL uuid sıralamasıyla aynı
+
+
+def classify_batch(beklenen: np.ndarray, simdi: float) -> np.ndarray:
+    """
+    `asama()`'nın vektörel karşılığı - epoch saniye beklenen check-in zamanlarından
+    durum kodlarını (int8, DURUMLAR indeksi) hesapla
+    """
+    gecikme = simdi - beklenen
+    durum = np.zeros(len(gecikme), dtype=np.int8)
+    for ofset in asama_ofsetleri():
+        durum += gecikme >= ofset
+    return durum
+
+
+def _anahtarlar(idler: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """16 baytlık ID'leri (üst, alt) uint64 çiftine böl - bayt dizisi karşılaştırmasından çok daha hızlı"""
+    ikili = idler.view(">u8").reshape(-1, 2).astype(np.uint64)
+    return ikili[:, 0], ikili[:, 1]
+
+
+class DurumTaramasi:
+    """Taramalar arası durum karşılaştırması (tek event loop'ta kullanılır)"""
+
+    def __init__(self):
+        self._onceki_ust = np.empty(0, dtype=np.uint64)
+        self._onceki_alt = np.empty(0, dtype=np.uint64)
+        self._onceki_durumlar = np.empty(0, dtype=np.int8)
+        self._yeni_idler: list[np.ndarray] = []
+        self._yeni_durumlar: list[np.ndarray] = []
+        self.dagilim = [0, 0, 0, 0]
+        self.kullanici = 0
+        self.degisen = 0
+        self.siniflandirma_sn = 0.0
+
+    def baslat(self) -> None:
+        self._yeni_idler, self._yeni_durumlar = [], []
+        self.dagilim = [0, 0, 0, 0]
+        self.kullanici = 0
+        self.degisen = 0
+        self.siniflandirma_sn = 0.0
+
+    def _onceki(self, idler: np.ndarray) -> np.ndarray:
+        """Önceki taramadaki durumlar - kayıtlı değilse guvenli"""
+        eski = np.full(len(idler), GUVENLI, dtype=np.int8)
+        if not len(self._onceki_ust):
+            return eski
+        ust, alt = _anahtarlar(idler)
+        # Satırlar ID sırasıyla geldiğinden parça önceki durumun dar bir aralığına düşer;
+        # arama o aralıkta ve sıralı yapılır (sıra bozuksa da sonuç doğru, yalnızca yavaş)
+        pencere_bas = int(np.searchsorted(self._onceki_ust, ust.min(), side="left"))
+        pencere = self._onceki_ust[pencere_bas:int(np.searchsorted(self._onceki_ust, ust.max(), side="right"))]
+        sira = np.argsort(ust, kind="stable")
+        sol = np.empty(len(ust), dtype=np.intp)
+        sag = np.empty(len(ust), dtype=np.intp)
+        sol[sira] = np.searchsorted(pencere, ust[sira], side="left") + pencere_bas
+        sag[sira] = np.searchsorted(pencere, ust[sira], side="right") + pencere_bas
+        # Üst 64 biti aynı olan ID'ler (pratikte hiç) tek tek çözülür
+        for i in np.flatnonzero(sag - sol > 1):
+            sol[i] += int(np.searchsorted(self._onceki_alt[sol[i]:sag[i]], alt[i]))
+        aday = np.flatnonzero(sol < sag)
+        bulunan = aday[self._onceki_alt[sol[aday]] == alt[aday]]
+        eski[bulunan] = self._onceki_durumlar[sol[bulunan]]
+        return eski
+
+    def parca(
+        self, idler: np.ndarray, beklenen: np.ndarray, simdi: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Bir parçayı sınıflandır - durumu değişenlerin (idler, beklenen, eski, yeni)
+        dizilerini döner
+        """
+        baslangic = time.perf_counter()
+        yeni = classify_batch(beklenen, simdi)
+        eski = self._onceki(idler)
+        degisti = eski != yeni
+
+        sorunlu = yeni != GUVENLI
+        self._yeni_idler.append(idler[sorunlu])
+        self._yeni_durumlar.append(yeni[sorunlu])
+        self.dagilim = [toplam + adet for toplam, adet in zip(self.dagilim, np.bincount(yeni, minlength=4))]
+        self.kullanici += len(idler)
+        self.degisen += int(np.count_nonzero(degisti))
+
+        sonuc = (
+            idler[degisti],
+            beklenen[degisti],
+            eski[degisti],
+            yeni[degisti],
+        )
+        self.siniflandirma_sn += time.perf_counter() - baslangic
+        return sonuc
+
+    def tamamla(self) -> None:
+        """Taramayı bitir - bu taramanın durumları bir sonrakinin önceki durumu olur"""
+        idler = np.concatenate(self._yeni_idler) if self._yeni_idler else np.empty(0, dtype=_ID_TIPI)
+        durumlar = np.concatenate(self._yeni_durumlar) if self._yeni_durumlar else np.empty(0, dtype=np.int8)
+        ust, alt = _anahtarlar(idler)
+        sira = np.lexsort((alt, ust))
+        self._onceki_ust, self._onceki_alt, self._onceki_durumlar = ust[sira], alt[sira], durumlar[sira]
+        self._yeni_idler, self._yeni_durumlar = [], []
+
+    def iptal(self) -> None:
+        """Yarım kalan taramayı at - önceki durum korunur"""
+        self._yeni_idler, self._yeni_durumlar = [], []
+
+    def bellek_bayt(self) -> int:
+        return self._onceki_ust.nbytes + self._onceki_alt.nbytes + self._onceki_durumlar.nbytes
+
+
+def uuid_listesi(idler: np.ndarray) -> list[UUID]:
+    # 'S16' elemanları sondaki sıfır baytları atar; ham tampondan 16'şar bayt okunur
+    veri = idler.tobytes()
+    return [UUID(bytes=veri[i:i + 16]) for i in range(0, len(veri), 16)]
+
+
+class TaramaServisi:
+    """Zamanlayıcının sahip olduğu parçaları periyodik olarak tarar"""
+
+    def __init__(self):
+        self.tarama = DurumTaramasi()
+        self.tarama_sayisi = 0
+        self.yeniden_kurulan = 0
+        self.son_tarama_ms = 0.0
+        self.son_tarama: Optional[float] = None
+
+    async def sweep(self) -> int:
+        """
+        Sahip olunan parçaları tara; durumu değişen kullanıcılar zamanlayıcıyla
+        karşılaştırılır ve heap'te eksik/eski olanlar yeniden kurulur. Taranan
+        kullanıcı sayısını döner.
+        """
+        parcalar = sorted(alarm_zamanlayici.kiralama.sahip)
+        if not parcalar:
+            return 0
+        sorgu = (
+            select(func.uuid_send(Kullanici.id), cast(func.extract("epoch", Kullanici.sonraki_beklenen), Float))
+            .where(
+                Kullanici.sonraki_beklenen.isnot(None),
+                Kullanici.silinme_tarihi.is_(None),
+                _SHARD_SQL,
+            )
+            .order_by(Kullanici.id)
+            .execution_options(yield_per=settings.SWEEP_CHUNK)
+        )
+        parametreler = {"shard_sayisi": settings.SCHEDULER_SHARDS, "parcalar": parcalar}
+
+        baslangic = time.perf_counter()
+        simdi = time.time()
+        self.tarama.baslat()
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.stream(sorgu, parametreler)
+                async for satirlar in result.partitions():
+                    id_kolonu, beklenen_kolonu = zip(*satirlar)
+                    idler, beklenen, eski, yeni = self.tarama.parca(
+                        np.frombuffer(b"".join(id_kolonu), dtype=_ID_TIPI),
+                        np.array(beklenen_kolonu, dtype=np.float64),
+                        simdi,
+                    )
+                    for kullanici_id, zaman in zip(uuid_listesi(idler), beklenen.tolist()):
+                        if alarm_zamanlayici.reconcile(kullanici_id, int(zaman)):
+                            self.yeniden_kurulan += 1
+        except BaseException:
+            self.tarama.iptal()
+            raise
+        self.tarama.tamamla()
+
+        self.tarama_sayisi += 1
+        self.son_tarama = simdi
+        self.son_tarama_ms = (time.perf_counter() - baslangic) * 1000
+        return self.tarama.kullanici
+
+    def stats(self) -> dict:
+        return {
+            "tarama_sayisi": self.tarama_sayisi,
+            "kullanici": self.tarama.kullanici,
+            "degisen": self.tarama.degisen,
+            "dagilim": dict(zip(DURUMLAR, map(int, self.tarama.dagilim))),
+            "yeniden_kurulan": self.yeniden_kurulan,
+            "bellek_mb": round(self.tarama.bellek_bayt() / 1024 / 1024, 1),
+            "son_tarama_ms": round(self.son_tarama_ms, 1),
+            "siniflandirma_ms": round(self.tarama.siniflandirma_sn * 1000, 1),
+        }
+
+
+tarama_servisi = TaramaServisi()
+
+
+async def status_sweep_loop() -> None:
+    """Lifespan içinde çalışan periyodik tarama görevi - ilk tarama zamanlayıcı yüklendikten sonra"""
+    while True:
+        await asyncio.sleep(settings.SWEEP_INTERVAL_SECONDS)
+        try:
+            taranan = await tarama_servisi.sweep()
+            if tarama_servisi.tarama.degisen:
+                print(
+                    f"[TARAMA] {taranan} kullanıcı tarandı, {tarama_servisi.tarama.degisen} durum değişti "
+                    f"({tarama_servisi.son_tarama_ms:.0f} ms)"
+                )
+        except Exception as e:
+            print(f"[TARAMA] Durum taraması başarısız: {e}")
+
+
+def get_sweep_stats() -> dict:
+    """Son taramanın özeti"""
+    return tarama_servisi.stats()
@@ -0,0 +1,130 @@
+"""
+Refresh token servisi - üretim, rotasyon, tekrar kullanım tespiti ve temizlik
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import asyncio
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import RefreshToken
+from app.utils.security import create_refresh_token, hash_refresh_token
+
+settings = get_settings()
+
+# Temizlikte tek seferde silinecek satır sayısı (kilitleri kısa tutmak için)
+TEMIZLIK_PARCA_BOYUTU = 5000
+
+
+class RefreshTokenHatasi(Exception):
+    """Refresh token kullanılamadığında fırlatılır"""
+    
+    def __init__(self, kod: str, mesaj: str):
+        super().__init__(mesaj)
+        self.kod = kod
+        self.mesaj = mesaj
+
+
+async def issue_refresh_token(db: AsyncSession, kullanici_id: UUID, cihaz_id: Optional[str] = None) -> str:
+    """Yeni refresh token üret ve özetini kaydet - düz token yalnızca istemciye döner"""
+    token, gecerlilik = create_refresh_token()
+    db.add(RefreshToken(
+        kullanici_id=kullanici_id,
+        token=hash_refresh_token(token),
+        cihaz_id=cihaz_id,
+        gecerlilik=gecerlilik,
+    ))
+    await db.flush()
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[UUID, Optional[str], str]:
+    """
+    Refresh token'ı tek kullanımlık olarak harca ve yerine yenisini üret.
+    
+    Harcama tek bir koşullu UPDATE'tir; aynı token ile eşzamanlı iki istekten
+    yalnızca biri başarılı olur. Rotasyonla harcanmış (yenilenme_tarihi dolu) bir
+    token tekrar gelirse token çalınmış kabul edilir ve kullanıcının tüm refresh
+    token'ları iptal edilir. Şifre sıfırlama gibi nedenlerle iptal edilmiş ama
+    rotasyona girmemiş token'lar yalnızca geçersiz sayılır.
+    
+    Returns:
+        (kullanici_id, cihaz_id, yeni refresh token)
+    """
+    simdi = datetime.utcnow()
+    token_hash = hash_refresh_token(token)
+    
+    result = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token == token_hash,
+            RefreshToken.iptal_edildi == False,
+            RefreshToken.gecerlilik > simdi,
+        )
+        .values(iptal_edildi=True, son_kullanim=simdi, yenilenme_tarihi=simdi)
+        .returning(RefreshToken.kullanici_id, RefreshToken.cihaz_id)
+    )
+    satir = result.one_or_none()
+    
+    if satir is None:
+        result = await db.execute(
+            select(RefreshToken.kullanici_id, RefreshToken.yenilenme_tarihi)
+            .where(RefreshToken.token == token_hash)
+        )
+        mevcut = result.one_or_none()
+        if mevcut is not None and mevcut.yenilenme_tarihi is not None:
+            # Tekrar kullanım: tüm oturumları kapat ve hata dönmeden önce kalıcı yap
+            await db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.kullanici_id == mevcut.kullanici_id, RefreshToken.iptal_edildi == False)
+                .values(iptal_edildi=True)
+            )
+            await db.commit()
+            raise RefreshTokenHatasi("TOKEN_REUSED", "Oturum güvenlik nedeniyle sonlandırıldı. Lütfen tekrar giriş yapın.")
+        raise RefreshTokenHatasi("INVALID_REFRESH_TOKEN", "Geçersiz veya süresi dolmuş refresh token.")
+    
+    yeni_token = await issue_refresh_token(db, satir.kullanici_id, satir.cihaz_id)
+    return satir.kullanici_id, satir.cihaz_id, yeni_token
+
+
+async def cleanup_refresh_tokens(db: AsyncSession) -> int:
+    """
+    Süresi dolmuş ve saklama süresi geçmiş iptal edilmiş token'ları parça parça sil.
+    
+    Rotasyonla harcanan satırlar gecerlilik'e kadar tutulur: çalınan token
+    süresi dolana kadar tekrar sunulabilir ve tekrar kullanım ancak satır
+    duruyorsa tespit edilir.
+    """
+    simdi = datetime.utcnow()
+    iptal_siniri = simdi - timedelta(hours=settings.REFRESH_TOKEN_REVOKED_RETENTION_HOURS)
+    kosul = or_(
+        RefreshToken.gecerlilik < simdi,
+        (RefreshToken.iptal_edildi == True)
+        & RefreshToken.yenilenme_tarihi.is_(None)
+        & (RefreshToken.son_kullanim < iptal_siniri),
+    )
+    
+    toplam = 0
+    while True:
+        parca = select(RefreshToken.id).where(kosul).limit(TEMIZLIK_PARCA_BOYUTU).scalar_subquery()
+        result = await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(parca)))
+        await db.commit()
+        toplam += result.rowcount
+        if result.rowcount < TEMIZLIK_PARCA_BOYUTU:
+            return toplam
+
+
+async def refresh_token_cleanup_loop() -> None:
+    """Lifespan içinde çalışan periyodik temizlik görevi"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                silinen = await cleanup_refresh_tokens(db)
+            if silinen:
+                print(f"[TOKEN] {silinen} eski refresh token silindi")
+        except Exception as e:
+            print(f"[TOKEN] Refresh token temizliği başarısız: {e}")
+        await asyncio.sleep(settings.REFRESH_TOKEN_CLEANUP_INTERVAL_MINUTES * 60)
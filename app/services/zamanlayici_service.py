@@ -0,0 +1,621 @@
+"""
+Alarm zamanlayıcı - kaçırılan check-in'ler için uyarı, kritik ve otomatik alarm
+
+Her kullanıcının beklenen check-in zamanı bellekte, slot tabanlı indeksli bir
+min-heap'te tutulur. Zaman, aşama ve heap konumları paralel `array` kolonlarıdır;
+kullanıcı başına Python nesnesi yalnızca ID -> slot sözlüğündeki iki int'tir, bu
+yüzden bellek kullanıcı başına sabittir (bkz. `DeadlineHeap.bellek_bayt`).
+Check-in ve erteleme güncellemeleri O(log n)'dir. Bellekteki zaman bir ipucudur:
+aşama geçişi işlenmeden önce `kullanicilar.sonraki_beklenen` ile doğrulanır.
+
+Birden fazla worker/sunucuda kullanıcılar SCHEDULER_SHARDS parçaya bölünür; her
+parça PostgreSQL advisory lock ile tek bir sürece kiralanır ve süreç yalnızca kendi
+parçalarındaki kullanıcıları yükler ve işler. Ölen sürecin kilitleri bağlantısıyla
+birlikte düşer, parçaları diğer süreçler bir sonraki dengeleme turunda devralır.
+"""
+from array import array
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from uuid import UUID, uuid4
+import asyncio
+import calendar
+import math
+import random
+import sys
+import time
+import asyncpg
+from sqlalchemy import event, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, get_direct_dsn
+from app.models import (
+    Alarm, AlarmDurum, AlarmTipi, AcilKisi, Bildirim, BildirimTipi, Kullanici
+)
+from app.services.durum_service import GUVENLI, UYARI, KRITIK, ALARM, asama, asama_ofsetleri
+from app.services.bildirim_service import enqueue_alarm_notifications
+
+settings = get_settings()
+
+_BOS = -1
+# Kullanıcı başına int nesneleri: 128 bitlik UUID değeri (sözlük anahtarı ve ID listesi
+# aynı nesneyi paylaşır) ve slot numarası
+_ID_INT_BAYT = sys.getsizeof(1 << 127)
+_SLOT_INT_BAYT = sys.getsizeof(1 << 20)
+
+
+def _epoch(tarih: datetime) -> int:
+    """Naive UTC datetime -> epoch saniye"""
+    return calendar.timegm(tarih.utctimetuple())
+
+
+def _tarih(epoch: int) -> datetime:
+    """Epoch saniye -> naive UTC datetime"""
+    return datetime(1970, 1, 1) + timedelta(seconds=epoch)
+
+
+def shard_of(kullanici_id: int) -> int:
+    """
+    Kullanıcının parçası - UUID'nin son 32 biti. SQL tarafında aynı değer
+    `_SHARD_SQL` ile hesaplanır, böylece parça yüklemesi veritabanında süzülür.
+    """
+    return (kullanici_id & 0xFFFFFFFF) % settings.SCHEDULER_SHARDS
+
+
+_SHARD_SQL = text(
+    "(('x' || right(kullanicilar.id::text, 8))::bit(32)::bigint % CAST(:shard_sayisi AS int))"
+    " = ANY(CAST(:parcalar AS int[]))"
+)
+
+
+class DeadlineHeap:
+    """
+    Kullanıcı başına tek kayıtlı, konum indeksli min-heap.
+
+    Slot i için: `_idler[i]` kullanıcı ID'si (int), `_beklenen[i]` beklenen check-in,
+    `_zaman[i]` bir sonraki aşama geçişi (epoch sn), `_asama[i]` bildirilmiş son aşama.
+    `_heap` slot numaralarını tutar, `_konum[slot]` slotun heap'teki yeridir (yoksa -1).
+    """
+
+    def __init__(self):
+        self._slotlar: dict[int, int] = {}
+        self._idler: list[int] = []
+        self._beklenen = array("q")
+        self._zaman = array("q")
+        self._asama = bytearray()
+        self._heap = array("q")
+        self._konum = array("q")
+        self._bos_slotlar: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slotlar)
+
+    def bekleyen(self) -> int:
+        return len(self._heap)
+
+    # ---------- heap işlemleri ----------
+
+    def _yukari(self, i: int) -> None:
+        heap, zaman, konum = self._heap, self._zaman, self._konum
+        slot = heap[i]
+        anahtar = zaman[slot]
+        while i > 0:
+            ust = (i - 1) >> 1
+            ust_slot = heap[ust]
+            if zaman[ust_slot] <= anahtar:
+                break
+            heap[i] = ust_slot
+            konum[ust_slot] = i
+            i = ust
+        heap[i] = slot
+        konum[slot] = i
+
+    def _asagi(self, i: int) -> None:
+        heap, zaman, konum = self._heap, self._zaman, self._konum
+        n = len(heap)
+        slot = heap[i]
+        anahtar = zaman[slot]
+        while True:
+            cocuk = 2 * i + 1
+            if cocuk >= n:
+                break
+            if cocuk + 1 < n and zaman[heap[cocuk + 1]] < zaman[heap[cocuk]]:
+                cocuk += 1
+            if zaman[heap[cocuk]] >= anahtar:
+                break
+            heap[i] = heap[cocuk]
+            konum[heap[i]] = i
+            i = cocuk
+        heap[i] = slot
+        konum[slot] = i
+
+    def _heap_ekle(self, slot: int) -> None:
+        self._heap.append(slot)
+        self._yukari(len(self._heap) - 1)
+
+    def _heap_cikar(self, slot: int) -> None:
+        i = self._konum[slot]
+        if i == _BOS:
+            return
+        son = self._heap.pop()
+        self._konum[slot] = _BOS
+        if son != slot:
+            self._heap[i] = son
+            self._konum[son] = i
+            self._yukari(i)
+            self._asagi(self._konum[son])
+
+    # ---------- kayıt işlemleri ----------
+
+    def _slot_al(self, kullanici_id: int) -> int:
+        slot = self._slotlar.get(kullanici_id)
+        if slot is not None:
+            return slot
+        if self._bos_slotlar:
+            slot = self._bos_slotlar.pop()
+            self._idler[slot] = kullanici_id
+        else:
+            slot = len(self._idler)
+            self._idler.append(kullanici_id)
+            self._beklenen.append(0)
+            self._zaman.append(0)
+            self._asama.append(GUVENLI)
+            self._konum.append(_BOS)
+        self._slotlar[kullanici_id] = slot
+        return slot
+
+    def set(self, kullanici_id: int, beklenen: int, asama_: int, zaman: Optional[int]) -> None:
+        """Kaydı ekle veya güncelle - zaman None ise heap'ten çıkarılır (yeni check-in'e kadar)"""
+        slot = self._slot_al(kullanici_id)
+        self._beklenen[slot] = beklenen
+        self._asama[slot] = asama_
+        if zaman is None:
+            self._heap_cikar(slot)
+            return
+        eski = self._zaman[slot]
+        self._zaman[slot] = zaman
+        i = self._konum[slot]
+        if i == _BOS:
+            self._heap_ekle(slot)
+        elif zaman < eski:
+            self._yukari(i)
+        else:
+            self._asagi(i)
+
+    def load(self, kullanici_id: int, beklenen: int, asama_: int, zaman: Optional[int]) -> None:
+        """Toplu yükleme - heap düzeni heapify() ile bir kez kurulur"""
+        slot = self._slot_al(kullanici_id)
+        self._beklenen[slot] = beklenen
+        self._asama[slot] = asama_
+        if zaman is not None:
+            self._zaman[slot] = zaman
+            if self._konum[slot] == _BOS:
+                self._konum[slot] = len(self._heap)
+                self._heap.append(slot)
+
+    def heapify(self) -> None:
+        for i in reversed(range(len(self._heap) // 2)):
+            self._asagi(i)
+
+    def remove_if(self, kosul: Callable[[int], bool]) -> int:
+        """Koşulu sağlayan tüm kullanıcıları çıkar (parça devrinde) - O(n)"""
+        silinecek = [kullanici_id for kullanici_id in self._slotlar if kosul(kullanici_id)]
+        for kullanici_id in silinecek:
+            self.remove(kullanici_id)
+        return len(silinecek)
+
+    def remove(self, kullanici_id: int) -> None:
+        slot = self._slotlar.pop(kullanici_id, None)
+        if slot is None:
+            return
+        self._heap_cikar(slot)
+        self._idler[slot] = 0
+        self._bos_slotlar.append(slot)
+
+    def get(self, kullanici_id: int) -> Optional[tuple[int, int]]:
+        """(beklenen, aşama)"""
+        slot = self._slotlar.get(kullanici_id)
+        if slot is None:
+            return None
+        return self._beklenen[slot], self._asama[slot]
+
+    def pop_due(self, simdi: int, limit: int) -> list[tuple[int, int, int]]:
+        """Zamanı gelmiş kayıtları heap'ten çıkar - (kullanici_id, beklenen, aşama) listesi"""
+        sonuc = []
+        heap, zaman = self._heap, self._zaman
+        while heap and zaman[heap[0]] <= simdi and len(sonuc) < limit:
+            slot = heap[0]
+            self._heap_cikar(slot)
+            sonuc.append((self._idler[slot], self._beklenen[slot], self._asama[slot]))
+        return sonuc
+
+    def bellek_bayt(self) -> int:
+        """Yaklaşık toplam boyut - kolon dizileri, slot sözlüğü, ID listesi ve içlerindeki int nesneleri"""
+        kaplar = (
+            self._beklenen, self._zaman, self._asama, self._heap, self._konum,
+            self._slotlar, self._idler, self._bos_slotlar,
+        )
+        return sum(sys.getsizeof(kap) for kap in kaplar) + len(self._slotlar) * (_ID_INT_BAYT + _SLOT_INT_BAYT)
+
+
+def sonraki_gecis(beklenen: int, asama_: int) -> Optional[int]:
+    """Bildirilmiş aşamadan sonraki geçişin zamanı - alarmdan sonra yok"""
+    if asama_ >= ALARM:
+        return None
+    return beklenen + asama_ofsetleri()[asama_]
+
+
+class ShardKiralama:
+    """
+    Zamanlayıcı parçalarının advisory lock ile kiralanması.
+
+    Her süreç kendine ait bir bağlantı üzerinde üyelik kilidi tutar; üye sayısından
+    adil pay (parça sayısı / üye) hesaplanır. Fazla parçalar bırakılır, boştakiler
+    adil paya kadar alınır. Kilitler oturuma bağlıdır: bağlantı koparsa tüm parçalar
+    kaybedilmiş sayılır.
+    """
+
+    def __init__(self, parca_sayisi: int, isim_alani: int):
+        self.parca_sayisi = parca_sayisi
+        self.isim_alani = isim_alani
+        self.uye_isim_alani = isim_alani + 1
+        self.sahip: set[int] = set()
+        self.uye_sayisi = 0
+        self._conn: Optional[asyncpg.Connection] = None
+
+    async def _baglan(self) -> None:
+        self._conn = await asyncpg.connect(get_direct_dsn())
+        await self._conn.execute(
+            "SELECT pg_advisory_lock($1, pg_backend_pid())", self.uye_isim_alani
+        )
+
+    async def rebalance(self) -> tuple[set[int], set[int]]:
+        """Parçaları dengele - (alınan, bırakılan) parça kümeleri döner"""
+        birakilan: set[int] = set()
+        if self._conn is None or self._conn.is_closed():
+            birakilan, self.sahip = self.sahip, set()
+            self._conn = None
+            await self._baglan()
+
+        self.uye_sayisi = await self._conn.fetchval(
+            "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND classid = $1 AND objsubid = 2 AND granted"
+            " AND database = (SELECT oid FROM pg_database WHERE datname = current_database())",
+            self.uye_isim_alani,
+        )
+        hedef = math.ceil(self.parca_sayisi / max(self.uye_sayisi, 1))
+
+        while len(self.sahip) > hedef:
+            parca = self.sahip.pop()
+            await self._conn.execute("SELECT pg_advisory_unlock($1, $2)", self.isim_alani, parca)
+            birakilan.add(parca)
+
+        alinan: set[int] = set()
+        adaylar = [p for p in range(self.parca_sayisi) if p not in self.sahip]
+        random.shuffle(adaylar)
+        for parca in adaylar:
+            if len(self.sahip) >= hedef:
+                break
+            if await self._conn.fetchval("SELECT pg_try_advisory_lock($1, $2)", self.isim_alani, parca):
+                self.sahip.add(parca)
+                alinan.add(parca)
+        return alinan, birakilan - self.sahip
+
+    async def release(self, parcalar: set[int]) -> None:
+        for parca in parcalar & self.sahip:
+            self.sahip.discard(parca)
+            await self._conn.execute("SELECT pg_advisory_unlock($1, $2)", self.isim_alani, parca)
+
+    async def close(self) -> None:
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+        self.sahip = set()
+
+
+class AlarmZamanlayici:
+    """Deadline heap'ini işleyen zamanlayıcı"""
+
+    def __init__(self):
+        self.heap = DeadlineHeap()
+        self.kiralama = ShardKiralama(settings.SCHEDULER_SHARDS, settings.SCHEDULER_LOCK_NAMESPACE)
+        self.gecisler = [0, 0, 0, 0]
+        self.dogrulamada_ertelenen = 0
+        self.tekrar_engellenen = 0
+        self.son_tur_ms = 0.0
+        self._son_senkron: Optional[datetime] = None
+
+    def owns(self, kullanici_id: int) -> bool:
+        return shard_of(kullanici_id) in self.kiralama.sahip
+
+    async def rebalance(self) -> None:
+        """Parça kiralarını yenile; alınan parçaları yükle, bırakılanları heap'ten çıkar"""
+        try:
+            alinan, birakilan = await self.kiralama.rebalance()
+        except Exception:
+            # Bağlantı yoksa kilitlerin hâlâ bizde olduğu bilinemez; hiçbir parçayı işleme
+            self.heap.remove_if(lambda kullanici_id: True)
+            await self.kiralama.close()
+            raise
+        if birakilan:
+            self.heap.remove_if(lambda kullanici_id: shard_of(kullanici_id) in birakilan)
+        if alinan:
+            try:
+                adet = await self.load(alinan)
+            except Exception:
+                # Yüklenemeyen parçalar tutulmaz; başka bir süreç (veya sonraki tur) alsın
+                self.heap.remove_if(lambda kullanici_id: shard_of(kullanici_id) in alinan)
+                await self.kiralama.release(alinan)
+                raise
+            print(f"[ZAMANLAYICI] {len(alinan)} parça alındı ({adet} kullanıcı), {len(birakilan)} parça bırakıldı")
+        await self.sync_changes()
+
+    def schedule(self, kullanici_id: UUID, sonraki_beklenen: datetime) -> None:
+        """Yeni beklenen check-in zamanını ayarla (check-in veya erteleme sonrası)"""
+        if not self.owns(kullanici_id.int):
+            # Parça başka süreçte; o süreç eski zamanda veritabanından doğrulayıp yeniden kurar
+            return
+        beklenen = _epoch(sonraki_beklenen)
+        # Yeni zamana göre hâlâ geçerli olan, zaten bildirilmiş aşamalar tekrar bildirilmez;
+        # bildirilmemiş ama zamanı geçmiş aşamalar bir sonraki turda işlenir
+        mevcut = self.heap.get(kullanici_id.int)
+        asama_ = min(asama(time.time() - beklenen), mevcut[1] if mevcut else GUVENLI)
+        self.heap.set(kullanici_id.int, beklenen, asama_, sonraki_gecis(beklenen, asama_))
+
+    def unschedule(self, kullanici_id: UUID) -> None:
+        self.heap.remove(kullanici_id.int)
+
+    def reconcile(self, kullanici_id: UUID, beklenen: int) -> bool:
+        """
+        Veritabanından okunan beklenen zamanla heap'i karşılaştır; kayıt yoksa veya
+        eskiyse yeniden kur. Heap'teki daha yeni zaman (henüz görülmemiş check-in) korunur.
+        """
+        mevcut = self.heap.get(kullanici_id.int)
+        if mevcut is not None and mevcut[0] >= beklenen:
+            return False
+        self.schedule(kullanici_id, _tarih(beklenen))
+        return True
+
+    @staticmethod
+    def _beklenen_sorgusu():
+        return (
+            select(Kullanici.id, Kullanici.sonraki_beklenen)
+            .where(
+                Kullanici.sonraki_beklenen.isnot(None),
+                Kullanici.silinme_tarihi.is_(None),
+                _SHARD_SQL,
+            )
+            .execution_options(yield_per=settings.SCHEDULER_LOAD_CHUNK)
+        )
+
+    async def load(self, parcalar: set[int]) -> int:
+        """Verilen parçalardaki kullanıcıların beklenen zamanlarını parça parça yükle"""
+        simdi = time.time()
+        parametreler = {"shard_sayisi": settings.SCHEDULER_SHARDS, "parcalar": sorted(parcalar)}
+        adet = 0
+        async with AsyncSessionLocal() as db:
+            async for satir in await db.stream(self._beklenen_sorgusu(), parametreler):
+                beklenen = _epoch(satir.sonraki_beklenen)
+                asama_ = asama(simdi - beklenen)
+                if asama_ == GUVENLI:
+                    self.heap.load(satir.id.int, beklenen, GUVENLI, sonraki_gecis(beklenen, GUVENLI))
+                else:
+                    # Hangi aşamanın bildirildiği bellekte tutulmaz: mevcut aşama bir alt
+                    # aşamadan hemen işlenir, böylece kapalıyken geçilen uyarı/kritik de
+                    # gönderilir. Alarm tekrar oluşturulmaz (bkz. _alarm_olustur); uyarı veya
+                    # kritik yeniden başlatma öncesinde bildirildiyse bir kez daha gelebilir.
+                    self.heap.load(satir.id.int, beklenen, asama_ - 1, int(simdi))
+                adet += 1
+        self.heap.heapify()
+        return adet
+
+    async def sync_changes(self) -> int:
+        """
+        Son turdan beri güncellenen kullanıcıları yeniden kur.
+
+        Başka bir worker'da yapılan check-in ve ertelemeler (ilk check-in dahil) parça
+        sahibine bu yolla, en geç bir dengeleme aralığında ulaşır.
+        """
+        if not self.kiralama.sahip:
+            return 0
+        baslangic = datetime.utcnow()
+        # Commit gecikmeleri için kısa bir örtüşme bırak
+        sinir = (self._son_senkron or baslangic) - timedelta(seconds=settings.SCHEDULER_REBALANCE_SECONDS)
+        sorgu = self._beklenen_sorgusu().where(Kullanici.guncelleme_tarihi >= sinir)
+        parametreler = {"shard_sayisi": settings.SCHEDULER_SHARDS, "parcalar": sorted(self.kiralama.sahip)}
+        adet = 0
+        async with AsyncSessionLocal() as db:
+            async for satir in await db.stream(sorgu, parametreler):
+                if self.reconcile(satir.id, _epoch(satir.sonraki_beklenen)):
+                    adet += 1
+        self._son_senkron = baslangic
+        return adet
+
+    async def tick(self) -> int:
+        """Zamanı gelmiş geçişleri işle - heap'ten alınan kayıt sayısını döner"""
+        baslangic = time.perf_counter()
+        simdi = int(time.time())
+        zamani_gelenler = self.heap.pop_due(simdi, settings.SCHEDULER_BATCH_SIZE)
+        gecisler = []
+        for kullanici_id, beklenen, eski_asama in zamani_gelenler:
+            yeni_asama = asama(simdi - beklenen)
+            self.heap.set(kullanici_id, beklenen, yeni_asama, sonraki_gecis(beklenen, yeni_asama))
+            if yeni_asama > eski_asama:
+                gecisler.append((UUID(int=kullanici_id), beklenen, eski_asama, yeni_asama))
+        if gecisler:
+            try:
+                await self._isle(gecisler)
+            except Exception:
+                # Yazılamayan geçişler kaybolmasın: eski aşamaya dönüp biraz sonra tekrar dene
+                for kullanici_id, beklenen, eski_asama, _ in gecisler:
+                    self.heap.set(kullanici_id.int, beklenen, eski_asama, simdi + settings.SCHEDULER_RETRY_SECONDS)
+                raise
+        self.son_tur_ms = (time.perf_counter() - baslangic) * 1000
+        return len(zamani_gelenler)
+
+    async def _isle(self, gecisler: list[tuple[UUID, int, int, int]]) -> None:
+        """Geçişleri veritabanıyla doğrula, bildirimleri ve alarmları tek transaction'da yaz"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Kullanici.id, Kullanici.sonraki_beklenen, Kullanici.silinme_tarihi)
+                .where(Kullanici.id.in_([g[0] for g in gecisler]))
+            )
+            guncel = {satir.id: satir for satir in result}
+
+            yeni_alarmlar = []
+            for kullanici_id, beklenen, _, yeni_asama in gecisler:
+                if not self.owns(kullanici_id.int):
+                    continue
+                satir = guncel.get(kullanici_id)
+                if satir is None or satir.silinme_tarihi is not None or satir.sonraki_beklenen is None:
+                    self.unschedule(kullanici_id)
+                    continue
+                db_beklenen = _epoch(satir.sonraki_beklenen)
+                if db_beklenen > beklenen:
+                    # Başka bir worker'da check-in/erteleme yapılmış; bellekteki zaman eski
+                    self.dogrulamada_ertelenen += 1
+                    self.schedule(kullanici_id, _tarih(db_beklenen))
+                    continue
+
+                self.gecisler[yeni_asama] += 1
+                if yeni_asama == UYARI:
+                    db.add(Bildirim(
+                        kullanici_id=kullanici_id, tip=BildirimTipi.HATIRLATMA,
+                        baslik="Check-in zamanı yaklaşıyor",
+                        icerik="Güvende olduğunuzu bildirmek için check-in yapmayı unutmayın.",
+                    ))
+                elif yeni_asama == KRITIK:
+                    db.add(Bildirim(
+                        kullanici_id=kullanici_id, tip=BildirimTipi.UYARI,
+                        baslik="Check-in süreniz doldu",
+                        icerik="Check-in yapmazsanız acil durum kişilerinize haber verilecek.",
+                    ))
+                elif yeni_asama == ALARM:
+                    alarm_id = await _alarm_olustur(db, kullanici_id, _tarih(db_beklenen))
+                    if alarm_id is not None:
+                        yeni_alarmlar.append((alarm_id, kullanici_id))
+                    else:
+                        self.tekrar_engellenen += 1
+            if yeni_alarmlar:
+                await _kisileri_bilgilendir(db, yeni_alarmlar)
+            await db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "parca": sorted(self.kiralama.sahip),
+            "parca_sayisi": self.kiralama.parca_sayisi,
+            "uye_sayisi": self.kiralama.uye_sayisi,
+            "kullanici": len(self.heap),
+            "bekleyen_gecis": self.heap.bekleyen(),
+            "bellek_mb": round(self.heap.bellek_bayt() / 1024 / 1024, 1),
+            "uyari": self.gecisler[UYARI],
+            "kritik": self.gecisler[KRITIK],
+            "alarm": self.gecisler[ALARM],
+            "dogrulamada_ertelenen": self.dogrulamada_ertelenen,
+            "tekrar_engellenen": self.tekrar_engellenen,
+            "son_tur_ms": round(self.son_tur_ms, 3),
+        }
+
+
+async def _alarm_olustur(db: AsyncSession, kullanici_id: UUID, beklenen: datetime) -> Optional[UUID]:
+    """
+    Kaçırılan beklenen zaman için otomatik alarm oluştur - tam bir kez.
+
+    (kullanici_id, beklenen_tarih) üzerindeki kısmi benzersiz indeks sayesinde parça
+    devri sırasında iki süreç aynı geçişi işlese bile yalnızca biri satır ekler.
+    """
+    result = await db.execute(
+        pg_insert(Alarm.__table__)
+        .values(
+            id=uuid4(), kullanici_id=kullanici_id, tip=AlarmTipi.OTOMATIK, durum=AlarmDurum.AKTIF,
+            mesaj="Check-in süresi aşıldı.", bilgilendirilenler=[],
+            beklenen_tarih=beklenen, tarih=datetime.utcnow(),
+        )
+        .on_conflict_do_nothing(
+            index_elements=["kullanici_id", "beklenen_tarih"],
+            index_where=text("tip = 'OTOMATIK'"),
+        )
+        .returning(Alarm.__table__.c.id)
+    )
+    alarm_id = result.scalar()
+    if alarm_id is None:
+        return None
+    db.add(Bildirim(
+        kullanici_id=kullanici_id, tip=BildirimTipi.ALARM,
+        baslik="Acil durum alarmı tetiklendi",
+        icerik="Uzun süredir check-in yapmadığınız için acil durum kişilerinize haber verildi.",
+    ))
+    return alarm_id
+
+
+async def _kisileri_bilgilendir(db: AsyncSession, alarmlar: list[tuple[UUID, UUID]]) -> None:
+    """Otomatik alarmların doğrulanmış acil durum kişilerine e-postaları alarmlarla aynı transaction'da kuyrukla"""
+    result = await db.execute(
+        select(AcilKisi.kullanici_id, AcilKisi.ad, AcilKisi.email, Kullanici.ad.label("kullanici_ad"), Kullanici.soyad)
+        .join(Kullanici, Kullanici.id == AcilKisi.kullanici_id)
+        .where(AcilKisi.kullanici_id.in_([k for _, k in alarmlar]), AcilKisi.dogrulandi == True)
+    )
+    kisiler: dict[UUID, list] = {}
+    kullanici_adlari: dict[UUID, str] = {}
+    for satir in result:
+        kisiler.setdefault(satir.kullanici_id, []).append((satir.ad, satir.email))
+        kullanici_adlari[satir.kullanici_id] = f"{satir.kullanici_ad} {satir.soyad}"
+    for alarm_id, kullanici_id in alarmlar:
+        if kullanici_id not in kisiler:
+            continue
+        bilgilendirilenler = await enqueue_alarm_notifications(
+            db, alarm_id, kisiler[kullanici_id], kullanici_adlari[kullanici_id], "Check-in süresi aşıldı."
+        )
+        await db.execute(update(Alarm).where(Alarm.id == alarm_id).values(bilgilendirilenler=bilgilendirilenler))
+
+
+alarm_zamanlayici = AlarmZamanlayici()
+
+
+def schedule_deadline(db: AsyncSession, kullanici_id: UUID, sonraki_beklenen: datetime) -> None:
+    """
+    Check-in ve erteleme endpoint'lerinden çağrılır.
+    
+    Heap transaction commit edildikten sonra güncellenir; rollback olursa
+    zamanlayıcı veritabanında hiç yazılmamış bir zamana göre kurulmaz.
+    """
+    db.sync_session.info.setdefault("zamanlanacaklar", {})[kullanici_id] = sonraki_beklenen
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_after_commit(session: Session) -> None:
+    for kullanici_id, sonraki_beklenen in session.info.pop("zamanlanacaklar", {}).items():
+        alarm_zamanlayici.schedule(kullanici_id, sonraki_beklenen)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_schedules_after_rollback(session: Session) -> None:
+    session.info.pop("zamanlanacaklar", None)
+
+
+async def alarm_scheduler_loop() -> None:
+    """Lifespan içinde çalışan zamanlayıcı görevi - parça kiralarını da periyodik olarak yeniler"""
+    son_dengeleme = 0.0
+    try:
+        while True:
+            if time.monotonic() - son_dengeleme >= settings.SCHEDULER_REBALANCE_SECONDS:
+                son_dengeleme = time.monotonic()
+                try:
+                    await alarm_zamanlayici.rebalance()
+                except Exception as e:
+                    print(f"[ZAMANLAYICI] Parça dengelemesi başarısız: {e}")
+            try:
+                islenen = await alarm_zamanlayici.tick()
+                if islenen >= settings.SCHEDULER_BATCH_SIZE:
+                    continue
+            except Exception as e:
+                print(f"[ZAMANLAYICI] Tur başarısız: {e}")
+            await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
+    finally:
+        await alarm_zamanlayici.kiralama.close()
+
+
+def get_scheduler_stats() -> dict:
+    """Zamanlayıcı durumu"""
+    return alarm_zamanlayici.stats()
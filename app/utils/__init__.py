@@ -2,19 +2,56 @@
 from app.utils.security import (
     hash_password,
     verify_password,
+    verify_and_update_password,
+    get_password_hash_stats,
     create_access_token,
     create_refresh_token,
+    hash_refresh_token,
     decode_token,
+    get_token_payload,
     get_user_id_from_token,
+    get_token_cache_stats,
+    KullaniciOzet,
+    get_current_user,
+    get_current_user_id,
+    get_current_user_row,
+    HesapOzet,
+    get_current_account,
+    get_current_account_id,
+    get_current_account_row,
+    get_token_version,
+    invalidate_user_cache,
+    revoke_access_tokens,
+    get_user_cache_stats,
     generate_otp,
 )
+from app.utils.sayfalama import encode_cursor, decode_cursor
 
 __all__ = [
     "hash_password",
     "verify_password",
+    "verify_and_update_password",
+    "get_password_hash_stats",
     "create_access_token",
     "create_refresh_token",
+    "hash_refresh_token",
     "decode_token",
+    "get_token_payload",
     "get_user_id_from_token",
+    "get_token_cache_stats",
+    "KullaniciOzet",
+    "get_current_user",
+    "get_current_user_id",
+    "get_current_user_row",
+    "HesapOzet",
+    "get_current_account",
+    "get_current_account_id",
+    "get_current_account_row",
+    "get_token_version",
+    "invalidate_user_cache",
+    "revoke_access_tokens",
+    "get_user_cache_stats",
     "generate_otp",
+    "encode_cursor",
+    "decode_cursor",
 ]
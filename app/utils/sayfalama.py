@@ -0,0 +1,24 @@
+"""
+Keyset (cursor) sayfalama yardımcıları
+"""
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+import base64
+import json
+
+
+def encode_cursor(tarih: datetime, kayit_id: UUID) -> str:
+    """(tarih, id) çiftini opak bir imlece dönüştür"""
+    veri = json.dumps({"t": tarih.isoformat(), "i": str(kayit_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(veri.encode()).decode().rstrip("=")
+
+
+def decode_cursor(imlec: str) -> Tuple[datetime, UUID]:
+    """İmleci (tarih, id) çiftine çöz - geçersizse ValueError"""
+    try:
+        dolgu = "=" * (-len(imlec) % 4)
+        veri = json.loads(base64.urlsafe_b64decode(imlec + dolgu))
+        return datetime.fromisoformat(veri["t"]), UUID(veri["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Geçersiz imleç") from e
@@ -1,37 +1,326 @@
 """
 Güvenlik yardımcı fonksiyonları - JWT, şifre hashleme vb. (Supabase uyumlu)
 """
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Optional
+import asyncio
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 import uuid
+import asyncpg
 
 from app.config import get_settings
+from app.database import KimlikDeposuHatasi, get_db, get_direct_dsn, has_direct_connection
+from app.models import Hesap, Kullanici, AbonelikTipi
 
 settings = get_settings()
 
+
+def build_pwd_context(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = settings.BCRYPT_ROUNDS,
+    argon2_time_cost: int = settings.ARGON2_TIME_COST,
+    argon2_memory_cost: int = settings.ARGON2_MEMORY_COST,
+    argon2_parallelism: int = settings.ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    Şifre hashleme context'i oluştur.
+    
+    Varsayılan şema dışındaki (ör. eski bcrypt) hash'ler ve maliyet parametreleri
+    değişmiş hash'ler `needs_update` ile yenilenmesi gereken olarak işaretlenir.
+    """
+    if scheme not in ("argon2", "bcrypt"):
+        raise ValueError(f"Desteklenmeyen şifre hash şeması: {scheme}")
+    return CryptContext(
+        schemes=["argon2", "bcrypt"],
+        default=scheme,
+        deprecated="auto",
+        argon2__type="ID",
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+        bcrypt__rounds=bcrypt_rounds,
+    )
+
+
 # Şifre hashleme için context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_pwd_context()
 
 # Bearer token şeması
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-def hash_password(password: str) -> str:
+class SifreHashMetrik:
+    """Şifre hashleme havuzu metrikleri - havuz thread'lerinden güncellenir, kilitle korunur"""
+    
+    def __init__(self):
+        self.kilit = threading.Lock()
+        self.islem = 0
+        self.reddedilen = 0
+        self.toplam_sure_sn = 0.0
+        self.max_sure_sn = 0.0
+        self.toplam_bekleme_sn = 0.0
+        self.max_bekleme_sn = 0.0
+    
+    def kaydet(self, bekleme_sn: float, sure_sn: float) -> None:
+        with self.kilit:
+            self.islem += 1
+            self.toplam_bekleme_sn += bekleme_sn
+            self.toplam_sure_sn += sure_sn
+            self.max_bekleme_sn = max(self.max_bekleme_sn, bekleme_sn)
+            self.max_sure_sn = max(self.max_sure_sn, sure_sn)
+    
+    def reddet(self) -> None:
+        with self.kilit:
+            self.reddedilen += 1
+
+
+hash_metrik = SifreHashMetrik()
+
+# bcrypt GIL'i bırakır; event loop'u bloklamamak için ayrı, boyutu sınırlı thread havuzu
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="sifre-hash",
+)
+_hash_kuyruk = 0  # Havuzdaki (bekleyen + çalışan) iş sayısı
+_hash_kuyruk_kilit = threading.Lock()
+
+
+def _hash_isi_bitti(_future) -> None:
+    # İş gerçekten bittiğinde (veya kuyruktayken iptal edildiğinde) havuz thread'inde çağrılır;
+    # istek iptal edilse de çalışan hash bitene kadar kuyrukta sayılır
+    global _hash_kuyruk
+    with _hash_kuyruk_kilit:
+        _hash_kuyruk -= 1
+
+
+async def _run_in_hash_pool(func: Callable, *args):
+    """İşi hash havuzunda çalıştır - kuyruk doluysa hemen 503 dön"""
+    global _hash_kuyruk
+    with _hash_kuyruk_kilit:
+        dolu = _hash_kuyruk >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_MAX
+        if not dolu:
+            _hash_kuyruk += 1
+    if dolu:
+        hash_metrik.reddet()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "success": False,
+                "error": {
+                    "code": "SERVER_BUSY",
+                    "message": "Sunucu şu anda yoğun. Lütfen birazdan tekrar deneyin."
+                }
+            },
+            headers={"Retry-After": "1"},
+        )
+    
+    gonderim = time.perf_counter()
+    
+    def _olcerek_calistir():
+        baslangic = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            hash_metrik.kaydet(baslangic - gonderim, time.perf_counter() - baslangic)
+    
+    try:
+        gorev = _hash_executor.submit(_olcerek_calistir)
+    except BaseException:
+        _hash_isi_bitti(None)
+        raise
+    gorev.add_done_callback(_hash_isi_bitti)
+    return await asyncio.wrap_future(gorev)
+
+
+async def hash_password(password: str) -> str:
     """Şifreyi hashle"""
-    return pwd_context.hash(password)
+    return await _run_in_hash_pool(pwd_context.hash, password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Şifreyi doğrula"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run_in_hash_pool(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Şifreyi doğrula; hash güncel politikaya uymuyorsa yeni hash'i de döndür.
+    
+    Returns:
+        (doğru mu, yeni hash veya None)
+    """
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def get_password_hash_stats() -> dict:
+    """Hash havuzu metrikleri (gecikme ve kuyruk bekleme süreleri)"""
+    with hash_metrik.kilit:
+        islem = hash_metrik.islem
+        return {
+            "sema": settings.PASSWORD_HASH_SCHEME,
+            "isci": settings.PASSWORD_HASH_WORKERS,
+            "kuyruk_siniri": settings.PASSWORD_HASH_QUEUE_MAX,
+            "kuyrukta": _hash_kuyruk,
+            "islem": islem,
+            "reddedilen": hash_metrik.reddedilen,
+            "ort_sure_ms": round(hash_metrik.toplam_sure_sn / islem * 1000, 3) if islem else 0.0,
+            "max_sure_ms": round(hash_metrik.max_sure_sn * 1000, 3),
+            "ort_bekleme_ms": round(hash_metrik.toplam_bekleme_sn / islem * 1000, 3) if islem else 0.0,
+            "max_bekleme_ms": round(hash_metrik.max_bekleme_sn * 1000, 3),
+        }
+
+
+def shutdown_password_hasher() -> None:
+    """Hash havuzunu kapat"""
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ==================== JWT CODEC ====================
+
+class TokenCodec(ABC):
+    """JWT kodlama/çözme arayüzü - router'lar yalnızca create_access_token ve decode_token'ı görür"""
+    
+    ad = "base"
+    
+    @abstractmethod
+    def encode(self, claims: dict) -> str:
+        """Claim'leri imzalı token'a çevir"""
+    
+    @abstractmethod
+    def decode(self, token: str) -> Optional[dict]:
+        """İmza ve süre doğrulanmış payload, geçersizse None"""
+
+
+class JoseTokenCodec(TokenCodec):
+    """python-jose tabanlı codec"""
+    
+    ad = "jose"
+    
+    def __init__(self, secret: str, algorithm: str):
+        self.secret = secret
+        self.algorithm = algorithm
+    
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(claims, self.secret, algorithm=self.algorithm)
+    
+    def decode(self, token: str) -> Optional[dict]:
+        try:
+            return jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except JWTError:
+            return None
+
+
+class HmacTokenCodec(TokenCodec):
+    """
+    Yalnızca HS256/384/512 için doğrudan hmac ile çalışan hızlı codec.
+    
+    Anahtarlı HMAC nesnesi ve header bir kez hazırlanır; her çağrıda sadece
+    kopyalanır. Ürettiği token'lar python-jose ile karşılıklı uyumludur.
+    """
+    
+    ad = "hmac"
+    _DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+    
+    def __init__(self, secret: str, algorithm: str):
+        if algorithm not in self._DIGESTS:
+            raise ValueError(f"HmacTokenCodec desteklemiyor: {algorithm}")
+        self.algorithm = algorithm
+        self._hmac = hmac.new(secret.encode(), digestmod=self._DIGESTS[algorithm])
+        header = json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":")).encode()
+        self._header_b64 = _b64encode(header)
+    
+    def _sign(self, signing_input: bytes) -> bytes:
+        h = self._hmac.copy()
+        h.update(signing_input)
+        return h.digest()
+    
+    def encode(self, claims: dict) -> str:
+        payload = {
+            k: calendar.timegm(v.utctimetuple()) if isinstance(v, datetime) else v
+            for k, v in claims.items()
+        }
+        signing_input = self._header_b64 + b"." + _b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        )
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode()
+    
+    def decode(self, token: str) -> Optional[dict]:
+        try:
+            signing_input, _, imza = token.encode().rpartition(b".")
+            header_b64, _, payload_b64 = signing_input.partition(b".")
+            if not header_b64 or not payload_b64:
+                return None
+            if not hmac.compare_digest(self._sign(signing_input), _b64decode(imza)):
+                return None
+            if header_b64 != self._header_b64:
+                header = json.loads(_b64decode(header_b64))
+                if header.get("alg") != self.algorithm:
+                    return None
+            payload = json.loads(_b64decode(payload_b64))
+        except (ValueError, TypeError):
+            return None
+        
+        if not isinstance(payload, dict):
+            return None
+        simdi = time.time()
+        exp = payload.get("exp")
+        if exp is not None and (not isinstance(exp, (int, float)) or exp <= simdi):
+            return None
+        nbf = payload.get("nbf")
+        if nbf is not None and (not isinstance(nbf, (int, float)) or nbf > simdi):
+            return None
+        return payload
+
+
+def _b64encode(veri: bytes) -> bytes:
+    return base64.urlsafe_b64encode(veri).rstrip(b"=")
+
+
+def _b64decode(veri: bytes) -> bytes:
+    return base64.urlsafe_b64decode(veri + b"=" * (-len(veri) % 4))
+
+
+TOKEN_CODECS = {
+    JoseTokenCodec.ad: JoseTokenCodec,
+    HmacTokenCodec.ad: HmacTokenCodec,
+}
+
 
+def build_token_codec(ad: str = settings.JWT_CODEC) -> TokenCodec:
+    """Ayarlardaki isimle codec oluştur"""
+    if ad not in TOKEN_CODECS:
+        raise ValueError(f"Bilinmeyen JWT codec: {ad}")
+    return TOKEN_CODECS[ad](settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
 
-def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
-    """Access token oluştur"""
+
+token_codec = build_token_codec()
+
+
+def create_access_token(
+    user_id: str,
+    expires_delta: Optional[timedelta] = None,
+    token_surumu: int = 0,
+    cihaz_id: Optional[str] = None,
+) -> str:
+    """Access token oluştur - `ver` claim'i kullanıcının token sürümü, `cid` giriş yapılan cihazdır"""
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -40,34 +329,118 @@ def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None)
     to_encode = {
         "sub": user_id,
         "exp": expire,
-        "type": "access"
+        "type": "access",
+        "ver": token_surumu,
     }
+    if cihaz_id:
+        to_encode["cid"] = cihaz_id
     
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
-    return encoded_jwt
+    return token_codec.encode(to_encode)
 
 
 def create_refresh_token() -> tuple[str, datetime]:
     """Refresh token oluştur - (token, geçerlilik tarihi) döner"""
-    token = str(uuid.uuid4())
+    token = secrets.token_urlsafe(32)
     gecerlilik = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     return token, gecerlilik
 
 
+def hash_refresh_token(token: str) -> str:
+    """Refresh token'ın veritabanında saklanan SHA-256 özeti"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def decode_token(token: str) -> Optional[dict]:
     """Token'ı decode et"""
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
-    except JWTError:
-        return None
+    return token_codec.decode(token)
+
+
+class TokenCache:
+    """
+    Doğrulanmış token'lar için LRU cache.
+    
+    Anahtar token'ın SHA-256 özeti, değer decode edilmiş payload'dır; kayıt token'ın
+    `exp` anında geçersiz olur. Sync dependency'ler thread havuzunda çalıştığı için kilitlidir.
+    """
+    
+    def __init__(self, max_boyut: int):
+        self.max_boyut = max_boyut
+        self.isabet = 0
+        self.iskalama = 0
+        self._kayitlar: "OrderedDict[bytes, tuple[dict, float]]" = OrderedDict()
+        self._kilit = threading.Lock()
+    
+    @staticmethod
+    def _anahtar(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, token: str) -> Optional[dict]:
+        if self.max_boyut <= 0:
+            return None
+        anahtar = self._anahtar(token)
+        with self._kilit:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is None:
+                self.iskalama += 1
+                return None
+            payload, son_gecerlilik = kayit
+            if son_gecerlilik <= time.time():
+                del self._kayitlar[anahtar]
+                self.iskalama += 1
+                return None
+            self._kayitlar.move_to_end(anahtar)
+            self.isabet += 1
+            return payload
+    
+    def put(self, token: str, payload: dict) -> None:
+        exp = payload.get("exp")
+        if self.max_boyut <= 0 or not exp:
+            return
+        anahtar = self._anahtar(token)
+        with self._kilit:
+            self._kayitlar[anahtar] = (payload, float(exp))
+            self._kayitlar.move_to_end(anahtar)
+            while len(self._kayitlar) > self.max_boyut:
+                self._kayitlar.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._kilit:
+            self._kayitlar.clear()
+    
+    def stats(self) -> dict:
+        toplam = self.isabet + self.iskalama
+        return {
+            "boyut": len(self._kayitlar),
+            "max_boyut": self.max_boyut,
+            "isabet": self.isabet,
+            "iskalama": self.iskalama,
+            "isabet_orani": round(self.isabet / toplam, 4) if toplam else 0.0,
+        }
+
 
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
 
-def get_user_id_from_token(
+
+def get_token_cache_stats() -> dict:
+    """Token cache isabet/ıskalama sayaçları"""
+    return token_cache.stats()
+
+
+def decode_token_cached(token: str) -> Optional[dict]:
+    """Token'ı cache üzerinden doğrula - geçersizse None"""
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is not None:
+            token_cache.put(token, payload)
+    return payload
+
+
+def get_token_payload(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
-) -> str:
+) -> dict:
     """
-    Token'dan kullanıcı ID'sini al
+    Bearer token'ı doğrula ve payload'ını döndür
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -84,19 +457,13 @@ def get_user_id_from_token(
     if not credentials:
         raise credentials_exception
     
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    user_id = payload.get("sub")
-    if user_id is None:
+    payload = decode_token_cached(credentials.credentials)
+    if payload is None or payload.get("sub") is None:
         raise credentials_exception
     
     # Token süresi kontrolü
     exp = payload.get("exp")
-    if exp and datetime.utcfromtimestamp(exp) < datetime.utcnow():
+    if exp and exp < time.time():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={
@@ -109,10 +476,380 @@ def get_user_id_from_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return user_id
+    return payload
+
+
+def get_user_id_from_token(payload: dict = Depends(get_token_payload)) -> str:
+    """
+    Token'dan kullanıcı ID'sini al (yalnızca imza ve süre kontrolü; token sürümü
+    kontrolü için get_current_user kullanılmalı)
+    """
+    return payload["sub"]
+
+
+# ==================== MEVCUT KULLANICI ====================
+
+@dataclass(frozen=True, slots=True)
+class KullaniciOzet:
+    """Sık kullanılan endpoint'ler için kullanıcı satırının değişmez, hafif kopyası"""
+    id: uuid.UUID
+    hesap_id: uuid.UUID
+    ad: str
+    soyad: str
+    abonelik_tipi: AbonelikTipi
+    checkin_suresi_saat: int
+    silinme_tarihi: Optional[datetime]
+    # Oturum alanları profilden değil `users` hesabından okunur
+    is_active: bool
+    token_surumu: int
+
+
+@dataclass(frozen=True, slots=True)
+class HesapOzet:
+    """Supabase `users` satırının oturum kontrolü için gereken kısmı"""
+    id: uuid.UUID
+    is_active: bool
+    token_surumu: int
+
+
+class KullaniciCache:
+    """Kullanıcı (veya hesap) özetleri için süreç içi TTL + LRU cache - anahtar hesap (users) ID'sidir"""
+    
+    def __init__(self, max_boyut: int, ttl_sn: float):
+        self.max_boyut = max_boyut
+        self.ttl_sn = ttl_sn
+        self.isabet = 0
+        self.iskalama = 0
+        self._kayitlar: "OrderedDict[uuid.UUID, tuple[KullaniciOzet | HesapOzet, float]]" = OrderedDict()
+    
+    def get(self, kullanici_id: uuid.UUID) -> Optional[KullaniciOzet | HesapOzet]:
+        kayit = self._kayitlar.get(kullanici_id)
+        if kayit is None or kayit[1] <= time.monotonic():
+            self._kayitlar.pop(kullanici_id, None)
+            self.iskalama += 1
+            return None
+        self._kayitlar.move_to_end(kullanici_id)
+        self.isabet += 1
+        return kayit[0]
+    
+    def put(self, kullanici_id: uuid.UUID, ozet: KullaniciOzet | HesapOzet) -> None:
+        if self.max_boyut <= 0 or self.ttl_sn <= 0:
+            return
+        self._kayitlar[kullanici_id] = (ozet, time.monotonic() + self.ttl_sn)
+        self._kayitlar.move_to_end(kullanici_id)
+        while len(self._kayitlar) > self.max_boyut:
+            self._kayitlar.popitem(last=False)
+    
+    def invalidate(self, kullanici_id: uuid.UUID) -> None:
+        self._kayitlar.pop(kullanici_id, None)
+    
+    def clear(self) -> None:
+        self._kayitlar.clear()
+    
+    def stats(self) -> dict:
+        toplam = self.isabet + self.iskalama
+        return {
+            "boyut": len(self._kayitlar),
+            "max_boyut": self.max_boyut,
+            "ttl_sn": self.ttl_sn,
+            "isabet": self.isabet,
+            "iskalama": self.iskalama,
+            "isabet_orani": round(self.isabet / toplam, 4) if toplam else 0.0,
+        }
+
+
+user_cache = KullaniciCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+hesap_cache = KullaniciCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+_OZET_KOLONLARI = (
+    Kullanici.id, Kullanici.hesap_id, Kullanici.ad, Kullanici.soyad, Kullanici.abonelik_tipi,
+    Kullanici.checkin_suresi_saat, Kullanici.silinme_tarihi, Hesap.is_active, Hesap.token_surumu,
+)
+_HESAP_KOLONLARI = (Hesap.id, Hesap.is_active, Hesap.token_surumu)
+
+
+def _cache_invalidate(kullanici_id: uuid.UUID) -> None:
+    user_cache.invalidate(kullanici_id)
+    hesap_cache.invalidate(kullanici_id)
+
+
+def _cache_clear() -> None:
+    user_cache.clear()
+    hesap_cache.clear()
+
+
+def invalidate_user_cache(db: AsyncSession, kullanici_id: uuid.UUID) -> None:
+    """
+    Kullanıcı veya hesap satırına yazan endpoint'lerde hesap (users) ID'si ile çağrılır.
+    
+    Kayıt hemen silinir ve transaction commit edildikten sonra bir kez daha silinir;
+    böylece commit'ten önce araya giren bir istek eski değeri cache'e geri yazamaz.
+    Diğer worker'lar aynı transaction içinde gönderilen NOTIFY ile haberdar edilir.
+    """
+    _cache_invalidate(kullanici_id)
+    db.sync_session.info.setdefault("gecersiz_kullanicilar", set()).add(kullanici_id)
+
+
+def revoke_access_tokens(db: AsyncSession, hesap: Hesap) -> None:
+    """
+    Hesaba şimdiye kadar verilmiş tüm access token'ları geçersiz kıl.
+    
+    `users.token_surumu` artırılır; eski `ver` claim'li token'lar get_current_user /
+    get_current_account'ta reddedilir.
+    """
+    hesap.token_surumu = (hesap.token_surumu or 0) + 1
+    invalidate_user_cache(db, hesap.id)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session: Session) -> None:
+    # pg_notify transaction'a bağlıdır: bildirim yalnızca commit başarılı olursa gider
+    kullanici_idleri = session.info.get("gecersiz_kullanicilar")
+    if kullanici_idleri and settings.USER_CACHE_NOTIFY_CHANNEL:
+        session.execute(
+            text("SELECT pg_notify(:kanal, :veri)"),
+            {"kanal": settings.USER_CACHE_NOTIFY_CHANNEL, "veri": ",".join(map(str, kullanici_idleri))},
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for kullanici_id in session.info.pop("gecersiz_kullanicilar", ()):
+        _cache_invalidate(kullanici_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("gecersiz_kullanicilar", None)
+
+
+def _on_user_cache_notify(conn, pid, kanal: str, veri: str) -> None:
+    for parca in veri.split(","):
+        try:
+            _cache_invalidate(uuid.UUID(parca))
+        except ValueError:
+            continue
+
+
+async def user_cache_listener_loop() -> None:
+    """
+    Lifespan içinde çalışan LISTEN görevi - diğer worker'ların commit ettiği
+    kullanıcı değişikliklerini (ör. token sürümü artışı) yerel cache'e uygular.
+    
+    Bağlantı koptuğunda kaçırılan bildirimler bilinemeyeceği için cache temizlenir.
+    """
+    kanal = settings.USER_CACHE_NOTIFY_CHANNEL
+    if not kanal or settings.USER_CACHE_SIZE <= 0:
+        return
+    if not has_direct_connection():
+        print("[CACHE] DIRECT_DATABASE_URL yok (PgBouncer) - dinleyici kapalı, cache yalnızca TTL ile yenilenir")
+        return
+    dsn = get_direct_dsn()
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            await conn.add_listener(kanal, _on_user_cache_notify)
+            _cache_clear()
+            while not conn.is_closed():
+                await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            if conn is not None:
+                conn.terminate()
+            raise
+        except Exception as e:
+            print(f"[CACHE] Kullanıcı cache dinleyicisi bağlanamadı: {e}")
+        if conn is not None and not conn.is_closed():
+            conn.terminate()
+        _cache_clear()
+        await asyncio.sleep(5)
+
+
+def get_user_cache_stats() -> dict:
+    """Kullanıcı ve hesap cache'lerinin isabet/ıskalama sayaçları"""
+    return {**user_cache.stats(), "hesap": hesap_cache.stats()}
+
+
+def _kullanici_bulunamadi() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail={
+            "success": False,
+            "error": {
+                "code": "UNAUTHORIZED",
+                "message": "Kullanıcı bulunamadı."
+            }
+        },
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_iptal_edildi() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail={
+            "success": False,
+            "error": {
+                "code": "TOKEN_REVOKED",
+                "message": "Oturumunuz sonlandırıldı. Lütfen tekrar giriş yapın."
+            }
+        },
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _hesap_devre_disi() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail={
+            "success": False,
+            "error": {
+                "code": "ACCOUNT_INACTIVE",
+                "message": "Hesabınız devre dışı."
+            }
+        },
+    )
+
+
+def _parse_user_id(user_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(user_id)
+    except ValueError:
+        raise _kullanici_bulunamadi()
+
+
+def _check_token_version(payload: dict, token_surumu: int) -> None:
+    # `ver` claim'i olmayan eski token'lar sürüm 0 sayılır
+    if payload.get("ver", 0) < token_surumu:
+        raise _token_iptal_edildi()
+
+
+async def _load_user_summary(db: AsyncSession, hesap_id: uuid.UUID) -> Optional[KullaniciOzet]:
+    ozet = user_cache.get(hesap_id)
+    if ozet is not None:
+        return ozet
+    
+    result = await db.execute(
+        select(*_OZET_KOLONLARI)
+        .join(Hesap, Hesap.id == Kullanici.hesap_id)
+        .where(Kullanici.hesap_id == hesap_id)
+    )
+    satir = result.one_or_none()
+    if satir is None:
+        return None
+    
+    ozet = KullaniciOzet(**{**satir._mapping, "is_active": bool(satir.is_active)})
+    user_cache.put(hesap_id, ozet)
+    return ozet
+
+
+async def _load_account_summary(db: AsyncSession, kullanici_id: uuid.UUID) -> Optional[HesapOzet]:
+    ozet = hesap_cache.get(kullanici_id)
+    if ozet is not None:
+        return ozet
+    
+    result = await db.execute(select(*_HESAP_KOLONLARI).where(Hesap.id == kullanici_id))
+    satir = result.one_or_none()
+    if satir is None:
+        return None
+    
+    ozet = HesapOzet(id=satir.id, is_active=bool(satir.is_active), token_surumu=satir.token_surumu)
+    hesap_cache.put(kullanici_id, ozet)
+    return ozet
+
+
+async def get_token_version(db: AsyncSession, kullanici_id: uuid.UUID) -> int:
+    """
+    Yeni access token'a yazılacak güncel token sürümü (cache'den, yoksa `users` tablosundan).
+    
+    Token yalnızca PostgREST ile bulunmuş bir hesap için üretilir; satır SQL tarafında
+    yoksa iki bağlantı farklı veritabanlarına bakıyordur ve sessizce 0 dönülmez.
+    """
+    ozet = await _load_account_summary(db, kullanici_id)
+    if ozet is None:
+        raise KimlikDeposuHatasi(f"users tablosunda hesap bulunamadı: {kullanici_id}")
+    return ozet.token_surumu
+
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> KullaniciOzet:
+    """
+    Giriş yapmış kullanıcının özeti - cache'de varsa veritabanına gidilmez.
+    
+    Token'ın `sub`'ı Supabase `users` kimliğidir; uygulama profili (`kullanicilar`)
+    `hesap_id` ile bulunur. Özetin `id`'si check-in/alarm tablolarının bağlı olduğu
+    profil ID'sidir. Token sürümü ve aktiflik, /login'in `ver` claim'ini aldığı
+    `users` satırından okunur ve cache'deki özetle karşılaştırılır; iptal kontrolü
+    ek sorgu gerektirmez.
+    """
+    ozet = await _load_user_summary(db, _parse_user_id(payload["sub"]))
+    if ozet is None:
+        raise _kullanici_bulunamadi()
+    _check_token_version(payload, ozet.token_surumu)
+    if not ozet.is_active:
+        raise _hesap_devre_disi()
+    return ozet
+
+
+async def get_current_user_id(kullanici: KullaniciOzet = Depends(get_current_user)) -> str:
+    """Token sürümü doğrulanmış kullanıcı ID'si - yalnızca ID'ye ihtiyaç duyan router'lar için"""
+    return str(kullanici.id)
+
+
+async def get_current_account(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> HesapOzet:
+    """
+    /login'in token verdiği Supabase `users` hesabının özeti - token sürümü ve
+    aktiflik bu özetle kontrol edilir, cache'de varsa veritabanına gidilmez.
+    """
+    ozet = await _load_account_summary(db, _parse_user_id(payload["sub"]))
+    if ozet is None:
+        raise _kullanici_bulunamadi()
+    _check_token_version(payload, ozet.token_surumu)
+    if not ozet.is_active:
+        raise _hesap_devre_disi()
+    return ozet
+
+
+async def get_current_account_id(hesap: HesapOzet = Depends(get_current_account)) -> str:
+    """Token sürümü doğrulanmış hesap ID'si - Supabase tablolarıyla çalışan router'lar için"""
+    return str(hesap.id)
+
+
+async def get_current_user_row(
+    ozet: KullaniciOzet = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Kullanici:
+    """
+    Giriş yapmış kullanıcının tam profil satırı (ORM nesnesi) - profil işlemleri için.
+    Token sürümü ve aktiflik get_current_user'da kontrol edilir.
+    """
+    kullanici = await db.get(Kullanici, ozet.id)
+    if kullanici is None:
+        raise _kullanici_bulunamadi()
+    return kullanici
+
+
+async def get_current_account_row(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> Hesap:
+    """
+    Giriş yapmış hesabın `users` satırı (ORM nesnesi) - e-posta doğrulama, şifre ve hesap işlemleri için
+    """
+    hesap = await db.get(Hesap, _parse_user_id(payload["sub"]))
+    if hesap is None:
+        raise _kullanici_bulunamadi()
+    _check_token_version(payload, hesap.token_surumu)
+    if not hesap.is_active:
+        raise _hesap_devre_disi()
+    return hesap
 
 
 def generate_otp(length: int = 6) -> str:
-    """OTP kodu oluştur"""
-    import random
-    return ''.join([str(random.randint(0, 9)) for _ in range(length)])
+    """OTP kodu oluştur (kriptografik olarak güvenli rastgelelik)"""
+    return f"{secrets.randbelow(10 ** length):0{length}d}"
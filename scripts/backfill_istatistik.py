@@ -0,0 +1,26 @@
+"""
+kullanici_istatistik tablosunu mevcut check-in verisinden doldur
+
+Kullanım:
+    python scripts/backfill_istatistik.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import AsyncSessionLocal, close_db
+from app.services.istatistik_service import backfill_checkin_stats
+
+
+async def main() -> None:
+    async with AsyncSessionLocal() as db:
+        adet = await backfill_checkin_stats(db)
+        await db.commit()
+    await close_db()
+    print(f"✅ {adet} kullanıcının istatistikleri güncellendi.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
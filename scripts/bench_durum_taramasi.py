@@ -0,0 +1,117 @@
+"""
+Vektörel durum taramasını kullanıcı başına Python sınıflandırmasıyla karşılaştır
+
+Sentetik kullanıcılar tarama servisindeki gibi ID sırasıyla parça parça NumPy
+dizilerine alınır ve iki tarama yapılır: ilki önceki durumu kurar, ikincisi bir dakika sonra
+bir kısmı check-in yapmış kullanıcılar üzerinde yalnızca değişenleri üretir.
+Veri üretimi ve veritabanı okuması ölçüme dahil değildir; Python referansı
+`classify_status` ile bir örneklem üzerinde ölçülüp ölçeklenir.
+
+Kullanım:
+    python scripts/bench_durum_taramasi.py --kullanici 1000000 10000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.durum_service import DURUMLAR, classify_status
+from app.services.tarama_service import DurumTaramasi, classify_batch
+
+SURELER = np.array([12, 24, 24, 24, 48], dtype=np.float64)
+
+
+def parca_uret(tohum: int, adet: int, simdi: float, checkin_orani: float, tur: int, parca_sayisi: int = 1):
+    """
+    Aynı tohumla aynı kullanıcıları üret; ikinci turda bir kısmı yeni check-in yapmış olur.
+    ID'ler parça içinde sıralı ve parçalar ID uzayını sırayla böler (ORDER BY kullanici_id).
+    """
+    rng = np.random.default_rng(tohum)
+    genislik = 2**64 // parca_sayisi
+    ikili = np.empty((adet, 2), dtype=">u8")
+    ikili[:, 0] = np.sort(rng.integers(0, genislik, adet, dtype=np.uint64) + np.uint64(tohum * genislik))
+    ikili[:, 1] = rng.integers(0, 2**64 - 1, adet, dtype=np.uint64)
+    idler = ikili.reshape(-1).view("S16")
+    sure_saat = SURELER[rng.integers(0, len(SURELER), adet)]
+    # Çoğunluk süresi içinde, küçük bir kısım gecikmiş
+    gecikmis = rng.random(adet) < 0.05
+    yas = np.where(gecikmis, rng.uniform(1.0, 3.0, adet), rng.uniform(0.0, 1.0, adet)) * sure_saat * 3600
+    son_checkin = simdi - yas
+    if tur > 0:
+        yeni = np.random.default_rng(tohum + tur).random(adet) < checkin_orani
+        son_checkin[yeni] = simdi
+    return idler, son_checkin + sure_saat * 3600
+
+
+def tara(tarama: DurumTaramasi, kullanici: int, parca: int, simdi: float, checkin_orani: float, tur: int):
+    tarama.baslat()
+    gecen = 0.0
+    degisen = 0
+    parca_sayisi = -(-kullanici // parca)
+    for i, baslangic in enumerate(range(0, kullanici, parca)):
+        adet = min(parca, kullanici - baslangic)
+        idler, beklenen = parca_uret(i, adet, simdi, checkin_orani, tur, parca_sayisi)
+        t0 = time.perf_counter()
+        degisenler = tarama.parca(idler, beklenen, simdi)
+        gecen += time.perf_counter() - t0
+        degisen += len(degisenler[0])
+    t0 = time.perf_counter()
+    tarama.tamamla()
+    gecen += time.perf_counter() - t0
+    return gecen, degisen
+
+
+def python_hizi(ornek: int, simdi: float) -> float:
+    """Kullanıcı başına datetime aritmetiğiyle saniyedeki sınıflandırma"""
+    _, beklenen = parca_uret(0, ornek, simdi, 0.0, 0)
+    satirlar = [datetime.utcfromtimestamp(zaman) for zaman in beklenen.tolist()]
+    simdi_dt = datetime.utcfromtimestamp(simdi)
+    t0 = time.perf_counter()
+    for zaman in satirlar:
+        classify_status(zaman, simdi_dt)
+    return ornek / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--kullanici", type=int, nargs="+", default=[1_000_000, 10_000_000],
+                        help="Taranacak kullanıcı sayıları")
+    parser.add_argument("--parca", type=int, default=50000, help="Parça boyutu (SWEEP_CHUNK)")
+    parser.add_argument("--checkin-orani", type=float, default=0.02,
+                        help="İki tarama arasında check-in yapan kullanıcı oranı")
+    parser.add_argument("--python-ornek", type=int, default=200000,
+                        help="Python referansı için ölçülen kullanıcı sayısı")
+    args = parser.parse_args()
+
+    simdi = time.time()
+    # Uyumluluk: vektörel sonuç classify_status ile aynı olmalı
+    _, beklenen_dizisi = parca_uret(0, 20000, simdi, 0.0, 0)
+    vektorel = classify_batch(beklenen_dizisi, simdi)
+    simdi_dt = datetime.utcfromtimestamp(simdi)
+    for zaman, durum in zip(beklenen_dizisi.tolist(), vektorel.tolist()):
+        beklenen = datetime.utcfromtimestamp(zaman)
+        if classify_status(beklenen, simdi_dt) != DURUMLAR[durum]:
+            raise SystemExit(f"Uyumsuz sınıflandırma: {beklenen} -> {DURUMLAR[durum]}")
+    print("classify_status uyumluluğu: OK\n")
+
+    py_hiz = python_hizi(args.python_ornek, simdi)
+    print(f"Python (kullanıcı başına): {py_hiz:,.0f} kullanıcı/sn\n")
+
+    print(f"{'kullanıcı':>12}{'1. tarama ms':>15}{'2. tarama ms':>15}{'değişen':>10}"
+          f"{'kullanıcı/sn':>16}{'Python ms':>12}{'durum MB':>10}")
+    for kullanici in args.kullanici:
+        tarama = DurumTaramasi()
+        ilk, _ = tara(tarama, kullanici, args.parca, simdi, args.checkin_orani, 0)
+        ikinci, degisen = tara(tarama, kullanici, args.parca, simdi + 60, args.checkin_orani, 1)
+        print(f"{kullanici:>12,}{ilk * 1000:>15,.0f}{ikinci * 1000:>15,.0f}{degisen:>10,}"
+              f"{kullanici / ikinci:>16,.0f}{kullanici / py_hiz * 1000:>12,.0f}"
+              f"{tarama.bellek_bayt() / 1024 / 1024:>10,.1f}")
+
+
+if __name__ == "__main__":
+    main()
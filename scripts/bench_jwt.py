@@ -0,0 +1,75 @@
+"""
+JWT codec'lerinin encode/decode hızını karşılaştır
+
+Her codec için aynı claim'lerle access token üretir ve doğrular, saniyedeki
+işlem sayısını raporlar. Ölçümden önce codec'lerin birbirinin token'larını
+çözebildiği (claim uyumluluğu) kontrol edilir.
+
+Kullanım:
+    python scripts/bench_jwt.py --tekrar 20000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.security import TOKEN_CODECS
+
+GIZLI_ANAHTAR = "bench-gizli-anahtar"
+ALGORITMA = "HS256"
+
+
+def _claimler() -> dict:
+    return {
+        "sub": "6f1c2a4e-8d3b-4c5a-9e7f-0a1b2c3d4e5f",
+        "exp": datetime.utcnow() + timedelta(minutes=30),
+        "type": "access",
+    }
+
+
+def uyumluluk_kontrol(codecler: dict) -> None:
+    """Her codec'in ürettiği token'ı diğer tüm codec'ler aynı claim'lerle çözmeli"""
+    for uretici_ad, uretici in codecler.items():
+        token = uretici.encode(_claimler())
+        beklenen = None
+        for cozucu_ad, cozucu in codecler.items():
+            payload = cozucu.decode(token)
+            if payload is None:
+                raise SystemExit(f"{cozucu_ad}, {uretici_ad} token'ını çözemedi")
+            if beklenen is not None and payload != beklenen:
+                raise SystemExit(f"{cozucu_ad} ile {uretici_ad} claim'leri farklı: {payload} != {beklenen}")
+            beklenen = payload
+
+
+def olc(fonksiyon, tekrar: int) -> float:
+    baslangic = time.perf_counter()
+    for _ in range(tekrar):
+        fonksiyon()
+    return tekrar / (time.perf_counter() - baslangic)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tekrar", type=int, default=20000, help="Codec başına işlem sayısı")
+    args = parser.parse_args()
+
+    codecler = {ad: sinif(GIZLI_ANAHTAR, ALGORITMA) for ad, sinif in TOKEN_CODECS.items()}
+    uyumluluk_kontrol(codecler)
+    print(f"Claim uyumluluğu: OK ({', '.join(codecler)})\n")
+
+    print(f"{'codec':<8}{'encode/sn':>14}{'decode/sn':>14}")
+    for ad, codec in codecler.items():
+        claimler = _claimler()
+        token = codec.encode(claimler)
+        encode_hiz = olc(lambda: codec.encode(claimler), args.tekrar)
+        decode_hiz = olc(lambda: codec.decode(token), args.tekrar)
+        print(f"{ad:<8}{encode_hiz:>14,.0f}{decode_hiz:>14,.0f}")
+
+    print("\nSeçim için .env: JWT_CODEC=<codec>")
+
+
+if __name__ == "__main__":
+    main()
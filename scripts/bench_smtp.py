@@ -0,0 +1,169 @@
+"""
+SMTP gönderim benchmark'ı - mesaj başına bağlantı vs. bağlantı havuzu
+
+Yerel bir aiosmtpd sunucusu (varsayılan olarak üretimdeki gibi STARTTLS + AUTH
+zorunlu, komut başına yapay gecikmeli) başlatır ve aynı mesajları önce her mesajda yeni bağlantı açarak
+(`aiosmtplib.send`), sonra `SMTPHavuzu` üzerinden gönderip saniyedeki mesaj
+sayısını raporlar. TCP/TLS el sıkışmasının kendi gecikmesi taklit edilmez;
+gerçek sunucularda fark daha büyüktür.
+
+Kullanım:
+    python scripts/bench_smtp.py --mesaj 500 --eszamanlilik 10 --havuz 5 --rtt-ms 5
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import socket
+import ssl
+import sys
+import tempfile
+import time
+from email.mime.text import MIMEText
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.email_service import SMTPHavuzu
+
+KULLANICI = "bench"
+SIFRE = "bench-sifre"
+
+
+class _Sunucu:
+    """Mesajları sayan, her komuta sabit gecikme ekleyen aiosmtpd handler'ı"""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.alinan = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.rtt)
+        session.host_name = hostname
+        return responses
+
+    async def handle_MAIL(self, server, session, envelope, address, mail_options):
+        await asyncio.sleep(self.rtt)
+        envelope.mail_from = address
+        envelope.mail_options.extend(mail_options)
+        return "250 OK"
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        await asyncio.sleep(self.rtt)
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.rtt)
+        self.alinan += 1
+        return "250 Message accepted for delivery"
+
+
+def _dogrula(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=auth_data.login == KULLANICI.encode() and auth_data.password == SIFRE.encode())
+
+
+def _tls_baglami(dizin: str) -> ssl.SSLContext:
+    """Geçici self-signed sertifika üret"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    anahtar = ec.generate_private_key(ec.SECP256R1())
+    isim = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    simdi = datetime.datetime.now(datetime.timezone.utc)
+    sertifika = (
+        x509.CertificateBuilder()
+        .subject_name(isim).issuer_name(isim)
+        .public_key(anahtar.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(simdi).not_valid_after(simdi + datetime.timedelta(days=1))
+        .sign(anahtar, hashes.SHA256())
+    )
+    sertifika_yolu = os.path.join(dizin, "sertifika.pem")
+    anahtar_yolu = os.path.join(dizin, "anahtar.pem")
+    with open(sertifika_yolu, "wb") as f:
+        f.write(sertifika.public_bytes(serialization.Encoding.PEM))
+    with open(anahtar_yolu, "wb") as f:
+        f.write(anahtar.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    baglam = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    baglam.load_cert_chain(sertifika_yolu, anahtar_yolu)
+    return baglam
+
+
+def _bos_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _mesaj(i: int) -> MIMEText:
+    mesaj = MIMEText(f"Bench mesajı {i}\n" + "x" * 2000, "plain", "utf-8")
+    mesaj["From"] = "noreply@oldunmu.test"
+    mesaj["To"] = f"alici{i}@oldunmu.test"
+    mesaj["Subject"] = "Bench"
+    return mesaj
+
+
+async def _olc(gonder, mesaj: int, eszamanlilik: int) -> float:
+    sinir = asyncio.Semaphore(eszamanlilik)
+
+    async def bir(i: int):
+        async with sinir:
+            await gonder(_mesaj(i))
+
+    baslangic = time.perf_counter()
+    await asyncio.gather(*(bir(i) for i in range(mesaj)))
+    return mesaj / (time.perf_counter() - baslangic)
+
+
+async def main(args: argparse.Namespace) -> None:
+    sunucu = _Sunucu(args.rtt_ms / 1000)
+    with tempfile.TemporaryDirectory() as dizin:
+        secenekler = {}
+        istemci_ayarlari = {"hostname": "127.0.0.1", "timeout": 30, "start_tls": False}
+        if args.tls:
+            secenekler = {
+                "tls_context": _tls_baglami(dizin), "require_starttls": True,
+                "authenticator": _dogrula, "auth_require_tls": True,
+            }
+            istemci_ayarlari.update(start_tls=True, validate_certs=False, username=KULLANICI, password=SIFRE)
+        istemci_ayarlari["port"] = _bos_port()
+        controller = Controller(sunucu, hostname="127.0.0.1", port=istemci_ayarlari["port"], server_kwargs=secenekler)
+        controller.start()
+        try:
+            async def tek_baglanti(mesaj):
+                await aiosmtplib.send(mesaj, **istemci_ayarlari)
+
+            havuz = SMTPHavuzu(args.havuz, **istemci_ayarlari)
+            await havuz.warm()
+
+            once = await _olc(tek_baglanti, args.mesaj, args.eszamanlilik)
+            sonra = await _olc(havuz.send, args.mesaj, args.eszamanlilik)
+            havuz_durumu = havuz.stats()
+            await havuz.close()
+        finally:
+            controller.stop()
+
+    print(f"mesaj={args.mesaj} eşzamanlılık={args.eszamanlilik} havuz={args.havuz} "
+          f"rtt={args.rtt_ms}ms tls={'açık' if args.tls else 'kapalı'}")
+    print(f"  mesaj başına bağlantı : {once:8.1f} mesaj/sn")
+    print(f"  bağlantı havuzu       : {sonra:8.1f} mesaj/sn  ({sonra / once:.1f}x)")
+    print(f"  sunucunun aldığı      : {sunucu.alinan} (beklenen {2 * args.mesaj})")
+    print(f"  havuz                 : {havuz_durumu}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mesaj", type=int, default=500)
+    parser.add_argument("--eszamanlilik", type=int, default=10, help="ALARM_FANOUT_CONCURRENCY")
+    parser.add_argument("--havuz", type=int, default=5, help="SMTP_POOL_SIZE")
+    parser.add_argument("--rtt-ms", type=int, default=5, help="Sunucu tarafında komut başına gecikme")
+    parser.add_argument("--tls", action=argparse.BooleanOptionalAction, default=True, help="STARTTLS + AUTH zorunlu")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Supabase veri yolu benchmark'ı - senkron vs. asenkron client
+
+Yerel bir PostgREST taklidi (sabit gecikmeli) başlatır ve tek bir event loop
+(= tek uvicorn worker) üzerinde eşzamanlı "handler"ları çalıştırarak saniyedeki
+istek sayısını ölçer.
+
+Kullanım:
+    python scripts/bench_supabase.py --istek 400 --eszamanlilik 50 --gecikme-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _PostgrestStub(BaseHTTPRequestHandler):
+    gecikme = 0.02
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.gecikme)
+        body = json.dumps([{"id": "00000000-0000-0000-0000-000000000000"}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub(gecikme: float) -> ThreadingHTTPServer:
+    _PostgrestStub.gecikme = gecikme
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PostgrestStub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _run(handler, istek: int, eszamanlilik: int) -> float:
+    sem = asyncio.Semaphore(eszamanlilik)
+
+    async def one():
+        async with sem:
+            await handler()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(istek)))
+    return istek / (time.perf_counter() - start)
+
+
+async def main(istek: int, eszamanlilik: int, gecikme_ms: int) -> None:
+    server = _start_stub(gecikme_ms / 1000)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["SUPABASE_URL"] = url
+
+    from supabase import create_client
+    from app import database
+
+    database.settings.SUPABASE_URL = url
+    key = database.settings.SUPABASE_KEY
+
+    sync_client = create_client(url, key)
+
+    async def sync_handler():
+        # Eski davranış: async handler içinde bloklayan çağrı
+        sync_client.table("users").select("id").eq("email", "a@b.c").execute()
+
+    async_client = await database.init_supabase()
+
+    async def async_handler():
+        await async_client.table("users").select("id").eq("email", "a@b.c").execute()
+
+    once = await _run(sync_handler, istek, eszamanlilik)
+    sonra = await _run(async_handler, istek, eszamanlilik)
+    await database.close_supabase()
+    server.shutdown()
+
+    print(f"istek={istek} eşzamanlılık={eszamanlilik} gecikme={gecikme_ms}ms")
+    print(f"  senkron client : {once:8.1f} istek/sn")
+    print(f"  async client   : {sonra:8.1f} istek/sn  ({sonra / once:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--istek", type=int, default=400)
+    parser.add_argument("--eszamanlilik", type=int, default=50)
+    parser.add_argument("--gecikme-ms", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.istek, args.eszamanlilik, args.gecikme_ms))
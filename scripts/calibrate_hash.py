@@ -0,0 +1,77 @@
+"""
+Şifre hash maliyetini bu makineye göre kalibre et
+
+Hedef doğrulama süresine (ms) ulaşana kadar argon2id için time_cost'u
+(verilen bellek ve paralellikle), bcrypt için rounds değerini artırır ve
+.env'e yazılacak ayarları önerir.
+
+Kullanım:
+    python scripts/calibrate_hash.py --hedef-ms 250 --argon2-bellek 65536 --argon2-paralellik 2
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passlib.hash import argon2, bcrypt
+
+ORNEK_SIFRE = "Kalibrasyon-Sifre-123"
+
+
+def _dogrulama_suresi_ms(handler, tekrar: int) -> float:
+    hashed = handler.hash(ORNEK_SIFRE)
+    sureler = []
+    for _ in range(tekrar):
+        baslangic = time.perf_counter()
+        handler.verify(ORNEK_SIFRE, hashed)
+        sureler.append((time.perf_counter() - baslangic) * 1000)
+    return statistics.median(sureler)
+
+
+def kalibre_argon2(hedef_ms: float, bellek: int, paralellik: int, tekrar: int) -> int:
+    time_cost = 1
+    while True:
+        handler = argon2.using(type="ID", time_cost=time_cost, memory_cost=bellek, parallelism=paralellik)
+        sure = _dogrulama_suresi_ms(handler, tekrar)
+        print(f"  argon2id t={time_cost:<3} m={bellek} p={paralellik}: {sure:8.1f} ms")
+        if sure >= hedef_ms or time_cost >= 32:
+            return time_cost
+        time_cost += 1
+
+
+def kalibre_bcrypt(hedef_ms: float, tekrar: int) -> int:
+    rounds = 10
+    while True:
+        sure = _dogrulama_suresi_ms(bcrypt.using(rounds=rounds), tekrar)
+        print(f"  bcrypt rounds={rounds:<3}: {sure:8.1f} ms")
+        if sure >= hedef_ms or rounds >= 16:
+            return rounds
+        rounds += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hedef-ms", type=float, default=250.0, help="Hedef doğrulama süresi (ms)")
+    parser.add_argument("--argon2-bellek", type=int, default=65536, help="argon2 memory_cost (KiB)")
+    parser.add_argument("--argon2-paralellik", type=int, default=2)
+    parser.add_argument("--tekrar", type=int, default=3, help="Her ölçüm için tekrar sayısı")
+    args = parser.parse_args()
+
+    print(f"Hedef doğrulama süresi: {args.hedef_ms:.0f} ms")
+    print("argon2id:")
+    time_cost = kalibre_argon2(args.hedef_ms, args.argon2_bellek, args.argon2_paralellik, args.tekrar)
+    print("bcrypt:")
+    rounds = kalibre_bcrypt(args.hedef_ms, args.tekrar)
+
+    print("\nÖnerilen .env ayarları:")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={args.argon2_bellek}")
+    print(f"ARGON2_PARALLELISM={args.argon2_paralellik}")
+    print(f"BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Supabase yazma yollarının istek sayısı kontrolü
+
+Register ve kişi yazma handler'larını httpx MockTransport üzerinden çalıştırır,
+PostgREST'e giden istekleri endpoint başına sayar ve her yolun beklenen sayıda
+(tek) istekle tamamlandığını doğrular. Başarılı yazma, UNIQUE ihlali (409) ve
+bulunamayan kayıt senaryolarını kapsar. Beklenenden fazla istek atılırsa sıfır
+olmayan çıkış koduyla biter.
+
+Kullanım:
+    python scripts/check_round_trips.py
+"""
+import asyncio
+import json
+import os
+import sys
+import uuid
+from collections import Counter
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+URL = "http://postgrest.test"
+_UNIQUE_HATASI = {"code": "23505", "message": "duplicate key value violates unique constraint", "details": None, "hint": None}
+
+
+class _PostgrestTaklidi:
+    """Senaryoya göre yanıt veren ve istekleri (method, tablo) başına sayan taklit"""
+
+    def __init__(self):
+        self.sayac: Counter = Counter()
+        self.senaryo = "basarili"
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        tablo = request.url.path.rsplit("/", 1)[-1]
+        self.sayac[(request.method, tablo)] += 1
+        if self.senaryo == "tekrar":
+            return httpx.Response(409, json=_UNIQUE_HATASI)
+        if self.senaryo == "bos":
+            return httpx.Response(200, json=[])
+        satir = {"id": str(uuid.uuid4()), "user_id": str(uuid.uuid4())}
+        if request.content:
+            govde = json.loads(request.content)
+            satir.update(govde if isinstance(govde, dict) else govde[0])
+        satir.setdefault("created_at", "2024-01-01T00:00:00")
+        satir.setdefault("updated_at", "2024-01-01T00:00:00")
+        return httpx.Response(201 if request.method == "POST" else 200, json=[satir])
+
+
+async def _say(taklit: _PostgrestTaklidi, senaryo: str, cagri) -> Counter:
+    taklit.sayac.clear()
+    taklit.senaryo = senaryo
+    try:
+        await cagri()
+    except Exception as e:
+        # Çakışma / bulunamadı senaryolarında HTTPException beklenir
+        status_code = getattr(e, "status_code", None)
+        if status_code not in (404, 409):
+            raise
+    return Counter(taklit.sayac)
+
+
+async def main() -> int:
+    from supabase import AsyncClient, AsyncClientOptions
+
+    from app import database
+    from app.routers.auth import RegisterRequest, register
+    from app.routers.contacts import create_contact, delete_contact, update_contact
+    from app.schemas.contacts import ContactCreate, ContactUpdate
+    from app.utils.security import shutdown_password_hasher
+
+    taklit = _PostgrestTaklidi()
+    database._http_client = httpx.AsyncClient(transport=httpx.MockTransport(taklit))
+    database._supabase = AsyncClient(
+        URL,
+        database.settings.SUPABASE_KEY,
+        options=AsyncClientOptions(httpx_client=database._http_client, auto_refresh_token=False, persist_session=False),
+    )
+
+    user_id = str(uuid.uuid4())
+    contact_id = str(uuid.uuid4())
+    kayit = RegisterRequest(email="ayse@example.com", password="Sifre1234", first_name="Ayşe")
+    kisi = ContactCreate(name="Mehmet", phone_number="+905551112233")
+    guncelleme = ContactUpdate(name="Mehmet Y.")
+
+    senaryolar = [
+        ("register", "basarili", lambda: register(kayit)),
+        ("register (e-posta kayıtlı)", "tekrar", lambda: register(kayit)),
+        ("kişi ekle", "basarili", lambda: create_contact(kisi, user_id)),
+        ("kişi ekle (telefon kayıtlı)", "tekrar", lambda: create_contact(kisi, user_id)),
+        ("kişi güncelle", "basarili", lambda: update_contact(contact_id, guncelleme, user_id)),
+        ("kişi güncelle (bulunamadı)", "bos", lambda: update_contact(contact_id, guncelleme, user_id)),
+        ("kişi sil", "basarili", lambda: delete_contact(contact_id, user_id)),
+        ("kişi sil (bulunamadı)", "bos", lambda: delete_contact(contact_id, user_id)),
+    ]
+
+    hatali = 0
+    for ad, senaryo, cagri in senaryolar:
+        sayac = await _say(taklit, senaryo, cagri)
+        toplam = sum(sayac.values())
+        detay = ", ".join(f"{method} /{tablo}: {adet}" for (method, tablo), adet in sorted(sayac.items()))
+        durum = "OK" if toplam == 1 else "FAZLA"
+        hatali += durum != "OK"
+        print(f"  [{durum:5}] {ad:30} {toplam} istek  ({detay})")
+
+    await database.close_supabase()
+    shutdown_password_hasher()
+    return 1 if hatali else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,106 @@
+"""
+Router sorgularının indeks kullandığını EXPLAIN ile doğrula
+
+Her sık sorgu için EXPLAIN (FORMAT JSON) planı alınır ve beklenen indeksin
+taranıp taranmadığı kontrol edilir. Küçük tablolarda planlayıcı sıralı taramayı
+seçebileceği için `enable_seqscan` oturum boyunca kapatılır; böylece indeksin
+sorguya *uygun* olup olmadığı test edilir. Bir sorgu indeks kullanmıyorsa
+betik sıfır olmayan kodla çıkar (CI'da migration sonrası çalıştırılabilir).
+
+Kullanım:
+    alembic upgrade head
+    python scripts/explain_sorgular.py
+"""
+import asyncio
+import json
+import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.database import engine, close_db
+from app.models import Checkin, Alarm, Bildirim, AcilKisi, RefreshToken, AlarmDurum
+
+KULLANICI_ID = uuid.uuid4()
+
+# (açıklama, sorgu, beklenen indeks)
+SORGULAR = [
+    (
+        "checkin geçmişi",
+        select(Checkin).where(Checkin.kullanici_id == KULLANICI_ID).order_by(Checkin.tarih.desc()).limit(20),
+        "ix_checkinler_kullanici_tarih",
+    ),
+    (
+        "checkin durumu (son check-in)",
+        select(Checkin).where(Checkin.kullanici_id == KULLANICI_ID).order_by(Checkin.tarih.desc()).limit(1),
+        "ix_checkinler_kullanici_tarih",
+    ),
+    (
+        "alarm geçmişi",
+        select(Alarm).where(Alarm.kullanici_id == KULLANICI_ID).order_by(Alarm.tarih.desc()).limit(50),
+        "ix_alarmlar_kullanici_tarih",
+    ),
+    (
+        "aktif alarmlar",
+        select(Alarm).where(Alarm.kullanici_id == KULLANICI_ID, Alarm.durum == AlarmDurum.AKTIF),
+        "ix_alarmlar_aktif",
+    ),
+    (
+        "bildirim geçmişi",
+        select(Bildirim).where(Bildirim.kullanici_id == KULLANICI_ID).order_by(Bildirim.tarih.desc()).limit(50),
+        "ix_bildirimler_kullanici_tarih",
+    ),
+    (
+        "okunmamış bildirimler",
+        select(Bildirim).where(Bildirim.kullanici_id == KULLANICI_ID, Bildirim.okundu == False)
+        .order_by(Bildirim.tarih.desc()),
+        "ix_bildirimler_okunmamis",
+    ),
+    (
+        "acil kişi listesi",
+        select(AcilKisi).where(AcilKisi.kullanici_id == KULLANICI_ID).order_by(AcilKisi.oncelik),
+        "ix_acil_kisiler_kullanici_oncelik",
+    ),
+    (
+        "oturumları sonlandır",
+        RefreshToken.__table__.update().where(RefreshToken.kullanici_id == KULLANICI_ID).values(iptal_edildi=True),
+        "ix_refresh_tokenlar_kullanici",
+    ),
+]
+
+
+def _kullanilan_indeksler(plan: dict) -> set:
+    indeksler = set()
+    if "Index Name" in plan:
+        indeksler.add(plan["Index Name"])
+    for alt in plan.get("Plans", []):
+        indeksler |= _kullanilan_indeksler(alt)
+    return indeksler
+
+
+async def main() -> int:
+    hatali = 0
+    async with engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        for aciklama, sorgu, beklenen in SORGULAR:
+            sql = str(sorgu.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            indeksler = _kullanilan_indeksler(plan[0]["Plan"])
+            if beklenen in indeksler:
+                print(f"✅ {aciklama}: {beklenen}")
+            else:
+                hatali += 1
+                print(f"❌ {aciklama}: {beklenen} kullanılmıyor (plan: {sorted(indeksler) or 'Seq Scan'})")
+    await close_db()
+    return 1 if hatali else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))